@@ -1,6 +1,8 @@
 # agentic_workflow.py
 
 import os
+from typing import Annotated, Optional
+
 from dotenv import load_dotenv
 
 # Load environment variables just once, ideally at program entry point
@@ -8,18 +10,93 @@ load_dotenv()
 
 from utils.model_loader import ModelLoader
 from prompt_library.prompt import SYSTEM_PROMPT  # Updated import path for prompt consistency
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.errors import GraphRecursionError
 from langgraph.graph import StateGraph, MessagesState, END, START
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.types import Send
+
+from Agent.history import compact_history, is_follow_up, prior_tool_results
+from Agent.multi_destination import (
+    DIGEST_NUDGE, CityDigest, Stop, city_digest, digests_context, merge_digests,
+    multi_destination_settings, plan_stops, research_messages, route_text,
+)
+from Agent.tool_executor import ToolExecutor
+from Agent.tool_keys import tool_call_key
+from Agent.tool_router import bind_subset, route_iteration, route_query
+from utils.config_loader import load_config
+from utils.deadline import SYNTHESIS_RESERVE, deadline_from_config, worst_degradation
+from utils.plan_model import invoke_structured
+from utils.planner.sections import (
+    OUTLINE_INSTRUCTIONS, TOOL_TOPICS, synthesis_settings, wants_itinerary, write_plan, write_sections,
+)
+from utils.query_parser import parse_query
 
 # Tool imports: Ensure these return .*_tool_list as per your PlaceSearchTool etc.
 from tools.weather_info_tool import WeatherInfoTool
 from tools.place_search_tool import PlaceSearchTool
 from tools.expense_calculator_tool import CalculatorTool
 from tools.currency_conversion_tool import CurrencyConverterTool
+from tools.budget_tool import BudgetTool
+
+
+# Default per-call LLM timeout (matches ModelLoader); the deadline can only shorten it
+LLM_TIMEOUT = 60
+
+FINAL_SYNTHESIS_NUDGE = (
+    "Time is almost up. Do not call any more tools. Write the final travel plan now "
+    "using only the data gathered above, and clearly mark anything that is missing."
+)
+
+FOLLOW_UP_HINT = SystemMessage(
+    content=(
+        "This is a follow-up in an ongoing conversation. Tool results from earlier turns "
+        "are above: reuse them, and only call tools for data you do not have yet."
+    )
+)
+
+
+SECTIONED_OUTLINE_HINT = SystemMessage(
+    content=(
+        "When you have all the data you need, do NOT write the full plan yourself. "
+        + OUTLINE_INSTRUCTIONS
+    )
+)
+
+
+ALREADY_RETRIEVED = (
+    "[Already retrieved earlier in this run — same call, cached result below. "
+    "Do not call this tool again with these arguments.]\n"
+)
+
+
+class AgentState(MessagesState):
+    """
+    Conversation messages plus per-run bookkeeping:
+      - degradation:  the degradation level applied in this run
+      - tool_cache:   tool-call key → result of every successful call this run
+      - repeat_calls: calls answered from tool_cache (a prompt-tuning signal)
+      - city_digests: per-stop research of a multi-destination run
+                      (Agent/multi_destination.py), appended by parallel branches
+      - structured_plan: the run's TravelPlan as a dict (utils/plan_model.py),
+                      when sectioned synthesis wrote it in structured mode
+    """
+    degradation: str
+    tool_cache: dict[str, str]
+    repeat_calls: int
+    city_digests: Annotated[list[CityDigest], merge_digests]
+    structured_plan: Optional[dict]
+
+
+def _timeout_kwargs(seconds: float) -> dict:
+    """Per-call `timeout` override; empty when the run has no deadline."""
+    if seconds == float("inf"):
+        return {}
+    return {"timeout": max(seconds, 1.0)}
 
 
 class GraphBuilder:
-    def __init__(self, model_provider: str = "groq"):
+    def __init__(self, model_provider: str = "groq", routing: Optional[bool] = None):
         # 1. Load model
         self.model_loader = ModelLoader(model_provider=model_provider)
         self.llm = self.model_loader.load_llm()
@@ -31,43 +108,342 @@ class GraphBuilder:
         self.place_search_tools = PlaceSearchTool()
         self.calculator_tools = CalculatorTool()
         self.currency_converter_tools = CurrencyConverterTool()
+        self.budget_tools = BudgetTool()
 
         self.tools = []
         self.tools.extend(self.weather_tools.weather_tool_list)
         self.tools.extend(self.place_search_tools.place_search_tool_list)
         self.tools.extend(self.calculator_tools.calculator_tool_list)
         self.tools.extend(self.currency_converter_tools.currency_converter_tool_list)
+        self.tools.extend(self.budget_tools.budget_tool_list)
 
         # 3. Bind tools to LLM so agent can call them dynamically
-        self.llm_with_tools = self.llm.bind_tools(tools=self.tools)
+        # With routing (config.yaml → tools.routing) each call only gets the tools its
+        # query / iteration needs; bindings are cached per subset (Agent/tool_router.py)
+        self.tool_names = [tool.name for tool in self.tools]
+        if routing is None:
+            routing = (load_config().get("tools") or {}).get("routing", True)
+        self.routing = routing
+        self.llm_with_tools = bind_subset(self.llm, self.tools, frozenset(self.tool_names))
+        # Same tool schemas, but tool calls disabled: used to force final synthesis
+        self.llm_final = bind_subset(self.llm, self.tools, frozenset(self.tool_names), tool_choice="none")
 
         # 4. Store system prompt for reuse
         self.system_prompt = SYSTEM_PROMPT
 
-    def agent_function(self, state: MessagesState):
+        # 5. Final answer: outline + concurrent sections (config.yaml → synthesis) or one call
+        self.synthesis = synthesis_settings()
+        self.sectioned = self.synthesis["mode"] == "sectioned"
+
+        # 6. Multi-city trips: one parallel research subgraph per stop (config.yaml → multi_destination)
+        self.multi_destination = multi_destination_settings()
+
+    @staticmethod
+    def _latest_question(messages) -> str:
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return str(message.content)
+        return ""
+
+    def _use_sections(self, messages) -> bool:
+        if not self.sectioned:
+            return False
+        question = self._latest_question(messages)
+        return wants_itinerary(question, parse_query(question)["days"])
+
+    def bound_llm(self, messages, final: bool = False):
+        """The LLM bound to the tools this query and iteration still need."""
+        if not self.routing:
+            return self.llm_final if final else self.llm_with_tools
+        question = self._latest_question(messages)
+        query_tools = route_query(question, self.tool_names)
+        if not final:
+            tools = route_iteration(query_tools, messages, parse_query(question)["destinations"])
+            if tools:
+                print(f"🧭 {len(tools)}/{len(self.tool_names)} tools bound: {', '.join(sorted(tools))}")
+                return bind_subset(self.llm, self.tools, tools)
+            print("🧭 All routed tools answered; final turn without tool calls")
+        # Same schemas as the query's subset, tool calls disabled
+        return bind_subset(self.llm, self.tools, query_tools, tool_choice="none")
+
+    def _agent_turn(self, messages, config: RunnableConfig, hints: list, nudge: str, plan_hints: list = ()):
+        """
+        One agent LLM call over `messages`, with `hints` after the system prompt.
+        Near the deadline the agent must answer now (`nudge`, no tools);
+        otherwise `plan_hints` are added too.
+        """
+        deadline = deadline_from_config(config)
+
+        # Out of time for more tool rounds: force the final answer now
+        has_tool_results = any(isinstance(m, ToolMessage) for m in messages)
+        if has_tool_results and deadline.remaining() < SYNTHESIS_RESERVE:
+            print(f"⏱️ {deadline} — skipping further tool rounds")
+            response = self.bound_llm(messages, final=True).invoke(
+                [self.system_prompt, *hints, *messages, HumanMessage(content=nudge)],
+                **_timeout_kwargs(deadline.share(cap=LLM_TIMEOUT)),
+            )
+            return {"messages": [response], "degradation": "early_synthesis"}
+
+        response = self.bound_llm(messages).invoke(
+            [self.system_prompt, *plan_hints, *hints, *messages],
+            **_timeout_kwargs(deadline.share(0.6, cap=LLM_TIMEOUT)),
+        )
+        return {"messages": [response]}
+
+    def agent_function(self, state: AgentState, config: RunnableConfig):
         """The main function for the AI agent in the graph."""
         user_messages = state["messages"]
-        # Ensure the system prompt is always prepended for every query
-        full_prompt = [self.system_prompt] + user_messages
-        response = self.llm_with_tools.invoke(full_prompt)
-        return {"messages": [response]}
+        # The system prompt is always prepended for every query
+        hints = [FOLLOW_UP_HINT] if is_follow_up(user_messages) else []
+        # Sectioned synthesis: the agent's last turn is an outline, the synthesize node writes the plan
+        plan_hints = [SECTIONED_OUTLINE_HINT] if self._use_sections(user_messages) else []
+        return self._agent_turn(user_messages, config, hints, FINAL_SYNTHESIS_NUDGE, plan_hints)
+
+    def route_after_agent(self, state: AgentState) -> str:
+        """tools → more data; synthesize → the last turn was an outline; END → the answer is final."""
+        last = state["messages"][-1]
+        if getattr(last, "tool_calls", None):
+            return "tools"
+        if state.get("degradation") != "early_synthesis" and self._use_sections(state["messages"]):
+            return "synthesize"
+        return END
+
+    def _write_plan(self, request: str, outline: str, context: dict, days, config: RunnableConfig, timeout: dict):
+        """
+        Concurrent sections from `outline`: TravelPlan parts rendered locally
+        (synthesis.structured) or Markdown sections. Returns (plan, section count).
+        """
+        on_section = config.get("configurable", {}).get("on_section")
+        if self.synthesis["structured"]:
+            def invoke(section_messages, schema, max_tokens):
+                return invoke_structured(self.llm, schema, section_messages, max_tokens=max_tokens, **timeout)
+
+            plan = write_plan(invoke, request, outline, context, days, on_section=on_section, settings=self.synthesis)
+            return {"markdown": plan["markdown"], "structured_plan": plan["plan"].model_dump()}, len(plan["sections"])
+
+        def invoke(section_messages, max_tokens):
+            return self.llm.invoke(section_messages, max_tokens=max_tokens, **timeout).content
+
+        plan = write_sections(invoke, request, outline, context, days, on_section=on_section, settings=self.synthesis)
+        return {"markdown": plan["markdown"], "structured_plan": None}, len(plan["sections"])
+
+    def synthesize_function(self, state: AgentState, config: RunnableConfig):
+        """
+        Write the final plan from the agent's outline as concurrent, bounded
+        section calls (utils/planner/sections.py). The stitched plan replaces
+        the outline message; config["configurable"]["on_section"] receives
+        each section as it completes.
+        """
+        messages = state["messages"]
+        outline = messages[-1]
+        question = self._latest_question(messages)
+        timeout = _timeout_kwargs(deadline_from_config(config).share(cap=LLM_TIMEOUT))
+
+        context: dict[str, list[str]] = {}
+        seen = set()
+        for message in messages:
+            if not isinstance(message, ToolMessage) or message.status == "error":
+                continue
+            content = str(message.content).removeprefix(ALREADY_RETRIEVED)
+            if content in seen:
+                continue
+            seen.add(content)
+            topic = TOOL_TOPICS.get(message.name, "other")
+            context.setdefault(topic, []).append(f"### {message.name}\n{content}")
+
+        plan, sections = self._write_plan(
+            question,
+            str(outline.content),
+            {topic: "\n\n".join(parts) for topic, parts in context.items()},
+            parse_query(question)["days"],
+            config,
+            timeout,
+        )
+        print(f"🧩 Plan written as {sections} concurrent section(s)")
+        # Same id: replaces the outline in the thread history
+        return {
+            "messages": [AIMessage(content=plan["markdown"], id=outline.id)],
+            "structured_plan": plan["structured_plan"],
+        }
+
+    # ---- multi-destination trips ----
+
+    def route_after_compact(self, state: AgentState):
+        """One research branch per stop for a new multi-city trip; otherwise the agent loop."""
+        messages = state["messages"]
+        if not self.multi_destination["enabled"] or is_follow_up(messages):
+            return "agent"
+        stops = plan_stops(self._latest_question(messages), self.multi_destination["min_stops"])
+        if not stops:
+            return "agent"
+        print(f"🗺️ Multi-destination trip: researching {len(stops)} stops in parallel")
+        return [Send("research", stop) for stop in stops]
+
+    def city_agent_function(self, state: AgentState, config: RunnableConfig):
+        """The research subgraph's agent: tool rounds for one stop, then its digest."""
+        return self._agent_turn(state["messages"], config, [], DIGEST_NUDGE)
+
+    def research_function(self, stop: Stop, config: RunnableConfig):
+        """
+        Research one stop in its own agent ↔ tools subgraph, bounded by
+        `city_recursion_limit` and the run's deadline. Returns the stop's
+        digest and its tool exchanges (so provenance and follow-ups see the
+        tool results), never the shared per-run cache fields: branches run
+        in parallel.
+        """
+        configurable = config.get("configurable", {})
+        city_config = {
+            "recursion_limit": self.multi_destination["city_recursion_limit"],
+            "configurable": {key: configurable.get(key) for key in ("prefetcher", "deadline")},
+        }
+        start = research_messages(stop)
+        state = {"messages": start}
+        try:
+            for state in self.city_graph.stream(
+                {"messages": start, "tool_cache": {}, "repeat_calls": 0}, config=city_config, stream_mode="values"
+            ):
+                pass
+        except GraphRecursionError:
+            print(f"⚠️ {stop['city']}: research hit its recursion limit; using the data gathered")
+
+        digest = city_digest(stop, state, len(start), self.multi_destination["digest_chars"])
+        print(f"📍 {stop['city']}: {digest['tool_calls']} tool result(s), digest {'ready' if digest['complete'] else 'from raw data'}")
+        exchanges = [m for m in state["messages"][len(start):] if isinstance(m, ToolMessage) or getattr(m, "tool_calls", None)]
+        return {"messages": exchanges, "city_digests": [digest]}
+
+    def synthesize_trip_function(self, state: AgentState, config: RunnableConfig):
+        """
+        Merge the stops' digests into one plan: an outline over all stops,
+        then concurrent sections (or one call in single synthesis mode).
+        """
+        digests = state.get("city_digests") or []
+        question = self._latest_question(state["messages"])
+        days = parse_query(question)["days"]
+        timeout = _timeout_kwargs(deadline_from_config(config).share(cap=LLM_TIMEOUT))
+        data = digests_context(digests)
+        route = f"Stops in order: {route_text(digests)}. Days per stop follow the research below."
+        request = HumanMessage(content=f"{question}\n\n{route}\n\nResearch per stop:\n{data}")
+
+        if self.sectioned:
+            outline = self.llm.invoke(
+                [self.system_prompt, request, HumanMessage(content=OUTLINE_INSTRUCTIONS)],
+                max_tokens=self.synthesis["outline_max_tokens"], **timeout,
+            ).content
+
+            plan, sections = self._write_plan(f"{question}\n{route}", str(outline), {"other": data}, days, config, timeout)
+            print(f"🧩 {len(digests)}-stop plan written as {sections} concurrent section(s)")
+        else:
+            plan = {"markdown": self.llm.invoke(
+                [self.system_prompt, request],
+                max_tokens=self.synthesis["section_max_tokens"], **timeout,
+            ).content, "structured_plan": None}
+
+        return {
+            "messages": [AIMessage(content=plan["markdown"])],
+            "structured_plan": plan["structured_plan"],
+            "repeat_calls": sum(d["repeat_calls"] for d in digests),
+            "degradation": worst_degradation(*(d["degradation"] for d in digests)),
+        }
+
+    def tools_function(self, state: AgentState, config: RunnableConfig):
+        """
+        Execute the agent's tool calls concurrently with per-tool timeouts,
+        leaving enough of the request deadline for the final synthesis.
+        Calls already started speculatively (config["configurable"]["prefetcher"])
+        are answered from the prefetch; calls made in earlier turns of the
+        thread are answered from their previous results.
+        """
+        tool_calls = state["messages"][-1].tool_calls
+        prefetcher = config.get("configurable", {}).get("prefetcher")
+        budget = deadline_from_config(config).share(reserve=SYNTHESIS_RESERVE)
+
+        # Same tool + normalized args already called in this run (or earlier in this message)
+        tool_cache = state.get("tool_cache") or {}
+        keys = {call["id"]: tool_call_key(call["name"], call["args"]) for call in tool_calls}
+        seen = set(tool_cache)
+        repeated = set()
+        for call in tool_calls:
+            if keys[call["id"]] in seen:
+                repeated.add(call["id"])
+            seen.add(keys[call["id"]])
+
+        messages = self.tool_executor.execute(
+            tool_calls,
+            prefetcher=prefetcher,
+            budget=max(budget, 1.0),
+            known_results={**prior_tool_results(state["messages"]), **tool_cache},
+        )
+
+        new_results = {}
+        for message in messages:
+            if message.status == "error":
+                continue
+            if message.tool_call_id in repeated:
+                message.content = ALREADY_RETRIEVED + str(message.content)
+            else:
+                new_results[keys[message.tool_call_id]] = str(message.content)
+
+        if repeated:
+            print(f"♻️ {len(repeated)} repeated tool call(s) answered from this run's cache")
+        return {
+            "messages": messages,
+            "tool_cache": {**tool_cache, **new_results},
+            "repeat_calls": (state.get("repeat_calls") or 0) + len(repeated),
+        }
+
+    def compact_function(self, state: AgentState):
+        """Compact earlier turns of a checkpointed thread before the agent runs."""
+        # degradation and the tool cache are per run; don't inherit the previous turn's
+        return {
+            "messages": compact_history(state["messages"]),
+            "degradation": "full",
+            "tool_cache": {},
+            "repeat_calls": 0,
+            "city_digests": [],
+            "structured_plan": None,
+        }
+
+    def build_graph(self, checkpointer=None):
+        """
+        Build and compile the conversation state graph.
+        Pass a LangGraph checkpointer to persist threads across calls.
+        """
+        self.tool_executor = ToolExecutor(self.tools)
+
+        # Research subgraph for one stop of a multi-city trip; not checkpointed on its own
+        city_builder = StateGraph(AgentState)
+        city_builder.add_node("agent", self.city_agent_function)
+        city_builder.add_node("tools", self.tools_function)
+        city_builder.add_edge(START, "agent")
+        city_builder.add_conditional_edges(
+            "agent", lambda state: "tools" if getattr(state["messages"][-1], "tool_calls", None) else END,
+            ["tools", END],
+        )
+        city_builder.add_edge("tools", "agent")
+        self.city_graph = city_builder.compile(checkpointer=False)
 
-    def build_graph(self):
-        """Build and compile the conversation state graph."""
-        graph_builder = StateGraph(MessagesState)
+        graph_builder = StateGraph(AgentState)
+        graph_builder.add_node("compact", self.compact_function)
         graph_builder.add_node("agent", self.agent_function)
-        graph_builder.add_node("tools", ToolNode(tools=self.tools))
+        graph_builder.add_node("tools", self.tools_function)
+        graph_builder.add_node("synthesize", self.synthesize_function)
+        graph_builder.add_node("research", self.research_function)
+        graph_builder.add_node("synthesize_trip", self.synthesize_trip_function)
 
-        graph_builder.add_edge(START, "agent")
-        graph_builder.add_conditional_edges("agent", tools_condition)
+        graph_builder.add_edge(START, "compact")
+        graph_builder.add_conditional_edges("compact", self.route_after_compact, ["agent", "research"])
+        graph_builder.add_conditional_edges("agent", self.route_after_agent, ["tools", "synthesize", END])
         graph_builder.add_edge("tools", "agent")
-        graph_builder.add_edge("agent", END)
+        graph_builder.add_edge("synthesize", END)
+        # Fan-in: runs once, after every research branch has finished
+        graph_builder.add_edge("research", "synthesize_trip")
+        graph_builder.add_edge("synthesize_trip", END)
 
-        self.graph = graph_builder.compile()
+        self.graph = graph_builder.compile(checkpointer=checkpointer)
         return self.graph
 
-    def __call__(self):
-        return self.build_graph()
+    def __call__(self, checkpointer=None):
+        return self.build_graph(checkpointer=checkpointer)
 
 
 # Optional: standalone test run
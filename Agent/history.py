@@ -0,0 +1,120 @@
+"""
+Conversation History — compaction and reuse for checkpointed threads
+--------------------------------------------------------------------
+With a checkpointer, every follow-up question ("make it 3 days instead")
+arrives on top of the previous turns. To keep context and checkpoint size
+bounded:
+  - only the last MAX_PRIOR_TURNS earlier turns are kept
+  - tool results and answers from earlier turns are truncated to digests
+  - tool calls left unanswered by an interrupted turn are dropped
+
+Tool results from earlier turns are looked up by tool-call key, so a
+follow-up gets them back without calling the external API again. Results
+that go stale within a thread's lifetime (weather, exchange rates) and
+results already cut to a digest are never reused: those calls run again
+(and are usually answered by the shared cache while still fresh).
+"""
+
+from __future__ import annotations
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, ToolMessage
+
+from Agent.tool_keys import tool_call_key
+
+
+MAX_PRIOR_TURNS = 4
+TOOL_RESULT_CHARS = 1200
+ANSWER_CHARS = 1500
+_TRUNCATED = " …[truncated]"
+
+# Tools whose results are only valid for minutes to hours; a thread lives up to days
+VOLATILE_TOOLS = frozenset({
+    "get_current_weather", "get_weather_forecast", "convert_currency", "compute_trip_budget",
+})
+
+
+def split_turns(messages: list[BaseMessage]) -> tuple[list[BaseMessage], list[list[BaseMessage]]]:
+    """(messages before the first question, turns each starting with a HumanMessage)."""
+    preamble: list[BaseMessage] = []
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+        else:
+            preamble.append(message)
+    return preamble, turns
+
+
+def _truncate(message: BaseMessage, limit: int) -> BaseMessage | None:
+    content = message.content
+    if not isinstance(content, str) or len(content) <= limit or content.endswith(_TRUNCATED):
+        return None
+    return message.model_copy(update={"content": content[:limit] + _TRUNCATED})
+
+
+def compact_history(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """
+    State updates (RemoveMessage / same-id replacements) that compact every
+    turn before the current one. Returns [] when nothing needs to change.
+    """
+    _, turns = split_turns(messages)
+    if len(turns) <= 1:
+        return []
+
+    prior = turns[:-1]
+    updates: list[BaseMessage] = []
+
+    for turn in prior[:-MAX_PRIOR_TURNS]:
+        updates.extend(RemoveMessage(id=m.id) for m in turn)
+
+    for turn in prior[-MAX_PRIOR_TURNS:]:
+        answered = {m.tool_call_id for m in turn if isinstance(m, ToolMessage)}
+        for message in turn:
+            if isinstance(message, AIMessage) and message.tool_calls:
+                if any(call["id"] not in answered for call in message.tool_calls):
+                    # Interrupted turn: a dangling tool call would break the next LLM request
+                    updates.append(RemoveMessage(id=message.id))
+                    updates.extend(
+                        RemoveMessage(id=m.id) for m in turn
+                        if isinstance(m, ToolMessage)
+                        and m.tool_call_id in {c["id"] for c in message.tool_calls}
+                    )
+                continue
+
+            limit = TOOL_RESULT_CHARS if isinstance(message, ToolMessage) else ANSWER_CHARS
+            if isinstance(message, (ToolMessage, AIMessage)):
+                replacement = _truncate(message, limit)
+                if replacement is not None:
+                    updates.append(replacement)
+
+    return updates
+
+
+def prior_tool_results(messages: list[BaseMessage]) -> dict[str, str]:
+    """
+    Successful, complete results of non-volatile tools from earlier turns,
+    keyed by tool-call key.
+    """
+    _, turns = split_turns(messages)
+    results: dict[str, str] = {}
+    for turn in turns[:-1]:
+        calls = {
+            call["id"]: tool_call_key(call["name"], call["args"])
+            for m in turn if isinstance(m, AIMessage)
+            for call in m.tool_calls
+            if call["name"] not in VOLATILE_TOOLS
+        }
+        for message in turn:
+            if not isinstance(message, ToolMessage) or message.status == "error" or message.tool_call_id not in calls:
+                continue
+            content = str(message.content)
+            if content.endswith(_TRUNCATED):
+                continue
+            results[calls[message.tool_call_id]] = content
+    return results
+
+
+def is_follow_up(messages: list[BaseMessage]) -> bool:
+    return sum(isinstance(m, HumanMessage) for m in messages) > 1
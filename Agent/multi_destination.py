@@ -0,0 +1,150 @@
+"""
+Multi-Destination Trips — one research subgraph per stop
+--------------------------------------------------------
+A single agent ↔ tools loop researches the cities of a multi-city trip one
+after another and runs out of `recursion_limit` before the last stop. For
+questions with `min_stops` or more stops (utils/gazetteer.py → trip_stops)
+the graph instead fans out with LangGraph `Send`:
+
+  compact ──Send──▶ research (Paris)   ─┐
+          ├─Send──▶ research (Rome)    ─┼─▶ synthesize_trip ──▶ END
+          └─Send──▶ research (Lisbon)  ─┘
+
+Each research branch runs its own agent ↔ tools subgraph with its own
+bounded context (only that stop's question and tool results) and its own
+`city_recursion_limit`, and ends with a short digest of the stop. The
+branches run in parallel, so latency follows the slowest city; the merge
+step writes the plan from the digests only.
+
+config.yaml → multi_destination.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from utils.config_loader import load_config
+from utils.gazetteer import trip_stops
+from utils.query_parser import parse_query
+
+
+_DEFAULTS = {
+    "enabled": True,
+    "min_stops": 2,               # fewer stops use the single agent loop
+    "city_recursion_limit": 8,    # per research subgraph
+    "digest_chars": 2500,         # a digest is cut to this size before the merge
+}
+
+
+class Stop(TypedDict):
+    index: int              # position in the trip, from 0
+    city: str
+    days: Optional[int]     # this stop's share of the trip's days
+    stops: int              # number of stops in the trip
+    question: str           # the whole trip request
+
+
+class CityDigest(TypedDict):
+    index: int
+    city: str
+    days: Optional[int]
+    digest: str             # the research subgraph's summary of the stop
+    tool_calls: int
+    repeat_calls: int
+    complete: bool          # False: the subgraph stopped early, digest built from raw tool output
+    degradation: str        # utils.deadline.DEGRADATION_LEVELS, for this stop's research
+
+
+def merge_digests(current: Optional[list], update: Optional[list]) -> list:
+    """State reducer: research branches append their digest; an empty list resets for a new run."""
+    if not update:
+        return []
+    return (current or []) + update
+
+
+def multi_destination_settings() -> dict:
+    try:
+        return {**_DEFAULTS, **(load_config().get("multi_destination") or {})}
+    except Exception:
+        return dict(_DEFAULTS)
+
+
+def _split_days(days: Optional[int], count: int) -> list[Optional[int]]:
+    """Days per stop: an even split, the remainder going to the first stops."""
+    if not days:
+        return [None] * count
+    share, extra = divmod(days, count)
+    return [share + (i < extra) for i in range(count)]
+
+
+def plan_stops(question: str, min_stops: int = _DEFAULTS["min_stops"]) -> list[Stop]:
+    """The trip's stops in order, or [] when the question is not a multi-destination trip."""
+    parsed = parse_query(question)
+    cities = trip_stops(parsed["destinations"])
+    if len(cities) < max(min_stops, 2):
+        return []
+    return [
+        Stop(index=i, city=city, days=days, stops=len(cities), question=question)
+        for i, (city, days) in enumerate(zip(cities, _split_days(parsed["days"], len(cities))))
+    ]
+
+
+def research_messages(stop: Stop) -> list:
+    """
+    The research subgraph's starting context: the whole request as background,
+    and a question that names only this stop (the tool router reads the
+    destinations and days from it).
+    """
+    hint = SystemMessage(content=(
+        f"Trip request: {stop['question']}\n"
+        f"You are researching stop {stop['index'] + 1} of {stop['stops']} of this trip. "
+        f"Other stops are researched separately, so call tools only for {stop['city']}: weather, "
+        f"attractions, off-beat places, restaurants, transportation and the stop's costs.\n"
+        "When you have the data, do NOT write an itinerary. Reply with a factual digest of at most "
+        "200 words in bullet points: weather, top attractions, off-beat places, restaurants with "
+        "price ranges, getting around, and typical daily costs with their currency."
+    ))
+    span = f"a {stop['days']}-day stop" if stop["days"] else "a stop"
+    return [hint, HumanMessage(content=f"Research {span} in {stop['city']} on a multi-city trip.")]
+
+
+DIGEST_NUDGE = (
+    "Time is almost up. Do not call any more tools. Write the digest of this stop now "
+    "using only the data gathered above, and clearly mark anything that is missing."
+)
+
+
+def city_digest(stop: Stop, state: dict, start: int, limit: int) -> CityDigest:
+    """The stop's digest from the subgraph's final message, or from its raw tool output."""
+    messages = state["messages"][start:]
+    tool_results = [m for m in messages if isinstance(m, ToolMessage) and m.status != "error"]
+    last = messages[-1] if messages else None
+    complete = isinstance(last, AIMessage) and bool(last.content) and not last.tool_calls
+    if complete:
+        digest = str(last.content)
+    elif tool_results:
+        digest = "\n".join(f"### {m.name}\n{str(m.content)[:600]}" for m in tool_results)
+    else:
+        digest = "(no data gathered for this stop)"
+    return CityDigest(
+        index=stop["index"], city=stop["city"], days=stop["days"],
+        digest=digest[:limit], tool_calls=len(tool_results),
+        repeat_calls=state.get("repeat_calls") or 0, complete=complete,
+        degradation=(state.get("degradation") or "full") if complete else "early_synthesis",
+    )
+
+
+def digests_context(digests: list[CityDigest]) -> str:
+    """All stops' digests in trip order, for the merge step."""
+    parts = []
+    for item in sorted(digests, key=lambda d: d["index"]):
+        span = f" — {item['days']} day(s)" if item["days"] else ""
+        note = "" if item["complete"] else "\n(research stopped early; raw tool output)"
+        parts.append(f"### Stop {item['index'] + 1}: {item['city']}{span}{note}\n{item['digest']}")
+    return "\n\n".join(parts)
+
+
+def route_text(digests: list[CityDigest]) -> str:
+    return " → ".join(d["city"] for d in sorted(digests, key=lambda d: d["index"]))
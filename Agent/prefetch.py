@@ -0,0 +1,128 @@
+"""
+Speculative Tool Prefetch
+-------------------------
+Starts weather and place lookups for the destinations found by the
+rule-based query parser as soon as a request arrives, in parallel with the
+agent's first LLM call. When the LLM then asks for the same tool with the
+same (normalized) arguments, the result is served from the prefetch.
+
+Per-run and process-wide counters record how many prefetches were used
+(hits) and how many were never asked for (wasted).
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from Agent.tool_keys import tool_call_key
+from utils.query_parser import ParsedQuery
+
+
+# (tool name, argument name) pairs started for every parsed destination
+PREFETCH_PLAN = (
+    ("get_current_weather", "city"),
+    ("get_weather_forecast", "city"),
+    ("search_attractions", "place"),
+)
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+_totals = {"runs": 0, "prefetched": 0, "hits": 0, "wasted": 0, "failed": 0, "lookups": 0}
+_totals_lock = threading.Lock()
+
+
+def prefetch_stats() -> dict:
+    """Process-wide prefetch counters plus hit and waste rates."""
+    with _totals_lock:
+        stats = dict(_totals)
+    prefetched = stats["prefetched"] or 1
+    stats["hit_rate"] = stats["hits"] / prefetched
+    stats["waste_rate"] = stats["wasted"] / prefetched
+    stats["coverage"] = stats["hits"] / (stats["lookups"] or 1)
+    return stats
+
+
+class ToolPrefetcher:
+    """Speculative tool calls for a single agent run."""
+
+    def __init__(
+        self,
+        tools: list,
+        max_destinations: int = 3,
+        invoke: Optional[Callable[[str, dict], object]] = None,
+    ):
+        self.tools_by_name = {t.name: t for t in tools}
+        # e.g. ToolExecutor.invoke_tool, so prefetches respect backend limits
+        self.invoke = invoke or (lambda name, args: self.tools_by_name[name].invoke(args))
+        self.max_destinations = max_destinations
+        self._futures: dict[str, Future] = {}
+        self._used: set[str] = set()
+        self._lookups = 0
+        self._lock = threading.Lock()
+
+    def start(self, parsed: ParsedQuery) -> int:
+        """Submit lookups for the parsed destinations; returns how many were started."""
+        started = 0
+        for destination in parsed["destinations"][: self.max_destinations]:
+            for tool_name, arg_name in PREFETCH_PLAN:
+                if tool_name not in self.tools_by_name:
+                    continue
+                args = {arg_name: destination}
+                key = tool_call_key(tool_name, args)
+                with self._lock:
+                    if key in self._futures:
+                        continue
+                    self._futures[key] = _executor.submit(self.invoke, tool_name, args)
+                started += 1
+
+        if started:
+            print(f"⚡ Prefetching {started} tool call(s) for {parsed['destinations'][: self.max_destinations]}")
+        return started
+
+    def take(self, tool_name: str, args: dict) -> Optional[str]:
+        """
+        Result of a matching prefetch (waiting for it if still running),
+        or None when nothing matching was prefetched or the prefetch failed.
+        """
+        key = tool_call_key(tool_name, args)
+        with self._lock:
+            self._lookups += 1
+            future = self._futures.get(key)
+            if future is None or key in self._used:
+                return None
+            self._used.add(key)
+
+        try:
+            return str(future.result())
+        except Exception as exc:
+            print(f"⚠️ Prefetch of {tool_name} failed, running it normally: {exc}")
+            with self._lock:
+                self._used.discard(key)
+                self._futures.pop(key, None)
+            with _totals_lock:
+                _totals["failed"] += 1
+            return None
+
+    def finish(self) -> dict:
+        """Cancel unused work and fold this run's counters into the process totals."""
+        with self._lock:
+            unused = [k for k in self._futures if k not in self._used]
+            for key in unused:
+                self._futures[key].cancel()
+            run = {
+                "prefetched": len(self._futures),
+                "hits": len(self._used),
+                "wasted": len(unused),
+                "lookups": self._lookups,
+            }
+
+        with _totals_lock:
+            _totals["runs"] += 1
+            for name, value in run.items():
+                _totals[name] += value
+
+        if run["prefetched"]:
+            print(f"⚡ Prefetch: {run['hits']} hit(s), {run['wasted']} wasted of {run['prefetched']}")
+        return run
@@ -0,0 +1,176 @@
+"""
+Tool Executor — bounded, concurrent tool execution for the agent graph
+----------------------------------------------------------------------
+Replaces LangGraph's plain ToolNode:
+  - all tool calls of one AI turn run concurrently on a shared thread pool
+  - every tool has its own timeout (config.yaml → tools.timeouts)
+  - a process-wide semaphore per backend (tools.backends / tools.concurrency)
+    caps in-flight Google Places / Tavily / OpenWeatherMap / FX calls across
+    all concurrent requests
+  - a call that does not finish in time is answered immediately with a
+    structured "unavailable" ToolMessage instead of stalling the graph
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional
+
+from langchain_core.messages import ToolMessage
+
+from Agent.tool_keys import tool_call_key
+from utils.config_loader import load_config
+
+
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="tool")
+
+_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+
+def backend_semaphore(backend: str, limit: int) -> threading.BoundedSemaphore:
+    """Process-wide semaphore for a backend (created on first use)."""
+    with _semaphores_lock:
+        if backend not in _semaphores:
+            _semaphores[backend] = threading.BoundedSemaphore(limit)
+        return _semaphores[backend]
+
+
+class ToolUnavailable(Exception):
+    """A tool could not run within its time budget."""
+
+
+def unavailable_message(call: dict, reason: str) -> ToolMessage:
+    """Structured ToolMessage telling the agent to proceed without this tool's data."""
+    content = json.dumps({
+        "status": "unavailable",
+        "tool": call["name"],
+        "reason": reason,
+        "instruction": "Continue without this data and state clearly that it is unavailable.",
+    })
+    return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+
+def _as_content(output) -> str:
+    if isinstance(output, str):
+        return output
+    try:
+        return json.dumps(output, default=str)
+    except Exception:
+        return str(output)
+
+
+class ToolExecutor:
+    """Runs the tool calls of one AI message with per-tool timeouts and backend limits."""
+
+    def __init__(self, tools: list, config: Optional[dict] = None):
+        tool_config = (config if config is not None else load_config()).get("tools", {}) or {}
+
+        self.tools_by_name = {t.name: t for t in tools}
+        self.default_timeout = float(tool_config.get("default_timeout", 20))
+        self.timeouts = {k: float(v) for k, v in (tool_config.get("timeouts") or {}).items()}
+        self.backends = dict(tool_config.get("backends") or {})
+        self.concurrency = dict(tool_config.get("concurrency") or {})
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.timeouts.get(tool_name, self.default_timeout)
+
+    def invoke_tool(self, tool_name: str, args: dict, wait: Optional[float] = None):
+        """
+        Invoke a tool while holding its backend's concurrency slot.
+        Raises ToolUnavailable if no slot frees up within `wait` seconds.
+        """
+        tool = self.tools_by_name[tool_name]
+        backend = self.backends.get(tool_name)
+        if backend is None or backend not in self.concurrency:
+            return tool.invoke(args)
+
+        semaphore = backend_semaphore(backend, int(self.concurrency[backend]))
+        wait = self.timeout_for(tool_name) if wait is None else wait
+        if not semaphore.acquire(timeout=max(wait, 0)):
+            raise ToolUnavailable(f"{backend} is at its concurrency limit")
+        try:
+            return tool.invoke(args)
+        finally:
+            semaphore.release()
+
+    def _run_call(self, call: dict, deadline: float, prefetcher=None) -> ToolMessage:
+        if prefetcher is not None:
+            prefetched = prefetcher.take(call["name"], call["args"])
+            if prefetched is not None:
+                return ToolMessage(content=prefetched, name=call["name"], tool_call_id=call["id"])
+
+        output = self.invoke_tool(call["name"], call["args"], wait=deadline - time.monotonic())
+        return ToolMessage(content=_as_content(output), name=call["name"], tool_call_id=call["id"])
+
+    def execute(
+        self,
+        tool_calls: list[dict],
+        prefetcher=None,
+        budget: Optional[float] = None,
+        known_results: Optional[dict[str, str]] = None,
+    ) -> list[ToolMessage]:
+        """
+        Run all calls concurrently; results keep the order of `tool_calls`.
+        `budget` (seconds) caps every call's timeout, e.g. the tool round's
+        share of the request deadline. Calls whose tool-call key is in
+        `known_results` are answered from it without running the tool.
+        """
+        started = time.monotonic()
+        submitted = []
+        in_flight: dict[str, tuple] = {}
+        for call in tool_calls:
+            if call["name"] not in self.tools_by_name:
+                submitted.append((call, None, 0.0))
+                continue
+            key = tool_call_key(call["name"], call["args"])
+            known = (known_results or {}).get(key)
+            if known is not None:
+                submitted.append((call, known, 0.0))
+                continue
+            if key in in_flight:
+                # Duplicate call in the same AI message: share the first call's result
+                submitted.append((call, *in_flight[key]))
+                continue
+            timeout = self.timeout_for(call["name"])
+            if budget is not None:
+                timeout = min(timeout, budget)
+            deadline = started + timeout
+            in_flight[key] = (_pool.submit(self._run_call, call, deadline, prefetcher), deadline)
+            submitted.append((call, *in_flight[key]))
+
+        messages = []
+        for call, future, deadline in submitted:
+            if future is None:
+                messages.append(ToolMessage(
+                    content=f"Error: {call['name']} is not a valid tool, try one of "
+                            f"[{', '.join(self.tools_by_name)}].",
+                    name=call["name"], tool_call_id=call["id"], status="error",
+                ))
+                continue
+            if isinstance(future, str):
+                messages.append(ToolMessage(content=future, name=call["name"], tool_call_id=call["id"]))
+                continue
+
+            try:
+                message = future.result(timeout=max(deadline - time.monotonic(), 0))
+                if message.tool_call_id != call["id"]:
+                    message = message.model_copy(update={"tool_call_id": call["id"]})
+                messages.append(message)
+            except FutureTimeout:
+                reason = f"timed out after {deadline - started:.3g}s"
+                print(f"⏱️ {call['name']} {reason}")
+                messages.append(unavailable_message(call, reason))
+            except ToolUnavailable as exc:
+                messages.append(unavailable_message(call, str(exc)))
+            except Exception as exc:
+                # Same shape as ToolNode's default error handling
+                messages.append(ToolMessage(
+                    content=f"Error: {exc!r}\n Please fix your mistakes.",
+                    name=call["name"], tool_call_id=call["id"], status="error",
+                ))
+
+        return messages
@@ -0,0 +1,47 @@
+"""
+Tool-call keys shared by the prefetcher and tool-result caches.
+
+Two calls that differ only in case or whitespace ("Paris" vs " paris ")
+map to the same key. Place and currency arguments are canonicalized
+through the gazetteer, so "NYC" and "New York City, USA" share a key too.
+"""
+
+import json
+
+from utils.gazetteer import canonical_currency, canonical_place_key
+
+
+# Argument names that hold a place / a currency in our tools
+PLACE_ARGS = {"city", "place", "destination", "location"}
+CURRENCY_ARGS = {"currency", "from_currency", "to_currency"}
+
+
+def normalize_tool_args(value):
+    """Recursively lower-case and collapse whitespace in string arguments."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {k: normalize_tool_args(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_tool_args(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def canonicalize_tool_args(args: dict) -> dict:
+    """normalize_tool_args, with places mapped to gazetteer ids and currencies to ISO codes."""
+    canonical = {}
+    for name, value in args.items():
+        if isinstance(value, str) and name in PLACE_ARGS:
+            canonical[name] = canonical_place_key(value)
+        elif isinstance(value, str) and name in CURRENCY_ARGS:
+            canonical[name] = canonical_currency(value) or normalize_tool_args(value)
+        else:
+            canonical[name] = normalize_tool_args(value)
+    return canonical
+
+
+def tool_call_key(name: str, args: dict) -> str:
+    """Stable key for a tool call: tool name plus canonical, sorted arguments."""
+    return f"{name}:{json.dumps(canonicalize_tool_args(args), sort_keys=True, default=str)}"
@@ -0,0 +1,154 @@
+"""
+Tool Routing — bind only the tools a query (and iteration) can use
+------------------------------------------------------------------
+Binding every tool to every agent call resends all tool schemas on each
+iteration, including the currency tool when no currency is mentioned.
+The router picks a subset instead:
+
+  per query      rule-based intent groups (weather, attractions, restaurants,
+                 transport, budget, calculator, currency, nearby) from the latest
+                 question; a full trip plan gets the trip groups, and a
+                 question that matches nothing keeps every tool
+  per iteration  tools already answered in this run — for every parsed
+                 destination, for place/weather tools — are dropped from
+                 later iterations; once everything is answered the agent
+                 gets the query subset with tool calls disabled
+
+Bound LLMs are cached process-wide per (LLM settings, tool subset,
+tool_choice), so bind_tools runs once per subset rather than per request.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from Agent.tool_keys import PLACE_ARGS
+from utils.gazetteer import canonical_place_key
+from utils.planner.sections import wants_itinerary
+from utils.query_parser import parse_query
+
+
+TOOL_GROUPS = {
+    "weather": ("get_current_weather", "get_weather_forecast"),
+    "attractions": ("search_attractions", "search_activities", "plan_attraction_route"),
+    "restaurants": ("search_restaurants",),
+    "transport": ("search_transportation",),
+    "budget": ("compute_trip_budget",),
+    "calculator": ("estimate_total_hotel_cost", "calculate_total_expense", "calculate_daily_expense_budget"),
+    "currency": ("convert_currency",),
+    "nearby": ("search_nearby",),
+}
+
+# What a full trip plan needs (see SYSTEM_PROMPT); costs go through compute_trip_budget
+TRIP_GROUPS = ("weather", "attractions", "restaurants", "transport", "budget")
+
+_GROUP_PATTERNS = {
+    "weather": r"weather|forecast|temperature|rain\w*|climate|sunny|snow\w*|pack(?:ing)?|what to wear",
+    "attractions": r"attraction\w*|sights?|sightseeing|things to do|activit\w*|museums?|tours?|hidden gems?|off-?beat|heritage",
+    "restaurants": r"restaurants?|food|eat|eating|dining|dinner|lunch|breakfast|cuisine|cafes?",
+    "transport": r"transport\w*|metro|subway|trains?|bus(?:es)?|taxis?|getting around|airport|commute",
+    "budget": r"budget|costs?|price\w*|expens\w*|afford\w*|cheap\w*|luxury|spend\w*|how much",
+    "calculator": r"per night|hotel cost|total cost|daily (?:budget|expense)",
+    "currency": r"convert\w*|exchange rates?|currenc\w*",
+    "nearby": r"near(?:by)?|close to|next to|walking distance|around (?:the|my)",
+}
+_GROUP_RE = {group: re.compile(rf"\b(?:{pattern})\b", re.I) for group, pattern in _GROUP_PATTERNS.items()}
+
+
+def query_groups(question: str) -> set[str]:
+    """Intent groups for one question; empty when nothing matches."""
+    parsed = parse_query(question)
+    groups = {group for group, pattern in _GROUP_RE.items() if pattern.search(question)}
+    if parsed["currency"]:
+        groups.add("currency")
+    if wants_itinerary(question, parsed["days"]):
+        groups.update(TRIP_GROUPS)
+    return groups
+
+
+def route_query(question: str, available: list[str]) -> frozenset:
+    """Tool names for a question; every available tool when its intent is unclear."""
+    groups = query_groups(question)
+    names = {name for group in groups for name in TOOL_GROUPS[group]} & set(available)
+    return frozenset(names or available)
+
+
+def _answered(messages: list) -> dict[str, set]:
+    """Tool name → canonical places it answered successfully since the latest question."""
+    start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+    args_by_id = {}
+    for message in messages[start:]:
+        if isinstance(message, AIMessage):
+            for call in message.tool_calls or []:
+                args_by_id[call["id"]] = call["args"]
+
+    answered: dict[str, set] = {}
+    for message in messages[start:]:
+        if isinstance(message, ToolMessage) and message.status != "error":
+            args = args_by_id.get(message.tool_call_id, {})
+            places = {canonical_place_key(v) for k, v in args.items() if k in PLACE_ARGS and isinstance(v, str)}
+            answered.setdefault(message.name, set()).update(places or {""})
+    return answered
+
+
+def route_iteration(query_tools: frozenset, messages: list, destinations: list[str]) -> frozenset:
+    """Drop tools whose data this run already has (for every destination, for place tools)."""
+    answered = _answered(messages)
+    wanted = {canonical_place_key(d) for d in destinations}
+    remaining = set()
+    for name in query_tools:
+        done = answered.get(name)
+        # A place tool stays until it has answered every (known) destination
+        if done is None or ("" not in done and not (wanted and wanted <= done)):
+            remaining.add(name)
+    return frozenset(remaining)
+
+
+# -----------------------------
+# Bound-LLM cache
+# -----------------------------
+_CACHE_SIZE = 64
+_bound: OrderedDict = OrderedDict()
+_bound_lock = threading.Lock()
+_bound_stats = {"binds": 0, "hits": 0}
+
+
+def _llm_key(llm) -> str:
+    """LLM class + settings (API clients and secrets excluded), so equal models share bindings."""
+    try:
+        params = json.dumps(llm.model_dump(exclude_none=True), sort_keys=True, default=str)
+    except Exception:
+        params = str(id(llm))
+    return f"{type(llm).__qualname__}:{params}"
+
+
+def bind_subset(llm, tools: list, names: frozenset, tool_choice: Optional[str] = None):
+    """llm.bind_tools() for the named subset of `tools`, cached across requests."""
+    key = (_llm_key(llm), tuple(sorted(names)), tool_choice)
+    with _bound_lock:
+        if key in _bound:
+            _bound.move_to_end(key)
+            _bound_stats["hits"] += 1
+            return _bound[key]
+
+    subset = [tool for tool in tools if tool.name in names]
+    kwargs = {"tool_choice": tool_choice} if tool_choice else {}
+    bound = llm.bind_tools(tools=subset, **kwargs)
+
+    with _bound_lock:
+        _bound_stats["binds"] += 1
+        _bound[key] = bound
+        while len(_bound) > _CACHE_SIZE:
+            _bound.popitem(last=False)
+    return bound
+
+
+def binding_stats() -> dict:
+    with _bound_lock:
+        return {**_bound_stats, "entries": len(_bound)}
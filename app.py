@@ -1,15 +1,26 @@
 import streamlit as st
 import datetime
+import json
+import re
+import threading
+import uuid
 
 
-def get_travel_plan_validated(question: str) -> dict:
-    """Run the planner + critic. Returns {plan, validation}."""
+def get_travel_plan_validated(question: str, thread_id: str | None = None, on_section=None, on_update=None) -> dict:
+    """Run the planner + critic within the configured deadline. Returns {plan, validation, degradation}."""
     try:
-        from travel_agent import get_travel_plan
-        from utils.response_validator import validate
-        plan = get_travel_plan(question)
-        validation = validate(question=question, plan=plan)
-        return {"plan": plan, "validation": validation}
+        from travel_agent import get_travel_plan_with_validation
+        from utils.admission import PRIORITY_INTERACTIVE, AdmissionRejected
+        from utils.config_loader import load_config
+        deadline_s = load_config().get("planner", {}).get("deadline_seconds")
+        try:
+            return get_travel_plan_with_validation(
+                question, deadline_s=deadline_s, thread_id=thread_id,
+                priority=PRIORITY_INTERACTIVE, on_section=on_section, on_update=on_update,
+            )
+        except AdmissionRejected as busy:
+            return {"plan": f"Error: {busy}", "validation": {}, "degradation": "partial",
+                    "retry_after": busy.retry_after}
     except Exception as exc:
         return {
             "plan": (
@@ -23,22 +34,260 @@ def get_travel_plan_validated(question: str) -> dict:
                 "verified_by_tools": [],
                 "summary": "Trustworthiness check unavailable.",
             },
+            "degradation": "partial",
         }
 
 
-def transcribe_audio(uploaded_file) -> str:
+@st.cache_resource(show_spinner=False)
+def get_cache_prewarmer():
+    """Background refresh of popular destinations' cached data; None when disabled."""
+    try:
+        from utils.prewarm import get_prewarmer, prewarm_settings
+        if not prewarm_settings()["enabled"]:
+            return None
+        return get_prewarmer().start()
+    except Exception as exc:
+        print(f"⚠️ Cache prewarmer unavailable: {exc}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_transcription_backend():
+    """One transcription backend (and loaded model) per server process; None without one."""
+    from utils.speech_to_text import TranscriptionUnavailable, default_backend
+    try:
+        return default_backend()
+    except TranscriptionUnavailable as exc:
+        print(f"⚠️ Voice input unavailable: {exc}")
+        return None
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _transcribe_cached(audio_key: str, _audio_bytes: bytes) -> str:
+    """Cached on the upload's content hash; the raw bytes are not re-hashed."""
     from utils.speech_to_text import transcribe_audio as run_transcription
-    return run_transcription(uploaded_file)
+    return run_transcription(_audio_bytes, backend=get_transcription_backend())
+
+
+def transcribe_audio(uploaded_file) -> str:
+    from utils.speech_to_text import audio_hash
+    audio_bytes = uploaded_file.getvalue()
+    return _transcribe_cached(audio_hash(audio_bytes), audio_bytes)
+
+
+def _query_key(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _incomplete(result: dict) -> bool:
+    return result.get("degradation") == "partial" or str(result.get("plan", "")).startswith("Error:")
+
+
+def request_retry(question: str) -> None:
+    """Run `question` again on the next script run if its memoized result failed or was partial."""
+    st.session_state.setdefault("retry_queries", set()).add(_query_key(question))
+
+
+def get_plan_for_session(question: str, on_section=None, on_update=None) -> dict:
+    """
+    Session-scoped memo around get_travel_plan_validated.
+    Streamlit reruns the script on every widget interaction; a query that
+    was already answered in this session is served from st.session_state
+    instead of running the agent and critic again. Failed and partial
+    results are memoized too (re-running them on every rerun would load an
+    overloaded planner further and repeat the question in the thread); they
+    are only run again after request_retry() — a resubmit or the Retry button.
+    """
+    plans = st.session_state.setdefault("plan_results", {})
+    thread_id = st.session_state["thread_id"]
+    key = (thread_id, _query_key(question))
+    retry = _query_key(question) in st.session_state.get("retry_queries", set())
+    st.session_state.get("retry_queries", set()).discard(_query_key(question))
+    if key in plans and not (retry and _incomplete(plans[key])):
+        return plans[key]
+
+    result = get_travel_plan_validated(question, thread_id=thread_id, on_section=on_section, on_update=on_update)
+    plans[key] = result
+    return result
+
+
+def retry_button(question: str, result: dict, widget_key: str) -> None:
+    """A Retry button under a failed or partial result."""
+    if _incomplete(result) and st.button("🔁 Retry", key=f"retry_{widget_key}"):
+        request_retry(question)
+        st.rerun()
+
+
+def live_sections():
+    """
+    Placeholder + on_section callback that previews plan sections as they
+    are written (sectioned synthesis runs them on worker threads).
+    Returns (placeholder, on_section); clear the placeholder once the full plan renders.
+    """
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    placeholder = st.empty()
+    written: list[str] = []
+    lock = threading.Lock()
+
+    def on_section(section: dict, markdown: str) -> None:
+        with lock:
+            written.append(markdown)
+            add_script_run_ctx(threading.current_thread(), ctx)
+            placeholder.markdown("\n\n".join(written) + "\n\n*✍️ Writing the remaining sections…*")
+
+    return placeholder, on_section
+
+
+# Tool → card column in the live data panel
+_CARD_COLUMNS = {
+    "get_current_weather": 0, "get_weather_forecast": 0,
+    "search_attractions": 1, "search_activities": 1, "search_restaurants": 1, "search_transportation": 1,
+    "plan_attraction_route": 1, "search_nearby": 1,
+    "convert_currency": 2, "compute_trip_budget": 2,
+}
+_CARD_TITLES = {
+    "search_attractions": "🏛️ Attractions", "search_activities": "🎯 Activities",
+    "search_restaurants": "🍽️ Restaurants", "search_transportation": "🚇 Getting around",
+    "search_nearby": "📍 Nearby",
+}
+
+
+def _render_card(name: str, args: dict, content: str) -> None:
+    """One tool result as a compact card; unknown formats fall back to a text excerpt."""
+    if name == "get_current_weather":
+        match = re.search(r"weather in (.+?): ([-\d.]+)°C, (.+?), humidity (\d+)%", content)
+        if match:
+            city, temp, description, humidity = match.groups()
+            st.metric(f"🌤️ Now in {city}", f"{float(temp):.0f}°C", f"{description}, humidity {humidity}%",
+                      delta_color="off")
+            return
+    elif name == "get_weather_forecast":
+        lines = [line for line in content.splitlines()[1:] if line.strip()]
+        if lines:
+            st.markdown(f"**🗓️ {content.splitlines()[0].rstrip(':')}**")
+            st.caption("  \n".join(lines))
+            return
+    elif name in _CARD_TITLES:
+        names = re.findall(r"^\d+\.\s+(.+)$", content, re.MULTILINE)
+        st.markdown(f"**{_CARD_TITLES[name]}** — {args.get('place', '')}")
+        if names:
+            st.markdown("\n".join(f"- {n}" for n in names[:6]))
+        else:
+            st.caption(content.split("\n", 1)[-1][:400])
+        return
+    elif name == "plan_attraction_route":
+        routes = [line for line in content.splitlines() if line.startswith("Day ")]
+        if routes:
+            st.markdown(f"**🗺️ Day routes** — {args.get('place', '')}")
+            st.caption("  \n".join(routes))
+            return
+    elif name == "convert_currency":
+        try:
+            st.metric(f"💱 {args['amount']:,} {args['from_currency']}",
+                      f"{float(content):,.2f} {args['to_currency']}")
+            return
+        except (KeyError, TypeError, ValueError):
+            pass
+    elif name == "compute_trip_budget":
+        try:
+            budget = json.loads(content)
+            total = ", ".join(f"{amount:,.0f} {code}" for code, amount in budget["total"].items())
+            st.markdown(f"**💰 Estimated total:** {total}")
+            return
+        except (KeyError, TypeError, ValueError, AttributeError):
+            pass
+    st.caption(f"`{name}`: {content[:300]}")
+
+
+def live_progress():
+    """
+    Placeholder + on_update callback that shows tool results while the
+    agent is still working: weather, place lists and money cards as each
+    tools step finishes. Returns (placeholder, on_update); clear the
+    placeholder once the full plan renders.
+    """
+    from langchain_core.messages import AIMessage, ToolMessage
+
+    placeholder = st.empty()
+    cards: dict[str, tuple] = {}        # tool call id → (name, args, content), in arrival order
+    calls: dict[str, tuple] = {}        # tool call id → (name, args) requested by the agent
+    answered: set[str] = set()
+
+    def redraw(pending: list[str]) -> None:
+        with placeholder.container():
+            if pending:
+                st.caption(f"🔎 Fetching: {', '.join(dict.fromkeys(pending))}")
+            columns = st.columns(3)
+            for name, args, content in cards.values():
+                with columns[_CARD_COLUMNS.get(name, 1)]:
+                    _render_card(name, args, content)
+
+    def on_update(node: str, update: dict) -> None:
+        messages = update.get("messages") or []
+        for message in messages:
+            if isinstance(message, AIMessage):
+                for call in message.tool_calls or []:
+                    calls[call["id"]] = (call["name"], call["args"])
+            elif isinstance(message, ToolMessage):
+                answered.add(message.tool_call_id)
+                if message.status != "error":
+                    name, args = calls.get(message.tool_call_id, (message.name, {}))
+                    cards[message.tool_call_id] = (name, args, str(message.content))
+        if messages:
+            redraw([name for i, (name, _) in calls.items() if i not in answered])
+
+    return placeholder, on_update
+
+
+@st.cache_resource(show_spinner=False)
+def get_budget_engine():
+    """Re-quotes structured plans in another currency (one cached rate table)."""
+    import os
+    from utils.budget_engine import BudgetEngine
+    from utils.currency_converter import CurrencyConverter
+    api_key = os.environ.get("EXCHANGE_RATE_API_KEY")
+    return BudgetEngine(CurrencyConverter(api_key) if api_key else None)
+
+
+def structured_markdown(structured: dict, widget_key: str) -> str:
+    """
+    Markdown rendered locally from a TravelPlan dict (utils/plan_model.py);
+    picking another currency re-quotes every cost without an LLM call.
+    """
+    from utils.plan_model import TravelPlan, convert_plan, plan_markdown
+
+    plan = TravelPlan.model_validate(structured)
+    options = list(dict.fromkeys([plan.currency, "USD", "EUR", "GBP", "INR", "JPY"]))
+    currency = st.selectbox("💱 Show costs in", options, key=f"plan_currency_{widget_key}")
+    if currency != plan.currency:
+        try:
+            plan = convert_plan(plan, currency, get_budget_engine())
+        except Exception as exc:
+            st.caption(f"Currency conversion unavailable: {exc}")
+    return plan_markdown(plan)
 
 
 def render_plan(question: str, result: dict, source_label: str = "") -> None:
     """Renders the plan text and the trustworthiness panel."""
+    if result.get("retry_after"):
+        st.warning(
+            f"🚦 The planner is busy right now. Please try again in about "
+            f"{int(result['retry_after']) + 1} seconds."
+        )
+        retry_button(question, result, source_label or "text")
+        return
+
     plan = result.get("plan", "")
+    if result.get("structured_plan"):
+        plan = structured_markdown(result["structured_plan"], source_label or "text")
     validation = result.get("validation", {})
     score = validation.get("confidence_score", -1)
     uncertain = validation.get("uncertain_claims", [])
     verified = validation.get("verified_by_tools", [])
     summary = validation.get("summary", "")
+    degradation = result.get("degradation", "full")
 
     title = f"🌍 AI Travel Plan{f' ({source_label})' if source_label else ''}"
     st.markdown(
@@ -58,6 +307,12 @@ def render_plan(question: str, result: dict, source_label: str = "") -> None:
 """
     )
 
+    if degradation == "early_synthesis":
+        st.info("⏱️ This plan was written early to meet the response time limit; some live data may be missing.")
+    elif degradation == "partial":
+        st.warning("⏱️ The planner ran out of time — showing the best partial result.")
+    retry_button(question, result, source_label or "text")
+
     # ── Trustworthiness Panel ─────────────────────────────────────────────────
     st.divider()
     st.subheader("🔍 Trustworthiness Report")
@@ -91,11 +346,23 @@ def render_plan(question: str, result: dict, source_label: str = "") -> None:
 
         with col2:
             if verified:
+                links = result.get("provenance", {}).get("links", [])
                 with st.expander("✅ Grounded by tools", expanded=False):
                     for tool in verified:
-                        st.markdown(f"- {tool.capitalize()}")
+                        quoted = [link for link in links if link["tool"] == tool]
+                        if quoted:
+                            values = ", ".join(dict.fromkeys(link["value"] for link in quoted))
+                            st.markdown(f"- `{tool}` — {values[:200]}")
+                        else:
+                            st.markdown(f"- {tool.capitalize()}")
             else:
                 st.caption("No live-tool grounding detected.")
+
+        issues = result.get("plan_issues") or []
+        if issues:
+            with st.expander(f"🧮 {len(issues)} plan consistency note(s)", expanded=False):
+                for issue in issues:
+                    st.markdown(f"- {issue['message']}")
     # ─────────────────────────────────────────────────────────────────────────
 
 
@@ -110,6 +377,42 @@ st.title("🌍 Travel Made Easy")
 
 st.header("How can I help you in planning a trip?")
 
+# -----------------------------
+# CONVERSATION THREAD
+# -----------------------------
+# Follow-ups ("make it 3 days instead") continue the same checkpointed thread
+if "thread_id" not in st.session_state:
+    st.session_state["thread_id"] = uuid.uuid4().hex
+
+with st.sidebar:
+    st.caption("Follow-up questions refine the current plan.")
+    if st.button("🆕 New conversation"):
+        st.session_state["thread_id"] = uuid.uuid4().hex
+        st.session_state.pop("active_text_query", None)
+
+    with st.expander("🚦 Planner load", expanded=False):
+        from utils.admission import get_admission_controller
+        load = get_admission_controller().metrics()
+        st.caption(
+            f"Running {load['running']}/{load['max_concurrent']} · queued {load['queued']}/{load['max_queue']}  \n"
+            f"Wait p50 {load['wait_p50']:.1f}s · p95 {load['wait_p95']:.1f}s · "
+            f"rejected {load['rejected_queue_full'] + load['rejected_timeout']}"
+        )
+        from utils.cache_backend import get_cache
+        hits = misses = 0
+        for namespace, counts in get_cache().stats().items():
+            if namespace in ("weather", "forecast", "places", "fx"):
+                hits += counts.get("hits", 0) + counts.get("waited_hits", 0)
+                misses += counts.get("misses", 0)
+        prewarmer = get_cache_prewarmer()
+        warm = prewarmer.stats() if prewarmer else None
+        st.caption(
+            f"Cache hit rate {hits / max(hits + misses, 1):.0%} ({hits + misses} lookups)"
+            + (f"  \nPrewarm: {warm['refreshed']} refreshed · {warm['fresh']} fresh · "
+               f"{warm['calls_last_hour']}/{warm['quota_per_hour']} calls this hour"
+               if warm else "  \nPrewarm: off")
+        )
+
 # -----------------------------
 # TEXT INPUT
 # -----------------------------
@@ -127,20 +430,33 @@ with st.form(key="query_form", clear_on_submit=True):
 # -----------------------------
 st.subheader("🎙️ Or speak your travel request")
 
-audio_file = st.file_uploader(
-    "Upload an audio file (wav / mp3 / m4a)",
-    type=["wav", "mp3", "m4a"]
-)
+audio_file = None
+if get_transcription_backend() is None:
+    st.info("Voice input is unavailable on this server (no speech-to-text backend installed). "
+            "Please type your request above.")
+else:
+    audio_file = st.file_uploader(
+        "Upload an audio file (wav / mp3 / m4a)",
+        type=["wav", "mp3", "m4a"]
+    )
 
 # -----------------------------
 # HANDLE TEXT QUERY
 # -----------------------------
 if submit_button and user_input.strip():
+    st.session_state["active_text_query"] = user_input.strip()
+    # An explicit resubmit retries a failed or partial result
+    request_retry(user_input.strip())
+
+active_query = st.session_state.get("active_text_query")
+if active_query:
+    live_data, on_update = live_progress()
+    preview, on_section = live_sections()
     with st.spinner("🤖 Planning your trip..."):
-        result = get_travel_plan_validated(user_input)
-    with st.spinner("🔍 Running trustworthiness check..."):
-        pass  # validation already done inside get_travel_plan_validated
-    render_plan(user_input, result)
+        result = get_plan_for_session(active_query, on_section=on_section, on_update=on_update)
+    live_data.empty()
+    preview.empty()
+    render_plan(active_query, result)
 
 # -----------------------------
 # HANDLE VOICE QUERY
@@ -158,7 +474,11 @@ if audio_file is not None:
 
     st.success(f"🗣️ You said: **{spoken_text}**")
 
+    live_data, on_update = live_progress()
+    preview, on_section = live_sections()
     with st.spinner("🤖 Planning your trip..."):
-        result = get_travel_plan_validated(spoken_text)
+        result = get_plan_for_session(spoken_text, on_section=on_section, on_update=on_update)
+    live_data.empty()
+    preview.empty()
 
     render_plan(spoken_text, result, source_label="Voice Input")
@@ -0,0 +1,262 @@
+"""
+Local stand-ins for the LLM and the external APIs
+-------------------------------------------------
+Used by the load generator (benchmarks/load_test.py) so capacity can be
+measured without API keys, rate limits or cost:
+
+  - FakeChatModel: a LangChain chat model that answers like the planner
+    agent (tool calls on the first turn, a Markdown plan afterwards, and
+    schema-shaped arguments when one tool is forced) after an injectable
+    latency
+  - serve_apis(): one local HTTP server that imitates OpenWeatherMap
+    (/data/2.5/weather, /data/2.5/forecast), ExchangeRate-API
+    (/v6/<key>/latest/<base>) and Google Places
+    (/maps/api/place/textsearch/json, /maps/api/place/details/json), with
+    injectable latency and error rate
+
+point_tools_at(url) sets the *_BASE_URL overrides read by utils/weather.py,
+utils/currency_converter.py and utils/place_info.py.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from utils.gazetteer import get_gazetteer
+from utils.query_parser import parse_query
+
+
+def _sleep(mean_s: float, jitter: float) -> None:
+    """Sleep ~N(mean_s, mean_s * jitter) seconds, clipped at zero."""
+    if mean_s > 0:
+        time.sleep(max(0.0, random.gauss(mean_s, mean_s * jitter)))
+
+
+# -----------------------------
+# Fake LLM
+# -----------------------------
+_FAKE_STRINGS = {"currency": "EUR", "time": "morning", "destination": "Paris"}
+_FAKE_NUMBERS = {"low": 20.0, "high": 35.0, "unit_cost": 45.0}
+
+
+def _fake_args(schema: dict, name: str = "", index: int = 0) -> Any:
+    """Plausible arguments for a JSON schema (forced tool calls: structured output)."""
+    if "anyOf" in schema:
+        schema = next((s for s in schema["anyOf"] if s.get("type") != "null"), schema["anyOf"][0])
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        return {key: _fake_args(sub, key, index) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_fake_args(schema.get("items", {}), name, i) for i in range(2)]
+    if kind == "integer":
+        return index + 1
+    if kind == "number":
+        return _FAKE_NUMBERS.get(name, 1.0)
+    if kind == "boolean":
+        return name == "per_day"
+    return _FAKE_STRINGS.get(name, f"Stand-in {name.replace('_', ' ')} {index + 1}")
+
+class FakeChatModel(BaseChatModel):
+    """
+    Planner-shaped responses after `latency` seconds (per call). Tool calls
+    are only emitted when tools are bound (and tool_choice is not "none");
+    a `max_tokens` call option shortens the answer and its latency
+    proportionally (~4 chars / token). `prefill_latency` adds seconds per
+    1k prompt tokens, bound tool schemas included, and usage_metadata
+    reports the estimated token counts.
+    """
+
+    latency: float = 1.0
+    jitter: float = 0.3
+    plan_chars: int = 4000
+    prefill_latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-planner"
+
+    def bind_tools(self, tools, tool_choice: Optional[str] = None, **kwargs):
+        schemas = [convert_to_openai_tool(t) for t in tools]
+        return self.bind(tools=schemas, **({"tool_choice": tool_choice} if tool_choice else {}))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        chars = min(self.plan_chars, 4 * kwargs["max_tokens"]) if kwargs.get("max_tokens") else self.plan_chars
+        prompt_chars = sum(len(str(m.content)) for m in messages) + len(json.dumps(kwargs.get("tools", [])))
+        _sleep(self.latency * chars / self.plan_chars + self.prefill_latency * prompt_chars / 4000, self.jitter)
+
+        last_question = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        question = str(messages[last_question].content)
+        tool_results = [m for m in messages[last_question:] if isinstance(m, ToolMessage)]
+        tools_enabled = bool(kwargs.get("tools")) and kwargs.get("tool_choice") != "none"
+        forced = [t["function"] for t in kwargs.get("tools") or [] if t["function"]["name"] == kwargs.get("tool_choice")]
+
+        if forced:
+            message = AIMessage(content="", tool_calls=[{
+                "name": forced[0]["name"], "args": _fake_args(forced[0]["parameters"]), "id": f"call_{uuid.uuid4().hex[:12]}",
+            }])
+        elif tools_enabled and not tool_results:
+            destinations = parse_query(question)["destinations"] or ["Paris"]
+            calls = []
+            # Unique call ids, as real providers return (parallel research branches share one state)
+            call_id = lambda: f"call_{uuid.uuid4().hex[:12]}"
+            for city in destinations[:2]:
+                calls += [
+                    {"name": "get_current_weather", "args": {"city": city}, "id": call_id()},
+                    {"name": "search_attractions", "args": {"place": city}, "id": call_id()},
+                ]
+            calls.append({
+                "name": "compute_trip_budget",
+                "args": {
+                    "items": [
+                        {"category": "hotel", "unit_cost": 120, "currency": "EUR", "per_day": True},
+                        {"category": "food", "unit_cost": 45, "currency": "EUR", "per_day": True},
+                    ],
+                    "days": parse_query(question)["days"] or 3,
+                    "target_currencies": ["USD", "EUR"],
+                },
+                "id": call_id(),
+            })
+            bound = {tool["function"]["name"] for tool in kwargs["tools"]}
+            message = AIMessage(content="", tool_calls=[c for c in calls if c["name"] in bound])
+        else:
+            gathered = "\n".join(f"- {str(m.content)[:200]}" for m in tool_results)
+            body = f"# Travel plan\n\n{question}\n\n## Data used\n{gathered}\n\n"
+            filler = "Day plan with approximately €20-30 entry fees; verify on the official site. "
+            message = AIMessage(content=(body + filler * (chars // len(filler)))[:chars])
+
+        message.usage_metadata = {
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": len(str(message.content)) // 4,
+            "total_tokens": prompt_chars // 4 + len(str(message.content)) // 4,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# -----------------------------
+# External API stand-ins
+# -----------------------------
+_RATES = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 151.0, "INR": 83.2, "AUD": 1.52,
+          "CAD": 1.36, "CHF": 0.88, "CNY": 7.23, "SGD": 1.35, "AED": 3.67, "THB": 36.4}
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    latency: float = 0.2
+    jitter: float = 0.3
+    error_rate: float = 0.0
+    requests_served: list
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+    def _json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.requests_served.append(1)
+        _sleep(self.latency, self.jitter)
+        if random.random() < self.error_rate:
+            return self._json(503, {"error": "injected failure"})
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path.endswith("/data/2.5/weather"):
+            return self._json(200, {
+                "main": {"temp": 18.5, "feels_like": 17.9, "humidity": 62},
+                "weather": [{"description": "scattered clouds"}],
+            })
+        if url.path.endswith("/data/2.5/forecast"):
+            count = int(query.get("cnt", 40))
+            return self._json(200, {"list": [
+                {"dt_txt": f"2026-01-{1 + i // 8:02d} {(i % 8) * 3:02d}:00:00",
+                 "main": {"temp": 15 + i % 6}, "weather": [{"description": "light rain"}]}
+                for i in range(count)
+            ]})
+        if "/latest/" in url.path:
+            base = url.path.rsplit("/", 1)[-1].upper()
+            if base not in _RATES:
+                return self._json(404, {"result": "error", "error-type": "unsupported-code"})
+            return self._json(200, {"result": "success", "base_code": base, "conversion_rates": {
+                code: rate / _RATES[base] for code, rate in _RATES.items()
+            }})
+        if url.path.endswith("/place/textsearch/json"):
+            text = query.get("query", "")
+            # Results scattered around the queried city (gazetteer centre) when it is known
+            match = re.search(r"\bin (.+?)\.(?:\s|$)", text)
+            # "<name> in <city>." or "<landmark>, <city>"
+            city = get_gazetteer().resolve(match.group(1) if match else text.split(",", 1)[-1])
+            sigma = 0.02                   # degrees, about 2 km
+            if "location" in query:        # location-biased search: within the radius of the point
+                lat, lon = (float(v) for v in query["location"].split(","))
+                city = {"lat": lat, "lon": lon}
+                sigma = float(query.get("radius", 2000)) / 111_000 / 2
+            spread = random.Random(text + query.get("location", ""))
+            results = []
+            for i in range(5):
+                place_id = f"standin-{abs(hash(text)) % 10_000}-{i}"
+                result = {"place_id": place_id, "name": f"Stand-in place {place_id.split('-', 1)[-1]}",
+                          "formatted_address": "1 Example Street", "rating": round(spread.uniform(3.5, 5), 1)}
+                if city:
+                    result["geometry"] = {"location": {"lat": city["lat"] + spread.gauss(0, sigma),
+                                                       "lng": city["lon"] + spread.gauss(0, sigma * 1.5)}}
+                results.append(result)
+            return self._json(200, {"status": "OK", "results": results})
+        if url.path.endswith("/place/details/json"):
+            place_id = query.get("place_id", "unknown")
+            return self._json(200, {"status": "OK", "result": {
+                "name": f"Stand-in place {place_id.split('-', 1)[-1]}",
+                "formatted_address": "1 Example Street",
+                "formatted_phone_number": "+00 000 000",
+                "website": "https://example.com",
+                "place_id": place_id,
+            }})
+        return self._json(404, {"error": f"no stand-in for {url.path}"})
+
+
+def serve_apis(
+    port: int = 0,
+    latency: float = 0.2,
+    jitter: float = 0.3,
+    error_rate: float = 0.0,
+) -> tuple[ThreadingHTTPServer, str]:
+    """Start the API stand-in on a background thread; returns (server, base_url)."""
+    handler = type("ApiHandler", (_ApiHandler,), {
+        "latency": latency, "jitter": jitter, "error_rate": error_rate, "requests_served": [],
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.handler = handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def point_tools_at(base_url: str) -> None:
+    """Route the weather, FX and Google Places clients to the stand-in."""
+    os.environ["OPENWEATHERMAP_BASE_URL"] = f"{base_url}/data/2.5"
+    os.environ["EXCHANGE_RATE_BASE_URL"] = base_url
+    os.environ["GPLACES_BASE_URL"] = base_url
+    for key, value in (("OPENWEATHERMAP_API_KEY", "standin"), ("EXCHANGE_RATE_API_KEY", "standin"),
+                       ("GPLACES_API_KEY", "AIzaStandIn"), ("TAVILY_API_KEY", "standin"),
+                       ("OPENAI_API_KEY", "standin")):
+        os.environ.setdefault(key, value)
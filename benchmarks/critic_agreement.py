@@ -0,0 +1,150 @@
+"""
+Critic agreement benchmark
+--------------------------
+Compares the rule-based fast critic (utils/fast_critic.py) with the LLM
+critic's recorded verdicts and shows, for a grid of ambiguous bands, how
+many critic calls each band saves and how often the final verdict still
+agrees with the LLM critic.
+
+Plans inside the band are escalated, so their verdict is the LLM label;
+plans outside the band keep the rule-based verdict.
+
+Inputs:
+  - benchmarks/fixtures/critic_plans.jsonl: the plans (id, question, plan)
+  - benchmarks/fixtures/critic_labels.jsonl: the LLM critic's verdict per plan,
+    written by --record from real critic calls (utils/response_validator.py),
+    whose HTTP traffic goes to critic_labels.cassette.gz (utils/cassette.py)
+    so --replay can regenerate the labels offline
+
+Usage:
+    python -m benchmarks.critic_agreement
+    OPENAI_API_KEY=... python -m benchmarks.critic_agreement --record
+    python -m benchmarks.critic_agreement --replay
+"""
+
+import argparse
+import json
+import os
+import time
+
+from utils.cassette import use_cassette
+from utils.fast_critic import fast_validate
+from utils.response_validator import _run_critic, ambiguous_band
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PLANS = os.path.join(FIXTURES_DIR, "critic_plans.jsonl")
+LABELS = os.path.join(FIXTURES_DIR, "critic_labels.jsonl")
+CASSETTE = os.path.join(FIXTURES_DIR, "critic_labels.cassette.gz")
+
+
+def _read_jsonl(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_labels(plans: list[dict], mode: str, labels: str = LABELS, cassette: str = CASSETTE) -> None:
+    """Run the LLM critic on every plan (mode "record") or replay its cassette, and write the labels."""
+    if mode == "replay":
+        os.environ.setdefault("OPENAI_API_KEY", "replay")   # not matched: request headers aren't stored
+    elif not os.getenv("OPENAI_API_KEY"):
+        raise SystemExit("--record calls the real critic: set OPENAI_API_KEY")
+
+    rows = []
+    with use_cassette(cassette, mode=mode):
+        for plan in plans:
+            verdict = _run_critic(plan["question"], plan["plan"])
+            if verdict["confidence_score"] == -1:
+                raise SystemExit(f"critic call failed for {plan['id']}")
+            rows.append({
+                "id": plan["id"],
+                "critic_score": verdict["confidence_score"],
+                "trustworthy": verdict["trustworthy"],
+                "summary": verdict["summary"],
+            })
+            print(f"  {plan['id']:<28} {verdict['confidence_score']:>3} "
+                  f"{'trustworthy' if verdict['trustworthy'] else 'untrustworthy'}")
+
+    with open(labels, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"\n{len(rows)} critic verdicts written to {labels}\n")
+
+
+def load_fixtures(plans_path: str = PLANS, labels_path: str = LABELS) -> list[dict]:
+    """Plans joined with their recorded critic verdicts."""
+    if not os.path.exists(labels_path):
+        raise SystemExit(
+            f"No recorded critic verdicts at {labels_path}. "
+            "Record them once with OPENAI_API_KEY set: python -m benchmarks.critic_agreement --record"
+        )
+    labels = {row["id"]: row for row in _read_jsonl(labels_path)}
+    plans = _read_jsonl(plans_path)
+    missing = [p["id"] for p in plans if p["id"] not in labels]
+    if missing:
+        raise SystemExit(f"No recorded verdict for {', '.join(missing)}; re-run with --record")
+    return [{**plan, **labels[plan["id"]]} for plan in plans]
+
+
+def evaluate_band(rows: list[dict], scores: list[int], band: tuple[int, int]) -> dict:
+    low, high = band
+    escalated = agree = 0
+    abs_error = 0.0
+    for row, score in zip(rows, scores):
+        if low <= score <= high:
+            escalated += 1
+            agree += 1
+            continue
+        agree += (score >= 60) == row["trustworthy"]
+        abs_error += abs(score - row["critic_score"])
+
+    settled = len(rows) - escalated
+    return {
+        "band": band,
+        "critic_calls_saved": settled / len(rows),
+        "verdict_agreement": agree / len(rows),
+        "fast_path_mae": abs_error / settled if settled else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", default=PLANS)
+    parser.add_argument("--labels", default=LABELS)
+    parser.add_argument("--record", action="store_true", help="label the plans with the real LLM critic")
+    parser.add_argument("--replay", action="store_true", help="regenerate the labels from the cassette")
+    args = parser.parse_args()
+
+    if args.record or args.replay:
+        record_labels(_read_jsonl(args.plans), "record" if args.record else "replay", args.labels)
+    rows = load_fixtures(args.plans, args.labels)
+
+    started = time.perf_counter()
+    scores = [fast_validate(r["question"], r["plan"])["confidence_score"] for r in rows]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    raw_agreement = sum((s >= 60) == r["trustworthy"] for s, r in zip(scores, rows)) / len(rows)
+    print(f"{len(rows)} plans with recorded critic verdicts, fast path {elapsed_ms / len(rows):.2f} ms/plan")
+    print(f"fast path alone: verdict agreement {raw_agreement:.0%}\n")
+
+    disagreements = [(r, s) for r, s in zip(rows, scores) if (s >= 60) != r["trustworthy"]]
+    if disagreements:
+        print("fast path disagrees with the critic on:")
+        for row, score in disagreements:
+            print(f"  {row['id']:<28} fast {score:>3}  critic {row['critic_score']:>3}  {row['summary'][:60]}")
+        print()
+
+    configured = ambiguous_band()
+    bands = sorted({configured, (50, 70), (45, 75), (45, 80), (40, 85), (35, 90), (60, 60)})
+    print(f"{'band':>10} {'calls saved':>12} {'agreement':>10} {'fast MAE':>9}")
+    for band in bands:
+        result = evaluate_band(rows, scores, band)
+        marker = "  ← configured" if band == configured else ""
+        print(
+            f"{f'{band[0]}-{band[1]}':>10} {result['critic_calls_saved']:>12.0%} "
+            f"{result['verdict_agreement']:>10.0%} {result['fast_path_mae']:>9.1f}{marker}"
+        )
+
+
+if __name__ == "__main__":
+    main()
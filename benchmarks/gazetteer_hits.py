@@ -0,0 +1,79 @@
+"""
+Gazetteer cache-key benchmark
+-----------------------------
+Replays groups of tool calls that name the same place in different ways
+("NYC", "New York", "new york city, USA") and counts how often a call would
+be answered by a tool-result cache under three keying schemes:
+
+    raw         tool name + arguments exactly as written
+    normalized  lower-cased, whitespace-collapsed arguments (previous keys)
+    canonical   gazetteer ids / ISO currency codes (Agent/tool_keys.py)
+
+A hit is a call whose key was already seen; the first call of every
+distinct place is always a miss, so an upper bound is shown too.
+
+Usage:
+    python -m benchmarks.gazetteer_hits [--fixtures PATH]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from Agent.tool_keys import normalize_tool_args, tool_call_key
+from utils.gazetteer import get_gazetteer
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "place_variants.jsonl")
+
+SCHEMES = {
+    "raw": lambda name, args: f"{name}:{json.dumps(args, sort_keys=True)}",
+    "normalized": lambda name, args: f"{name}:{json.dumps(normalize_tool_args(args), sort_keys=True)}",
+    "canonical": tool_call_key,
+}
+
+
+def load_fixtures(path: str = FIXTURES) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def hit_rate(groups: list[dict], key_fn) -> float:
+    seen: set[str] = set()
+    hits = calls = 0
+    for group in groups:
+        for value in group["calls"]:
+            key = key_fn(group["tool"], {group["arg"]: value})
+            hits += key in seen
+            seen.add(key)
+            calls += 1
+    return hits / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    args = parser.parse_args()
+
+    groups = load_fixtures(args.fixtures)
+    calls = sum(len(g["calls"]) for g in groups)
+    # Upper bound if every group were one place (the last fixture group deliberately is not)
+    best = (calls - len(groups)) / calls
+
+    print(f"{len(groups)} groups, {calls} tool calls (upper bound {best:.0%})\n")
+    print(f"{'scheme':>11} {'hit rate':>9}")
+    for name, key_fn in SCHEMES.items():
+        print(f"{name:>11} {hit_rate(groups, key_fn):>9.0%}")
+
+    gazetteer = get_gazetteer()
+    names = [value for g in groups for value in g["calls"]]
+    started = time.perf_counter()
+    for name in names:
+        gazetteer._resolve(name.strip())
+    elapsed_us = (time.perf_counter() - started) * 1e6 / len(names)
+    print(f"\nuncached lookup: {elapsed_us:.1f} µs/name over {len(gazetteer.places)} places")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Load generator
+--------------
+Drives the planner with many concurrent users and reports throughput,
+latency percentiles, error / timeout / rejection rates and peak RSS, so
+capacity can be compared between releases (--json writes a result file).
+
+Targets:
+    planner  in-process travel_agent.get_travel_plan_with_validation (what
+             app.get_travel_plan_validated calls), with FakeChatModel and the
+             local API stand-ins from benchmarks/api_standins.py
+    http     POST {"question": ...} to --url (any HTTP entry point); the
+             response is expected to be JSON with a "plan" field
+
+Load models:
+    closed   --users N: N users, each sending the next query when the
+             previous one finishes (plus --think-time)
+    open     --rate R: Poisson arrivals at R requests/s, independent of
+             how fast the server answers
+
+Queries are drawn from a weighted corpus (benchmarks/fixtures/load_queries.jsonl).
+
+Usage:
+    python -m benchmarks.load_test --users 8 --duration 60
+    python -m benchmarks.load_test --rate 2 --duration 60 --llm-latency 2 --api-latency 0.3
+    python -m benchmarks.load_test --target http --url http://localhost:8000/plan --users 16
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "load_queries.jsonl")
+OUTCOMES = ("ok", "timeout", "error", "rejected")
+
+
+def load_corpus(path: str = CORPUS) -> tuple[list[str], list[float]]:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r["query"] for r in rows], [float(r.get("weight", 1)) for r in rows]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# -----------------------------
+# Targets
+# -----------------------------
+def planner_target(args):
+    """In-process planner with the fake LLM and API stand-ins."""
+    from benchmarks.api_standins import FakeChatModel, point_tools_at, serve_apis
+
+    server, base_url = serve_apis(latency=args.api_latency, error_rate=args.api_error_rate)
+    point_tools_at(base_url)
+    os.environ.setdefault("CACHE_BACKEND", args.cache)
+
+    import utils.response_validator as response_validator
+    from utils.admission import AdmissionRejected
+    from utils.model_loader import ModelLoader
+    import travel_agent
+
+    llm = FakeChatModel(latency=args.llm_latency)
+    ModelLoader.load_llm = lambda self: llm
+
+    def fake_critic(question, plan, timeout=30):
+        time.sleep(min(args.critic_latency, timeout))
+        return response_validator.ValidationResult(
+            confidence_score=70, trustworthy=True, uncertain_claims=[],
+            verified_by_tools=["weather"], summary="Stand-in critic verdict.",
+        )
+    response_validator._run_critic = fake_critic
+
+    def run(question: str) -> str:
+        try:
+            result = travel_agent.get_travel_plan_with_validation(question, deadline_s=args.deadline)
+        except AdmissionRejected:
+            return "rejected"
+        if str(result["plan"]).startswith("Error:"):
+            return "error"
+        return "timeout" if result["degradation"] == "partial" else "ok"
+
+    run.api_requests = server.handler.requests_served
+    return run
+
+
+def http_target(args):
+    session = requests.Session()
+
+    def run(question: str) -> str:
+        try:
+            response = session.post(args.url, json={"question": question}, timeout=args.deadline + 10)
+        except requests.Timeout:
+            return "timeout"
+        if response.status_code in (429, 503):
+            return "rejected"
+        if response.status_code != 200:
+            return "error"
+        plan = str(response.json().get("plan", ""))
+        return "error" if plan.startswith("Error:") else "ok"
+
+    return run
+
+
+# -----------------------------
+# Load models
+# -----------------------------
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: list[tuple[str, float]] = []
+
+    def call(self, run, question: str) -> None:
+        started = time.perf_counter()
+        try:
+            outcome = run(question)
+        except Exception as exc:
+            print(f"❌ {type(exc).__name__}: {exc}", file=sys.stderr)
+            outcome = "error"
+        with self.lock:
+            self.samples.append((outcome, time.perf_counter() - started))
+
+
+def closed_loop(run, recorder: Recorder, queries, weights, args) -> None:
+    stop_at = time.monotonic() + args.duration
+
+    def user(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.monotonic() < stop_at:
+            recorder.call(run, rng.choices(queries, weights)[0])
+            time.sleep(args.think_time)
+
+    threads = [threading.Thread(target=user, args=(args.seed + i,)) for i in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def open_loop(run, recorder: Recorder, queries, weights, args) -> None:
+    rng = random.Random(args.seed)
+    stop_at = time.monotonic() + args.duration
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as pool:
+        next_at = time.monotonic()
+        while next_at < stop_at:
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            pool.submit(recorder.call, run, rng.choices(queries, weights)[0])
+            next_at += rng.expovariate(args.rate)
+
+
+def report(recorder: Recorder, elapsed: float, args, extra: dict) -> dict:
+    samples = recorder.samples
+    counts = {o: sum(1 for s in samples if s[0] == o) for o in OUTCOMES}
+    answered = [latency for outcome, latency in samples if outcome != "rejected"]
+    total = len(samples) or 1
+    return {
+        "target": args.target,
+        "model": f"open {args.rate}/s" if args.rate else f"closed {args.users} users",
+        "duration_s": round(elapsed, 1),
+        "requests": len(samples),
+        "throughput_rps": round(counts["ok"] / elapsed, 3),
+        "latency_p50_s": round(percentile(answered, 0.50), 3),
+        "latency_p95_s": round(percentile(answered, 0.95), 3),
+        "latency_p99_s": round(percentile(answered, 0.99), 3),
+        "error_rate": round(counts["error"] / total, 4),
+        "timeout_rate": round(counts["timeout"] / total, 4),
+        "rejection_rate": round(counts["rejected"] / total, 4),
+        # ru_maxrss is KiB on Linux (the harness process; includes the planner for --target planner)
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("json",)},
+        **extra,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("planner", "http"), default="planner")
+    parser.add_argument("--url", help="HTTP entry point for --target http")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--users", type=int, default=4, help="closed-loop concurrent users")
+    parser.add_argument("--rate", type=float, default=0.0, help="open-loop arrivals per second (overrides --users)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="open-loop cap on outstanding requests")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--deadline", type=float, default=120.0, help="per-request deadline_s")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="fake LLM seconds per call")
+    parser.add_argument("--critic-latency", type=float, default=1.0)
+    parser.add_argument("--api-latency", type=float, default=0.2, help="API stand-in seconds per request")
+    parser.add_argument("--api-error-rate", type=float, default=0.0)
+    parser.add_argument("--cache", choices=("memory", "sqlite"), default="memory",
+                        help="cache backend (unless CACHE_BACKEND is set)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the result to this file")
+    args = parser.parse_args()
+
+    if args.target == "http" and not args.url:
+        parser.error("--target http requires --url")
+
+    queries, weights = load_corpus(args.corpus)
+    run = planner_target(args) if args.target == "planner" else http_target(args)
+    recorder = Recorder()
+
+    started = time.perf_counter()
+    if args.rate:
+        open_loop(run, recorder, queries, weights, args)
+    else:
+        closed_loop(run, recorder, queries, weights, args)
+    elapsed = time.perf_counter() - started
+
+    extra = {}
+    if args.target == "planner":
+        from utils.admission import get_admission_controller
+        from utils.cache_backend import get_cache
+        extra = {
+            "api_requests": len(run.api_requests),
+            "admission": get_admission_controller().metrics(),
+            "cache": get_cache().stats(),
+        }
+
+    result = report(recorder, elapsed, args, extra)
+    print(
+        f"\n{result['model']}, {result['requests']} requests in {result['duration_s']}s\n"
+        f"  throughput   {result['throughput_rps']:.2f} plans/s\n"
+        f"  latency      p50 {result['latency_p50_s']:.2f}s  p95 {result['latency_p95_s']:.2f}s  "
+        f"p99 {result['latency_p99_s']:.2f}s\n"
+        f"  errors {result['error_rate']:.1%}  timeouts {result['timeout_rate']:.1%}  "
+        f"rejected {result['rejection_rate']:.1%}\n"
+        f"  peak RSS     {result['peak_rss_mb']} MB"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"  → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
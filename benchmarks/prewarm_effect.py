@@ -0,0 +1,229 @@
+"""
+Cache prewarming benchmark
+--------------------------
+Does prewarming (utils/prewarm.py) lower latency for popular destinations?
+
+Plays the same Zipf-distributed traffic over gazetteer cities twice against
+the local API stand-ins (benchmarks/api_standins.py) — once with the
+prewarmer off, once with it running. Traffic comes in bursts separated by
+quiet gaps longer than the shortest TTL, so entries expire between bursts.
+
+Prewarming only matters on the cold-miss path: a request for a destination
+nobody asked about for longer than that TTL. Those "returning" requests
+(the same ones in both arms) are reported separately from the rest, which
+mostly hit entries the previous request just stored. Per arm:
+
+  - p50 / p95 tool-layer latency of returning requests (current weather,
+    forecast, attractions, restaurants and the destination's exchange rates
+    looked up concurrently, as the agent's first tool round does), for the
+    top-N destinations and for the tail
+  - p50 of all other requests
+  - cache hit rate over those lookups and the API calls made (by users and
+    by the prewarmer)
+
+TTLs are compressed (--ttl-scale) so entries expire within the run, and the
+query log starts from the same synthetic history in both arms.
+
+Usage:
+    python -m benchmarks.prewarm_effect
+    python -m benchmarks.prewarm_effect --rounds 5 --burst 10 --rate 6 --top-n 10 --quota 2000
+"""
+
+import argparse
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.api_standins import _RATES, point_tools_at, serve_apis
+from utils import cache_backend
+from utils.gazetteer import get_gazetteer
+from utils.prewarm import CachePrewarmer
+from utils.query_log import QueryLog
+
+
+# Production TTLs (config.yaml → cache.ttl) divided by --ttl-scale
+TTLS = {"weather": 900, "forecast": 3600, "places": 86400, "fx": 3600}
+NAMESPACES = tuple(TTLS)
+
+
+def destinations(count: int, seed: int) -> list[str]:
+    """Gazetteer cities the FX stand-in can quote, in popularity-rank order."""
+    gazetteer = get_gazetteer()
+    cities = sorted(
+        gazetteer.display_name(p) for p in gazetteer.places.values() if p["currency"] in _RATES
+    )
+    random.Random(seed).shuffle(cities)
+    return cities[:count]
+
+
+def zipf_weights(count: int, s: float) -> list[float]:
+    return [1 / (rank + 1) ** s for rank in range(count)]
+
+
+def traffic_schedule(args, weights: list[float]) -> list[tuple[float, int, bool]]:
+    """
+    (offset seconds, city rank, returning) for --rounds bursts separated by
+    --gap seconds. `returning` marks a request whose city went unrequested
+    for longer than the shortest TTL (or never was): the cold-miss path.
+    """
+    rng = random.Random(args.seed)
+    quiet = min(TTLS.values()) / args.ttl_scale
+    last: dict[int, float] = {}
+    schedule = []
+    start = 0.0
+    for _ in range(args.rounds):
+        at = start
+        while at < start + args.burst:
+            rank = rng.choices(range(len(weights)), weights)[0]
+            schedule.append((at, rank, at - last.get(rank, -math.inf) > quiet))
+            last[rank] = at
+            at += rng.expovariate(args.rate)
+        start += args.burst + args.gap
+    return schedule
+
+
+def run_arm(args, cities: list[str], weights: list[float], schedule: list, prewarm: bool, api) -> dict:
+    from utils.currency_converter import CurrencyConverter
+    from utils.place_info import GooglePlaceSearchTool
+    from utils.weather import WeatherForecastTool
+
+    # Fresh cache with compressed TTLs; the services capture it at construction
+    cache_backend._cache = cache_backend.create_cache({
+        "backend": "memory",
+        "default_ttl": 3600 / args.ttl_scale,
+        "ttl": {ns: ttl / args.ttl_scale for ns, ttl in TTLS.items()},
+    })
+    weather = WeatherForecastTool(os.environ["OPENWEATHERMAP_API_KEY"])
+    places = GooglePlaceSearchTool(os.environ["GPLACES_API_KEY"])
+    fx = CurrencyConverter(os.environ["EXCHANGE_RATE_API_KEY"])
+    gazetteer = get_gazetteer()
+
+    # Same popularity history for both arms
+    query_log = QueryLog(path=os.path.join(args.tmp, f"query_log-{'on' if prewarm else 'off'}.sqlite3"))
+    history = random.Random(args.seed + 1)
+    now = time.time()
+    for city in history.choices(cities, weights, k=args.history):
+        query_log.record(f"3-day trip to {city}", now=now - history.uniform(0, 48 * 3600))
+
+    prewarmer = None
+    if prewarm:
+        prewarmer = CachePrewarmer(
+            query_log=query_log, top_n=args.top_n, interval_seconds=args.interval,
+            refresh_ahead=args.refresh_ahead, max_calls_per_hour=args.quota,
+        )
+        # A deployed prewarmer would have been running already
+        prewarmer.run_once()
+        prewarmer.start()
+
+    served_before = len(api.handler.requests_served)
+    lookups = ThreadPoolExecutor(max_workers=64)
+
+    def request(city: str) -> float:
+        query_log.record(f"3-day trip to {city}")
+        currency = gazetteer.resolve(city)["currency"]
+        started = time.perf_counter()
+        futures = [
+            lookups.submit(weather.get_current_weather, city),
+            lookups.submit(weather.get_forecast_weather, city),
+            lookups.submit(places.attractions, city),
+            lookups.submit(places.restaurants, city),
+            lookups.submit(fx.get_rates, currency),
+        ]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - started
+
+    results: list[tuple[int, bool, float]] = []
+    results_lock = threading.Lock()
+
+    def user(rank: int, returning: bool) -> None:
+        elapsed = request(cities[rank])
+        with results_lock:
+            results.append((rank, returning, elapsed))
+
+    with ThreadPoolExecutor(max_workers=32) as users:
+        started = time.monotonic()
+        for at, rank, returning in schedule:
+            time.sleep(max(0.0, started + at - time.monotonic()))
+            users.submit(user, rank, returning)
+    lookups.shutdown()
+
+    warm = prewarmer.stats() if prewarmer else {"calls_last_hour": 0}
+    if prewarmer:
+        prewarmer.stop()
+
+    stats = cache_backend.get_cache().stats()
+    hits = sum(stats.get(ns, {}).get("hits", 0) + stats.get(ns, {}).get("waited_hits", 0) for ns in NAMESPACES)
+    misses = sum(stats.get(ns, {}).get("misses", 0) for ns in NAMESPACES)
+    return {
+        "popular": sorted(t for rank, returning, t in results if returning and rank < args.top_n),
+        "tail": sorted(t for rank, returning, t in results if returning and rank >= args.top_n),
+        "repeat": sorted(t for rank, returning, t in results if not returning),
+        "hit_rate": hits / max(hits + misses, 1),
+        "api_calls": len(api.handler.requests_served) - served_before,
+        "prewarm_refreshes": warm["calls_last_hour"],
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3, help="bursts of traffic per arm")
+    parser.add_argument("--burst", type=float, default=8.0, help="seconds of traffic per burst")
+    parser.add_argument("--gap", type=float, default=None,
+                        help="quiet seconds between bursts (default: 1.5 × the shortest scaled TTL)")
+    parser.add_argument("--rate", type=float, default=4.0, help="requests per second during a burst")
+    parser.add_argument("--cities", type=int, default=40)
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=2.0, help="prewarm cycle, seconds")
+    parser.add_argument("--refresh-ahead", type=float, default=0.3)
+    parser.add_argument("--quota", type=int, default=5000, help="prewarm API calls per hour")
+    parser.add_argument("--ttl-scale", type=float, default=60.0, help="divide production TTLs by this")
+    parser.add_argument("--history", type=int, default=300, help="past queries seeded into the log")
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.gap is None:
+        args.gap = 1.5 * min(TTLS.values()) / args.ttl_scale
+
+    api, url = serve_apis(latency=args.api_latency, jitter=0.2)
+    point_tools_at(url)
+    cities = destinations(args.cities, args.seed)
+    weights = zipf_weights(len(cities), args.zipf)
+    share = sum(weights[: args.top_n]) / sum(weights)
+    schedule = traffic_schedule(args, weights)
+    returning = [rank for _, rank, r in schedule if r]
+
+    print(f"{len(cities)} cities, zipf {args.zipf}: top {args.top_n} get {share:.0%} of traffic; "
+          f"TTLs ÷{args.ttl_scale:g}, {args.rounds} × {args.burst:g}s at {args.rate:g} req/s, {args.gap:g}s gaps")
+    print(f"{len(schedule)} requests per arm, {len(returning)} returning after a quiet period "
+          f"({sum(rank < args.top_n for rank in returning)} to the top {args.top_n})\n")
+    print(f"{'':<12} {'returning: top':>16} {'returning: tail':>17} {'others':>7}")
+    print(f"{'arm':<12} {'p50':>7} {'p95':>8} {'p50':>8} {'p95':>8} {'p50':>7} "
+          f"{'hit rate':>9} {'api calls':>10} {'prewarm':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.tmp = tmp
+        arms = {}
+        for name, prewarm in (("no prewarm", False), ("prewarm", True)):
+            r = arms[name] = run_arm(args, cities, weights, schedule, prewarm, api)
+            print(f"{name:<12} {percentile(r['popular'], .5) * 1e3:5.0f}ms {percentile(r['popular'], .95) * 1e3:6.0f}ms "
+                  f"{percentile(r['tail'], .5) * 1e3:6.0f}ms {percentile(r['tail'], .95) * 1e3:6.0f}ms "
+                  f"{percentile(r['repeat'], .5) * 1e3:5.0f}ms "
+                  f"{r['hit_rate']:>9.0%} {r['api_calls']:>10} {r['prewarm_refreshes']:>8}")
+
+    off, on = arms["no prewarm"]["popular"], arms["prewarm"]["popular"]
+    print(f"\ntop-{args.top_n} destinations after a quiet period: "
+          f"p50 {percentile(off, .5) * 1e3:.0f}ms → {percentile(on, .5) * 1e3:.0f}ms, "
+          f"p95 {percentile(off, .95) * 1e3:.0f}ms → {percentile(on, .95) * 1e3:.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Redis stand-in
+--------------
+A tiny in-memory server speaking the subset of the Redis protocol used by
+utils/cache_backend.RedisCache (PING, AUTH, SELECT, GET, SET [EX|PX] [NX],
+PTTL, DEL, SCAN, and EVAL of its compare-and-delete script). Lets the Redis
+backend and multi-worker setups be exercised without installing Redis.
+
+Usage:
+    python -m benchmarks.redis_standin [--port 6390]
+    CACHE_BACKEND=redis ... (with cache.redis_url: redis://localhost:6390/0)
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+from utils.cache_backend import _DELETE_IF_EQUAL
+
+
+class _Store:
+    def __init__(self):
+        self.data: dict[str, tuple[str, float]] = {}   # key → (value, expires_at or inf)
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self.data[key]
+            return None
+        return entry[0]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    store: _Store
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.decode().split()            # inline command (e.g. redis-cli PING)
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(size + 2)[:-2].decode("utf-8"))
+        return args
+
+    def _write(self, value) -> None:
+        if value is None:
+            out = b"$-1\r\n"
+        elif isinstance(value, bool):
+            out = b"+OK\r\n" if value else b"$-1\r\n"
+        elif isinstance(value, int):
+            out = b":%d\r\n" % value
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self._write(item)
+            return
+        elif isinstance(value, Exception):
+            out = f"-ERR {value}\r\n".encode()
+        else:
+            data = str(value).encode("utf-8")
+            out = b"$%d\r\n%s\r\n" % (len(data), data)
+        self.wfile.write(out)
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            try:
+                self._write(self._execute(args[0].upper(), args[1:]))
+            except Exception as exc:
+                self._write(exc)
+
+    def _execute(self, name: str, args: list[str]):
+        store = self.store
+        with store.lock:
+            if name in ("PING", "AUTH", "SELECT"):
+                return True
+            if name == "GET":
+                return store.get(args[0])
+            if name == "SET":
+                key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+                expires = float("inf")
+                if "PX" in options:
+                    expires = time.time() + int(args[2 + options.index("PX") + 1]) / 1000
+                elif "EX" in options:
+                    expires = time.time() + int(args[2 + options.index("EX") + 1])
+                if "NX" in options and store.get(key) is not None:
+                    return None
+                store.data[key] = (value, expires)
+                return True
+            if name == "PTTL":
+                if store.get(args[0]) is None:
+                    return -2
+                expires = store.data[args[0]][1]
+                return -1 if expires == float("inf") else int((expires - time.time()) * 1000)
+            if name == "DEL":
+                return sum(store.data.pop(k, None) is not None for k in args)
+            if name == "EVAL":
+                if args[0] != _DELETE_IF_EQUAL:
+                    raise ValueError("only RedisCache's compare-and-delete script is supported")
+                key, value = args[2], args[3]
+                return int(store.get(key) == value and store.data.pop(key, None) is not None)
+            if name == "SCAN":
+                options = [a.upper() for a in args]
+                pattern = args[options.index("MATCH") + 1] if "MATCH" in options else "*"
+                keys = [k for k in list(store.data) if store.get(k) is not None and fnmatch.fnmatchcase(k, pattern)]
+                return ["0", keys]
+            if name == "DBSIZE":
+                return len(store.data)
+        raise ValueError(f"unknown command '{name}'")
+
+
+def serve(host: str = "127.0.0.1", port: int = 6390) -> socketserver.ThreadingTCPServer:
+    """Start the stand-in on a background thread and return the server."""
+    handler = type("Handler", (_Handler,), {"store": _Store()})
+    server = socketserver.ThreadingTCPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port)
+    print(f"Redis stand-in listening on {args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
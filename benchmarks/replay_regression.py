@@ -0,0 +1,187 @@
+"""
+Replay regression test
+----------------------
+Records `get_travel_plan` runs into cassettes (utils/cassette.py) once, then
+replays them offline — no API keys, network or cost — and compares planner
+latency against a stored baseline, so performance regressions in the graph,
+tool executor, caches or prompt handling show up as slower replays.
+
+    record   run each query live, one cassette per query + manifest.json
+    replay   run each query --repeat times against its cassette and take the
+             median; the first replay (or --update-baseline) writes
+             baseline.json, later replays are compared with it and exit
+             non-zero when a query is more than --tolerance slower (and by
+             more than max(--min-delta, --min-delta-ratio × baseline, the
+             spread of the baseline's runs) seconds), misses recorded
+             traffic, or changes its plan. One untimed run warms the process
+             up first.
+
+Replay latency: --latency none (planner overhead only, the default),
+recorded (original network timing) or a fixed number of seconds.
+
+--standins records against the fake LLM and local API stand-ins
+(benchmarks/api_standins.py), so the pipeline can be tried without keys;
+only the HTTP side is captured in that case.
+
+Usage:
+    python -m benchmarks.replay_regression record --queries 5
+    python -m benchmarks.replay_regression replay
+    python -m benchmarks.replay_regression replay --latency recorded --tolerance 0.2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from benchmarks.load_test import CORPUS, load_corpus
+
+
+DEFAULT_DIR = os.path.join("output", "cassettes", "regression")
+
+
+def _slug(query: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:48]
+
+
+def _prepare(standins_url=None) -> None:
+    """Fresh in-process cache per run so every request reaches the cassette."""
+    os.environ["CACHE_BACKEND"] = "memory"
+    if standins_url:
+        from benchmarks.api_standins import FakeChatModel, point_tools_at
+        from utils.model_loader import ModelLoader
+
+        point_tools_at(standins_url)
+        llm = FakeChatModel(latency=0.0, jitter=0.0)
+        ModelLoader.load_llm = lambda self: llm
+
+
+def _run(query: str, deadline_s: float) -> tuple[str, float]:
+    from travel_agent import get_travel_plan
+    from utils.cache_backend import get_cache
+
+    get_cache().clear()
+    started = time.perf_counter()
+    plan = get_travel_plan(query, deadline_s=deadline_s)
+    return plan, time.perf_counter() - started
+
+
+def _digest(plan: str) -> str:
+    return hashlib.sha256(plan.encode("utf-8")).hexdigest()[:16]
+
+
+def record(args) -> None:
+    from utils.cassette import use_cassette
+
+    standins_url = None
+    if args.standins:
+        from benchmarks.api_standins import serve_apis
+        _, standins_url = serve_apis(latency=0.05)
+    _prepare(standins_url)
+
+    queries, _ = load_corpus(args.corpus)
+    manifest = {"standins": standins_url, "queries": []}
+    for query in queries[: args.queries]:
+        path = os.path.join(args.dir, f"{_slug(query)}.cassette.gz")
+        with use_cassette(path, mode="record") as cassette:
+            plan, elapsed = _run(query, args.deadline)
+        manifest["queries"].append({"query": query, "cassette": os.path.basename(path),
+                                    "exchanges": cassette.stats["recorded"]})
+        print(f"📼 {query[:50]:<50} {cassette.stats['recorded']:>3} exchanges  {elapsed:6.2f}s")
+
+    with open(os.path.join(args.dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"\n→ {args.dir}/manifest.json")
+
+
+def replay(args) -> int:
+    from utils.cassette import use_cassette
+
+    with open(os.path.join(args.dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    _prepare(manifest.get("standins"))
+
+    latency = args.latency if args.latency in ("none", "recorded") else float(args.latency)
+    baseline_path = os.path.join(args.dir, f"baseline-{args.latency}.json")
+    baseline = {}
+    if os.path.exists(baseline_path) and not args.update_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # Imports, graph compilation and first-call caches are not planner latency
+    warm_up = manifest["queries"][0]
+    with use_cassette(os.path.join(args.dir, warm_up["cassette"]), latency=latency):
+        _run(warm_up["query"], args.deadline)
+
+    results, failures = {}, 0
+    print(f"{'query':<50} {'median':>8} {'baseline':>9} {'change':>8}  status")
+    for entry in manifest["queries"]:
+        query = entry["query"]
+        timings, plan, misses = [], "", 0
+        for _ in range(args.repeat):
+            with use_cassette(os.path.join(args.dir, entry["cassette"]), latency=latency) as cassette:
+                plan, elapsed = _run(query, args.deadline)
+            timings.append(elapsed)
+            misses += cassette.stats["misses"]
+        # Median of the runs, for the baseline too: one lucky or unlucky run decides nothing
+        typical = statistics.median(timings)
+        results[query] = {"elapsed_s": round(typical, 4), "spread_s": round(max(timings) - min(timings), 4),
+                          "plan_sha": _digest(plan)}
+
+        status, change = "ok", ""
+        previous = baseline.get(query)
+        if misses:
+            status = f"MISS ({misses} unrecorded requests)"
+        elif previous:
+            ratio = typical / previous["elapsed_s"] - 1 if previous["elapsed_s"] else 0.0
+            change = f"{ratio:+.0%}"
+            noise = max(args.min_delta, args.min_delta_ratio * previous["elapsed_s"], previous.get("spread_s", 0.0))
+            if ratio > args.tolerance and typical - previous["elapsed_s"] > noise:
+                status = "SLOWER"
+            elif previous["plan_sha"] != results[query]["plan_sha"]:
+                status = "PLAN CHANGED"
+        failures += status != "ok"
+        base = f"{previous['elapsed_s']:.3f}s" if previous else "—"
+        print(f"{query[:50]:<50} {typical:7.3f}s {base:>9} {change:>8}  {status}")
+
+    if not baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n→ baseline written to {baseline_path}")
+    elif failures:
+        print(f"\n❌ {failures} regression(s) against {baseline_path}")
+    else:
+        print(f"\n✅ no regressions against {baseline_path}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="cassette / manifest / baseline directory")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--queries", type=int, default=5, help="record: first N corpus queries")
+    parser.add_argument("--standins", action="store_true", help="record: fake LLM + local API stand-ins")
+    parser.add_argument("--deadline", type=float, default=120.0)
+    parser.add_argument("--latency", default="none", help="replay: none | recorded | seconds per exchange")
+    parser.add_argument("--repeat", type=int, default=5, help="replay: runs per query (the median is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="replay: allowed slowdown (0.25 = +25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="replay: ignore slowdowns smaller than this many seconds (timer noise)")
+    parser.add_argument("--min-delta-ratio", type=float, default=0.25,
+                        help="replay: ... or smaller than this fraction of the baseline, if larger")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args)
+    else:
+        sys.exit(replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Route optimizer benchmark
+-------------------------
+How fast is utils/route_optimizer.py, and how much walking does it save?
+
+Places are scattered around a gazetteer city in a few neighbourhood
+clusters (as attraction results are). For each size the benchmark reports
+the median time of every stage over --repeats runs:
+
+  - distance matrix (haversine over all places)
+  - clustering into days (k-means + capacity balancing)
+  - ordering every day (nearest neighbour + 2-opt)
+
+and the total straight-line distance walked for three day plans:
+
+  - list order:  the places in result order, cut into equal days (what
+                 "group the attractions day-wise" over a text list does
+                 without coordinates)
+  - clustered:   the optimizer's days, each in nearest-neighbour order
+  - optimized:   the optimizer's days after 2-opt (optimize_days)
+
+Usage:
+    python -m benchmarks.route_optimizer
+    python -m benchmarks.route_optimizer --sizes 20 200 500 --days 5 --repeats 20
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from utils.gazetteer import get_gazetteer
+from utils.route_optimizer import (
+    _nearest_neighbour, _path_length, _project, cluster_days, distance_matrix, optimize_days, order_day,
+)
+
+
+def synthetic_places(count: int, city: str, seed: int, neighbourhoods: int = 6) -> list[dict]:
+    """Places around `city` in Gaussian neighbourhood clusters, in shuffled (relevance) order."""
+    centre = get_gazetteer().resolve(city)
+    rng = np.random.default_rng(seed)
+    hubs = rng.normal(0, [0.03, 0.045], size=(neighbourhoods, 2))
+    hub = rng.integers(neighbourhoods, size=count)
+    offsets = hubs[hub] + rng.normal(0, [0.006, 0.009], size=(count, 2))
+    return [
+        {"name": f"Place {i}", "lat": centre["lat"] + dlat, "lon": centre["lon"] + dlon}
+        for i, (dlat, dlon) in enumerate(offsets)
+    ]
+
+
+def timed(function, repeats: int):
+    times, result = [], None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1e3, result
+
+
+def list_order_km(distances: np.ndarray, days: int) -> float:
+    order = np.arange(len(distances))
+    return sum(_path_length(day, distances) for day in np.array_split(order, days))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100, 200, 500, 1000])
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--city", default="Paris")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{args.city}, {args.days} days, median of {args.repeats} runs\n")
+    print(f"{'places':>6} {'matrix':>8} {'cluster':>8} {'order':>8} {'total':>8}   "
+          f"{'list order':>10} {'clustered':>10} {'optimized':>10}")
+
+    for size in args.sizes:
+        places = synthetic_places(size, args.city, args.seed + size)
+        lat = np.array([p["lat"] for p in places])
+        lon = np.array([p["lon"] for p in places])
+        points = _project(lat, lon)
+
+        matrix_ms, distances = timed(lambda: distance_matrix(lat, lon), args.repeats)
+        cluster_ms, labels = timed(lambda: cluster_days(points, args.days), args.repeats)
+        groups = [np.flatnonzero(labels == c) for c in range(labels.max() + 1)]
+
+        def order_all():
+            return [g[order_day(distances[np.ix_(g, g)], points[g])] for g in groups]
+
+        order_ms, _ = timed(order_all, args.repeats)
+        total_ms, plan = timed(lambda: optimize_days(places, args.days), args.repeats)
+
+        clustered_km = 0.0
+        for g in groups:
+            local = distances[np.ix_(g, g)]
+            outermost = int(((points[g] - points[g].mean(axis=0)) ** 2).sum(axis=1).argmax())
+            clustered_km += _path_length(_nearest_neighbour(local, outermost), local)
+
+        print(f"{size:>6} {matrix_ms:6.2f}ms {cluster_ms:6.2f}ms {order_ms:6.2f}ms {total_ms:6.2f}ms   "
+              f"{list_order_km(distances, args.days):8.1f}km {clustered_km:8.1f}km {plan['total_km']:8.1f}km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Spatial index benchmark
+-----------------------
+How fast does utils/spatial_index.py answer "near X", compared with a
+brute-force distance scan over every place of the city?
+
+Places are scattered around a gazetteer city in neighbourhood clusters
+(benchmarks/route_optimizer.py → synthetic_places) and filed under a few
+kinds. For each city size the benchmark reports:
+
+  - build:   first query after adding the places (grid + kind masks)
+  - grid:    median CityIndex.nearby() time over --queries random anchors
+  - scan:    median haversine over all places, filtered and sorted
+  - results: mean places found within the radius
+
+Usage:
+    python -m benchmarks.spatial_index
+    python -m benchmarks.spatial_index --sizes 500 5000 --radius 0.5 --queries 500
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.route_optimizer import synthetic_places
+from utils.gazetteer import get_gazetteer
+from utils.spatial_index import CityIndex, _haversine, nearby_settings
+
+_KINDS = ("attractions", "restaurants", "activities", "hotels")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000, 10000])
+    parser.add_argument("--city", default="Paris")
+    parser.add_argument("--radius", type=float, default=1.0, help="km")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    centre = get_gazetteer().resolve(args.city)
+    cell_km = nearby_settings()["cell_km"]
+    print(f"{args.city}, radius {args.radius} km, cell {cell_km} km, median of {args.queries} queries\n")
+    print(f"{'places':>7} {'build':>9} {'grid':>9} {'scan':>9} {'results':>8}")
+
+    for size in args.sizes:
+        places = synthetic_places(size, args.city, args.seed + size)
+        for i, place in enumerate(places):
+            place["place_id"] = f"p{i}"
+        index = CityIndex(centre["lat"], centre["lon"], cell_km)
+        for k, kind in enumerate(_KINDS):
+            index.add(kind, places[k::len(_KINDS)])
+
+        rng = np.random.default_rng(args.seed)
+        anchors = [places[i] for i in rng.integers(size, size=args.queries)]
+        kinds = [_KINDS[i] for i in rng.integers(len(_KINDS), size=args.queries)]
+
+        started = time.perf_counter()
+        index.nearby(centre["lat"], centre["lon"], args.radius)
+        build_ms = (time.perf_counter() - started) * 1e3
+
+        lat = np.array([p["lat"] for p in places])
+        lon = np.array([p["lon"] for p in places])
+        kind_of = np.array([_KINDS[i % len(_KINDS)] for i in range(size)])
+
+        grid, scan, found = [], [], []
+        for anchor, kind in zip(anchors, kinds):
+            started = time.perf_counter()
+            hits = index.nearby(anchor["lat"], anchor["lon"], args.radius, kind)
+            grid.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            km = _haversine(lat, lon, anchor["lat"], anchor["lon"])
+            inside = np.flatnonzero((km <= args.radius) & (kind_of == kind))
+            inside[np.argsort(km[inside])]
+            scan.append(time.perf_counter() - started)
+            found.append(len(hits))
+
+        print(f"{size:>7} {build_ms:7.2f}ms {statistics.median(grid) * 1e3:7.3f}ms "
+              f"{statistics.median(scan) * 1e3:7.3f}ms {statistics.mean(found):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Tool routing benchmark
+----------------------
+Runs the agent graph (FakeChatModel + local API stand-ins) for a set of
+queries with tool routing off (every tool bound to every call) and on
+(Agent/tool_router.py), and reports per agent iteration:
+
+    tools      tools bound to the call
+    schema     tokens spent on tool schemas
+    prompt     total prompt tokens (messages + schemas)
+    latency    agent LLM call time; the fake model charges --prefill
+               seconds per 1k prompt tokens, so schema savings show up
+
+plus the cost of bind_tools() with and without the bound-LLM cache.
+Tokens are counted with tiktoken when installed, otherwise ≈ chars / 4.
+
+Usage:
+    python -m benchmarks.tool_routing [--prefill 0.05] [--queries PATH]
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "routing_queries.jsonl")
+
+
+def _token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken"
+    except Exception:
+        return lambda text: len(text) // 4, "≈ chars/4"
+
+
+count_tokens, TOKEN_METHOD = _token_counter()
+
+
+class IterationRecorder(BaseCallbackHandler):
+    """One row per agent LLM call (calls with tools bound); section calls are ignored."""
+
+    def __init__(self):
+        self.rows: list[dict] = []
+        self._open: dict = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, invocation_params=None, **kwargs):
+        tools = (invocation_params or {}).get("tools")
+        if not tools:
+            return
+        prompt = "".join(str(m.content) for m in messages[0])
+        schema = count_tokens(json.dumps(tools))
+        self._open[run_id] = {
+            "tools": len(tools),
+            "schema": schema,
+            "prompt": count_tokens(prompt) + schema,
+            "started": time.perf_counter(),
+        }
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        row = self._open.pop(run_id, None)
+        if row:
+            row["latency"] = time.perf_counter() - row.pop("started")
+            self.rows.append(row)
+
+
+def run_query(query: str, routing: bool) -> list[dict]:
+    from Agent.agentic_workflow import GraphBuilder
+    from utils.cache_backend import get_cache
+
+    get_cache().clear()
+    builder = GraphBuilder(model_provider="openai", routing=routing)
+    graph = builder()
+    recorder = IterationRecorder()
+    graph.invoke(
+        {"messages": [{"role": "user", "content": query}]},
+        config={"recursion_limit": 8, "callbacks": [recorder]},
+    )
+    return recorder.rows
+
+
+def bind_cost(repeats: int = 50) -> dict:
+    """Milliseconds per bind_tools() for all tools, uncached vs through the bound-LLM cache."""
+    from Agent.agentic_workflow import GraphBuilder
+    from Agent.tool_router import bind_subset
+
+    builder = GraphBuilder(model_provider="openai", routing=True)
+    names = frozenset(builder.tool_names)
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        builder.llm.bind_tools(tools=builder.tools)
+    uncached = (time.perf_counter() - started) / repeats
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        bind_subset(builder.llm, builder.tools, names)
+    cached = (time.perf_counter() - started) / repeats
+    return {"uncached_ms": uncached * 1000, "cached_ms": cached * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=FIXTURES)
+    parser.add_argument("--prefill", type=float, default=0.05, help="fake LLM seconds per 1k prompt tokens")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM seconds per full answer")
+    args = parser.parse_args()
+
+    from benchmarks.api_standins import FakeChatModel, point_tools_at, serve_apis
+    from utils.model_loader import ModelLoader
+
+    _, base_url = serve_apis(latency=0.0)
+    point_tools_at(base_url)
+    os.environ["CACHE_BACKEND"] = "memory"
+    llm = FakeChatModel(latency=args.latency, jitter=0.0, prefill_latency=args.prefill)
+    ModelLoader.load_llm = lambda self: llm
+
+    with open(args.queries, encoding="utf-8") as f:
+        queries = [json.loads(line)["query"] for line in f if line.strip()]
+
+    # iteration number → mode → rows
+    by_iteration: dict[int, dict[str, list]] = defaultdict(lambda: {"all": [], "routed": []})
+    for query in queries:
+        for mode, routing in (("all", False), ("routed", True)):
+            for i, row in enumerate(run_query(query, routing), start=1):
+                by_iteration[i][mode].append(row)
+
+    def mean(rows, field):
+        return sum(r[field] for r in rows) / len(rows) if rows else 0.0
+
+    print(f"\n{len(queries)} queries, tokens: {TOKEN_METHOD}, prefill {args.prefill}s / 1k tokens\n")
+    print(f"{'iter':<5} {'mode':<7} {'calls':>5} {'tools':>6} {'schema':>8} {'prompt':>8} {'latency':>9}")
+    for iteration in sorted(by_iteration):
+        modes = by_iteration[iteration]
+        for mode in ("all", "routed"):
+            rows = modes[mode]
+            print(f"{iteration:<5} {mode:<7} {len(rows):>5} {mean(rows, 'tools'):>6.1f} "
+                  f"{mean(rows, 'schema'):>8.0f} {mean(rows, 'prompt'):>8.0f} {mean(rows, 'latency') * 1000:>7.0f}ms")
+        before, after = modes["all"], modes["routed"]
+        if before and after:
+            print(f"{'':<5} {'saved':<7} {'':>5} {'':>6} "
+                  f"{1 - mean(after, 'schema') / mean(before, 'schema'):>8.0%} "
+                  f"{1 - mean(after, 'prompt') / mean(before, 'prompt'):>8.0%} "
+                  f"{1 - mean(after, 'latency') / mean(before, 'latency'):>9.0%}")
+
+    cost = bind_cost()
+    print(f"\nbind_tools (all tools): {cost['uncached_ms']:.2f} ms uncached, "
+          f"{cost['cached_ms']:.3f} ms from the bound-LLM cache")
+
+
+if __name__ == "__main__":
+    main()
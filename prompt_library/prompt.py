@@ -19,6 +19,8 @@ Give full information immediately including:
 - Weather details
 
 Use the available integrated tools to gather information and make detailed cost breakdowns.
+For the cost breakdown, put every cost into a single `compute_trip_budget` call instead of
+chaining the calculator and currency tools.
 Provide everything in one comprehensive response formatted in clean Markdown.
 
 Use only verified information from the tools. If data is missing, state it clearly instead of guessing.
@@ -0,0 +1,30 @@
+import pytest
+
+from utils.gazetteer import Gazetteer, canonical_currency
+
+
+@pytest.mark.parametrize("text, code", [
+    ("EUR", "EUR"),
+    ("Euro", "EUR"),
+    ("euros", "EUR"),
+    ("yen", "JPY"),
+    ("Pounds", "GBP"),
+    ("US dollars", "USD"),
+    ("€", "EUR"),
+    ("RON", "RON"),
+    ("sar", "SAR"),
+    ("Tokyo", "JPY"),
+    ("BKK", "THB"),
+    ("XYZ", None),
+])
+def test_canonical_currency(text, code):
+    assert canonical_currency(text) == code
+
+
+def test_resolve_cache_is_per_instance():
+    rows = [{"id": "paris-fr", "name": "Paris", "country": "France", "country_code": "FR",
+             "currency": "EUR", "lat": "48.86", "lon": "2.35", "aliases": ""}]
+    first, second = Gazetteer(rows), Gazetteer([{**rows[0], "currency": "XPF"}])
+    assert first.resolve("Paris")["currency"] == "EUR"
+    assert second.resolve("Paris")["currency"] == "XPF"
+    assert list(first._resolved) == ["Paris"]
@@ -0,0 +1,17 @@
+from Agent.multi_destination import plan_stops
+
+
+def _stops(question):
+    return [(stop["city"], stop["days"]) for stop in plan_stops(question)]
+
+
+def test_origin_is_not_a_stop():
+    assert _stops("I am flying from London to Paris for 4 days") == []
+
+
+def test_first_item_of_a_list_is_a_stop():
+    assert _stops("6 days: Paris, Rome and Barcelona") == [("Paris", 2), ("Rome", 2), ("Barcelona", 2)]
+
+
+def test_country_is_not_a_stop():
+    assert _stops("5 days in Milan, Italy and Florence") == [("Milan", 3), ("Florence", 2)]
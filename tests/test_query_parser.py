@@ -0,0 +1,25 @@
+import pytest
+
+from utils.query_parser import parse_query
+
+
+@pytest.mark.parametrize("question, destinations", [
+    ("Plan a trip to Rome. Suggest hotels too", ["Rome"]),
+    ("Going to Lisbon. What should I pack?", ["Lisbon"]),
+    ("Visit Rio de Janeiro", ["Rio de Janeiro"]),
+    ("I am flying from London to Paris for 4 days", ["Paris"]),
+    ("Weekend in St. Ives", ["St. Ives"]),
+    ("Weekend in St.Ives", ["St.Ives"]),
+    ("Plan a trip to Japan. Include Tokyo, Kyoto", ["Japan", "Tokyo", "Kyoto"]),
+    ("Trip to Paris and Rome", ["Paris", "Rome"]),
+    ("6 days: Paris, Rome and Barcelona", ["Paris", "Rome", "Barcelona"]),
+    ("Leaving Oslo and heading to Bergen and Tromso", ["Bergen", "Tromso"]),
+    ("5 days in New York, then Boston", ["New York", "Boston"]),
+])
+def test_destinations(question, destinations):
+    assert parse_query(question)["destinations"] == destinations
+
+
+def test_days_budget_and_currency():
+    parsed = parse_query("5-day budget trip to Tokyo in JPY")
+    assert (parsed["days"], parsed["budget_tier"], parsed["currency"]) == (5, "budget", "JPY")
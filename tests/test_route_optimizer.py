@@ -0,0 +1,18 @@
+import warnings
+
+import numpy as np
+
+from utils.route_optimizer import cluster_days
+
+
+def test_shared_coordinates_produce_no_empty_clusters():
+    points = np.zeros((6, 2))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert set(cluster_days(points, 3)) == {0}
+        assert np.bincount(cluster_days(points, 3, capacity=2)).tolist() == [2, 2, 2]
+
+
+def test_capacity_is_respected():
+    points = np.random.default_rng(1).normal(size=(40, 2))
+    assert np.bincount(cluster_days(points, 4, capacity=10)).tolist() == [10, 10, 10, 10]
@@ -0,0 +1,38 @@
+import json
+import os
+from typing import List
+from dotenv import load_dotenv
+from langchain.tools import tool
+
+from utils.budget_engine import BudgetEngine, LineItem
+from utils.currency_converter import CurrencyConverter
+
+
+class BudgetTool:
+    def __init__(self):
+        load_dotenv()
+        self.api_key = os.environ.get("EXCHANGE_RATE_API_KEY")
+        self.budget_engine = BudgetEngine(CurrencyConverter(self.api_key) if self.api_key else None)
+        self.budget_tool_list = self._setup_tools()
+
+    def _setup_tools(self) -> List:
+        """Setup all tools for the budget tool"""
+
+        @tool
+        def compute_trip_budget(
+            items: List[LineItem],
+            days: int,
+            target_currencies: List[str],
+        ) -> str:
+            """
+            Compute the complete trip budget in ONE call: total, per-day average,
+            per-category and per-item costs, converted into every target currency.
+            Give every cost as a line item (hotel nights, meals, transport, tickets,
+            visa, ...). Use per_day=true for costs that repeat daily, per_day=false
+            for one-off costs. Prefer this over chaining the calculator and
+            convert_currency tools.
+            """
+            breakdown = self.budget_engine.compute(items, days, target_currencies)
+            return json.dumps(breakdown, ensure_ascii=False)
+
+        return [compute_trip_budget]
@@ -1,5 +1,6 @@
 import os
 from utils.currency_converter import CurrencyConverter
+from utils.gazetteer import canonical_currency
 from typing import List
 from langchain.tools import tool
 from dotenv import load_dotenv
@@ -16,7 +17,9 @@ class CurrencyConverterTool:
 
         @tool
         def convert_currency(amount: float, from_currency: str, to_currency: str):
-            """Convert amount from one currency to another"""
+            """Convert amount from one currency to another (ISO codes, or a city to use its local currency)"""
+            from_currency = canonical_currency(from_currency) or from_currency
+            to_currency = canonical_currency(to_currency) or to_currency
             return self.currency_service.convert(amount, from_currency, to_currency)
 
         return [convert_currency]
\ No newline at end of file
@@ -3,7 +3,10 @@ from typing import List
 from dotenv import load_dotenv
 from langchain.tools import tool
 
+from utils.gazetteer import get_gazetteer
 from utils.place_info import GooglePlaceSearchTool, TavilyPlaceSearchTool
+from utils.route_optimizer import format_route, optimize_days, route_settings
+from utils.spatial_index import NearbySearch
 
 
 class PlaceSearchTool:
@@ -13,15 +16,23 @@ class PlaceSearchTool:
         self.google_api_key = os.environ.get("GPLACES_API_KEY")
         self.google_places_search = GooglePlaceSearchTool(self.google_api_key)
         self.tavily_search = TavilyPlaceSearchTool()
+        self.gazetteer = get_gazetteer()
+        self.nearby_search = NearbySearch(self.google_places_search)
 
         self.place_search_tool_list = self._setup_tools()
 
+    def _canonical_place(self, place: str) -> str:
+        """Unambiguous "City, Country" for known places; the input otherwise."""
+        known = self.gazetteer.resolve(place)
+        return self.gazetteer.display_name(known) if known else place
+
     def _setup_tools(self) -> List:
         """Setup all tools for the place search tool"""
 
         @tool
         def search_attractions(place: str) -> str:
             """Search attractions of a place"""
+            place = self._canonical_place(place)
             try:
                 result = self.google_places_search.google_search_attractions(place)
                 if result:
@@ -36,6 +47,7 @@ class PlaceSearchTool:
         @tool
         def search_restaurants(place: str) -> str:
             """Search restaurants of a place"""
+            place = self._canonical_place(place)
             try:
                 result = self.google_places_search.google_search_restaurants(place)
                 if result:
@@ -50,6 +62,7 @@ class PlaceSearchTool:
         @tool
         def search_activities(place: str) -> str:
             """Search activities of a place"""
+            place = self._canonical_place(place)
             try:
                 result = self.google_places_search.google_search_activity(place)
                 if result:
@@ -64,6 +77,7 @@ class PlaceSearchTool:
         @tool
         def search_transportation(place: str) -> str:
             """Search transportation of a place"""
+            place = self._canonical_place(place)
             try:
                 result = self.google_places_search.google_search_transportation(place)
                 if result:
@@ -75,9 +89,62 @@ class PlaceSearchTool:
                     f"Transportation in {place} (Tavily):\n{tavily_result}"
                 )
 
+        @tool
+        def plan_attraction_route(place: str, days: int) -> str:
+            """
+            Top attractions of a place grouped into `days` days, each day ordered
+            as a short route by distance. Use this for the day-by-day itinerary
+            instead of guessing which sights are close to each other.
+            """
+            place = self._canonical_place(place)
+            try:
+                records = self.google_places_search.records("attractions", place)
+            except Exception as e:
+                return f"Route planning unavailable for {place}: {e}"
+            plan = optimize_days(records, max(1, days), per_day=route_settings()["per_day"])
+            if not plan["days"]:
+                return f"No attraction coordinates found for {place}; group the days by area instead."
+            return (
+                f"Attraction routes in {place} ({days} days, ordered by distance, "
+                f"~{plan['total_km']:.1f} km in total):\n{format_route(plan)}"
+            )
+
+        @tool
+        def search_nearby(place: str, category: str, radius_km: float = 1.0) -> str:
+            """
+            Places of a category (restaurants, attractions, activities, transportation,
+            hotels, cafes, ...) within radius_km of a landmark or address. Give the
+            place with its city, e.g. "Louvre Museum, Paris". Answered from places
+            already found for that city when possible.
+            """
+            try:
+                answer = self.nearby_search.search(place, category, radius_km)
+            except Exception as e:
+                anchor, city = self.nearby_search.split_place(place)
+                tavily_result = self.tavily_search.nearby(category, anchor, city)
+                return (
+                    f"Google failed due to {e}.\n"
+                    f"{category.capitalize()} near {place} (Tavily):\n{tavily_result}"
+                )
+            if answer is None:
+                return f"Could not find {place}; give a landmark or address with its city."
+            header = (
+                f"{answer['kind'].capitalize()} within {answer['radius_km']:g} km of "
+                f"{answer['anchor']}, {answer['city']} ({answer['source']}):"
+            )
+            if not answer["results"]:
+                return f"{header}\nNone found; try a larger radius."
+            lines = [header]
+            for i, result in enumerate(answer["results"], start=1):
+                rating = f" · rating {result['rating']}" if result["rating"] else ""
+                lines.append(f"{i}. {result['name']}\n   {result['km']:.1f} km · {result['address']}{rating}")
+            return "\n".join(lines)
+
         return [
             search_attractions,
             search_restaurants,
             search_activities,
             search_transportation,
+            plan_attraction_route,
+            search_nearby,
         ]
@@ -3,7 +3,8 @@ from typing import List
 from dotenv import load_dotenv
 from langchain.tools import tool
 
-from utils.weather import WeatherForecastTool
+from utils.gazetteer import get_gazetteer
+from utils.weather import FORECAST_DAYS, WeatherForecastTool
 
 
 class WeatherInfoTool:
@@ -11,14 +12,21 @@ class WeatherInfoTool:
         load_dotenv()
         self.api_key = os.environ.get("OPENWEATHERMAP_API_KEY")
         self.weather_service = WeatherForecastTool(self.api_key)
+        self.gazetteer = get_gazetteer()
         self.weather_tool_list = self._setup_tools()
 
+    def _canonical_city(self, city: str) -> str:
+        """Unambiguous "City, Country" for known places; the input otherwise."""
+        known = self.gazetteer.resolve(city)
+        return self.gazetteer.display_name(known) if known else city
+
     def _setup_tools(self) -> List:
         """Setup all tools for the weather forecast tool"""
 
         @tool
         def get_current_weather(city: str) -> str:
             """Get current weather for a city"""
+            city = self._canonical_city(city)
             data = self.weather_service.get_current_weather(city)
 
             if not data:
@@ -34,7 +42,8 @@ class WeatherInfoTool:
         @tool
         def get_weather_forecast(city: str) -> str:
             """Get short weather forecast summary for a city"""
-            forecast = self.weather_service.get_forecast_weather(city, days=5)
+            city = self._canonical_city(city)
+            forecast = self.weather_service.get_forecast_weather(city, days=FORECAST_DAYS)
 
             if not forecast:
                 return f"Could not fetch forecast for {city}"
@@ -1,92 +1,306 @@
 import os
 import sys
+from typing import Callable, Optional
 from dotenv import load_dotenv
 
 # Ensure project root is on Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from langchain_core.messages import AIMessage, ToolMessage
+
 from Agent.agentic_workflow import GraphBuilder
+from Agent.prefetch import ToolPrefetcher
+from utils.admission import PRIORITY_NORMAL, AdmissionRejected, get_admission_controller
+from utils.cassette import install_from_env
+from utils.checkpoint_store import get_checkpoint_store
+from utils.deadline import CRITIC_MIN, Deadline, worst_degradation
+from utils.plan_model import TravelPlan, compact_text, plan_issues
+from utils.provenance import ProvenanceIndex, tool_outputs_from_messages
+from utils.query_log import get_query_log
+from utils.query_parser import parse_query
 
 # Load environment variables
 load_dotenv()
 
+# CASSETTE_MODE=record|replay captures / serves all LLM and API traffic (utils/cassette.py)
+install_from_env()
+
+
+def _best_partial_plan(state: Optional[dict]) -> str:
+    """Best answer available from a run that did not finish."""
+    messages = (state or {}).get("messages", [])
+
+    for message in reversed(messages):
+        if isinstance(message, AIMessage) and message.content and not message.tool_calls:
+            return message.content
+
+    gathered = [m for m in messages if isinstance(m, ToolMessage) and m.status != "error"]
+    if not gathered:
+        return "Error: The travel planner ran out of time before gathering any data."
 
-def get_travel_plan(question: str) -> str:
+    sections = [
+        "⚠️ **Partial plan** — the request ran out of time before the full itinerary "
+        "was written. Here is the live data gathered so far:"
+    ]
+    for message in gathered:
+        sections.append(f"### {message.name}\n{str(message.content)[:800]}")
+    return "\n\n".join(sections)
+
+
+def _notify(on_update: Callable, chunk: dict) -> None:
+    """Forward one "updates" chunk ({node: update}); a failing callback never stops the run."""
+    for node, update in chunk.items():
+        try:
+            on_update(node, update or {})
+        except Exception as exc:
+            print(f"⚠️ on_update failed for {node}: {exc}")
+
+
+def _run_graph(
+    question: str,
+    deadline: Deadline,
+    thread_id: Optional[str] = None,
+    on_section: Optional[Callable] = None,
+    on_update: Optional[Callable] = None,
+) -> dict:
     """
-    Runs the agentic travel planning workflow and returns a final string response.
-    This function GUARANTEES that no AIMessage object is leaked outside.
+    Runs the agentic travel planning workflow within `deadline`.
+    With a `thread_id` the conversation is checkpointed, so follow-ups reuse
+    earlier turns and tool results. `on_section(section, markdown)` receives
+    each section of a sectioned plan as soon as it is written, and
+    `on_update(node, update)` each graph node's state update as it finishes
+    (e.g. the "tools" node's ToolMessages, long before the plan is ready).
+    Returns {"plan": str, "degradation": str, "thread_id": str | None,
+    "repeat_calls": int, "tool_outputs": list[ToolOutput],
+    "structured_plan": dict | None}.
     """
+    print(f"\n📥 Received query: {question}  ({deadline}, thread={thread_id})")
+
+    # Destination popularity for the cache prewarmer (utils/prewarm.py)
+    try:
+        get_query_log().record(question)
+    except Exception as exc:
+        print(f"⚠️ Query log unavailable: {exc}")
+
+    # Initialize the agent workflow
+    graph_builder = GraphBuilder(model_provider="openai")
+
+    # Debug: list registered tools
+    print("\n🔧 Registered Tools:")
+    for tool in graph_builder.tools:
+        print("✅", tool.name)
+
+    store = get_checkpoint_store() if thread_id else None
+    follow_up = store.start_turn(thread_id) if store else False
+
+    # Build LangGraph
+    graph = graph_builder(checkpointer=store.saver if store else None)
+
+    # Input messages (LangGraph-compatible)
+    # A follow-up only adds the new question; the thread already holds the rest
+    messages = {
+        "messages": [
+            {
+                "role": "system",
+                "content": (
+                    "You are an expert travel planner with access to tools. "
+                    "Use tools like `search_attractions`, `search_restaurants`, "
+                    "`search_activities`, and `search_transportation` whenever needed. "
+                    "Always prefer tool calls for external and factual information."
+                ),
+            },
+            {
+                "role": "user",
+                "content": question,
+            },
+        ][1 if follow_up else 0:]
+    }
+
+    # Start weather/place lookups for obvious destinations while the
+    # agent's first LLM call is still deciding which tools to use
+    prefetcher = ToolPrefetcher(
+        graph_builder.tools, invoke=graph_builder.tool_executor.invoke_tool
+    )
+    prefetcher.start(parse_query(question))
+
+    # Run the agentic workflow
+    # recursion_limit caps tool-call rounds to prevent context overflow
+    # (Groq free tier: 6000 tokens/min; tool results accumulate fast)
+    config = {
+        "recursion_limit": 8,
+        "configurable": {"prefetcher": prefetcher, "deadline": deadline, "on_section": on_section},
+    }
+    if thread_id:
+        config["configurable"]["thread_id"] = thread_id
+
+    state = None
     try:
-        print(f"\n📥 Received query: {question}")
-
-        # Initialize the agent workflow
-        graph_builder = GraphBuilder(model_provider="openai")
-
-        # Debug: list registered tools
-        print("\n🔧 Registered Tools:")
-        for tool in graph_builder.tools:
-            print("✅", tool.name)
-
-        # Build LangGraph
-        graph = graph_builder()
-
-        # Input messages (LangGraph-compatible)
-        messages = {
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert travel planner with access to tools. "
-                        "Use tools like `search_attractions`, `search_restaurants`, "
-                        "`search_activities`, and `search_transportation` whenever needed. "
-                        "Always prefer tool calls for external and factual information."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": question,
-                },
-            ]
+        # Stream full states so the latest one survives a timeout mid-run,
+        # and node updates for progressive rendering
+        for mode, chunk in graph.stream(messages, config=config, stream_mode=["values", "updates"]):
+            if mode == "values":
+                state = chunk
+            elif on_update:
+                _notify(on_update, chunk)
+    except Exception as e:
+        print(f"⏱️ Run stopped early ({type(e).__name__}: {e}); returning best partial plan")
+        return {
+            "plan": _best_partial_plan(state),
+            "degradation": "partial",
+            "thread_id": thread_id,
+            "repeat_calls": (state or {}).get("repeat_calls") or 0,
+            "tool_outputs": tool_outputs_from_messages((state or {}).get("messages") or []),
+            "structured_plan": None,
         }
+    finally:
+        prefetcher.finish()
+        if store:
+            store.finish_turn(thread_id)
+
+    # ---- SAFE EXTRACTION (AIMessage FIX) ----
+    last_message = state["messages"][-1]
+    # LangChain AIMessage → use .content; fallback safety otherwise
+    plan = last_message.content if hasattr(last_message, "content") else str(last_message)
+
+    repeat_calls = state.get("repeat_calls") or 0
+    if repeat_calls:
+        print(f"♻️ Repeated tool calls this run: {repeat_calls}")
 
-        # Run the agentic workflow
-        # recursion_limit caps tool-call rounds to prevent context overflow
-        # (Groq free tier: 6000 tokens/min; tool results accumulate fast)
-        output = graph.invoke(messages, config={"recursion_limit": 8})
+    return {
+        "plan": plan,
+        "degradation": state.get("degradation") or "full",
+        "thread_id": thread_id,
+        "repeat_calls": repeat_calls,
+        "tool_outputs": tool_outputs_from_messages(state["messages"]),
+        "structured_plan": state.get("structured_plan"),
+    }
 
-        # ---- SAFE EXTRACTION (AIMessage FIX) ----
-        if isinstance(output, dict) and "messages" in output:
-            last_message = output["messages"][-1]
 
-            # LangChain AIMessage → use .content
-            if hasattr(last_message, "content"):
-                return last_message.content
+def run_travel_plan(
+    question: str,
+    deadline_s: Optional[float] = None,
+    thread_id: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    on_section: Optional[Callable] = None,
+    on_update: Optional[Callable] = None,
+) -> dict:
+    """
+    Runs the travel planner with an overall deadline (seconds; None = unbounded).
+    Pass the same `thread_id` for follow-up questions in one conversation, and
+    `on_section(section, markdown)` to receive plan sections as they complete
+    (and `on_update(node, update)` for graph node updates, see _run_graph).
+    The run waits for a planner slot (utils/admission.py); time spent queued
+    counts against the deadline. Raises AdmissionRejected when saturated.
 
-            # Fallback safety
-            return str(last_message)
+    Returns:
+        {
+            "plan":         str — the travel plan text,
+            "degradation":  str — one of utils.deadline.DEGRADATION_LEVELS,
+            "thread_id":    str | None,
+            "repeat_calls": int — tool calls the agent repeated (served from cache),
+            "tool_outputs": list — successful tool results the plan was written from
+                            ({"tool", "args", "content"}, utils/provenance.py),
+            "structured_plan": dict | None — the plan as a TravelPlan dict
+                            (utils/plan_model.py), from structured synthesis
+        }
+    """
+    deadline = Deadline(deadline_s)
+    with get_admission_controller().admit(priority, timeout=deadline.remaining()):
+        return _run_safely(question, deadline, thread_id, on_section, on_update)
 
-        # If output is not message-based
-        return str(output)
 
+def _run_safely(
+    question: str,
+    deadline: Deadline,
+    thread_id: Optional[str] = None,
+    on_section: Optional[Callable] = None,
+    on_update: Optional[Callable] = None,
+) -> dict:
+    try:
+        return _run_graph(question, deadline, thread_id, on_section, on_update)
     except Exception as e:
         print("❌ Exception occurred:", str(e))
-        return f"Error: {str(e)}"
+        return {"plan": f"Error: {str(e)}", "degradation": "partial", "thread_id": thread_id,
+                "repeat_calls": 0, "tool_outputs": [], "structured_plan": None}
 
 
-def get_travel_plan_with_validation(question: str) -> dict:
+def get_travel_plan(
+    question: str,
+    deadline_s: Optional[float] = None,
+    thread_id: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+) -> str:
+    """
+    Runs the agentic travel planning workflow and returns a final string response.
+    This function GUARANTEES that no AIMessage object is leaked outside.
+    """
+    try:
+        return run_travel_plan(question, deadline_s, thread_id, priority)["plan"]
+    except AdmissionRejected as e:
+        return f"Error: {e}"
+
+
+def get_travel_plan_with_validation(
+    question: str,
+    deadline_s: Optional[float] = None,
+    thread_id: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    on_section: Optional[Callable] = None,
+    on_update: Optional[Callable] = None,
+) -> dict:
     """
     Runs the travel planner, then passes the result through the critic LLM
-    for hallucination scoring.
+    for hallucination scoring. Planner and critic share one deadline and one
+    admission slot; only the rule-based check runs when too little time is
+    left. Claims are matched against the run's tool outputs first, so
+    `verified_by_tools` lists the tools the plan actually quotes. A structured
+    plan is also checked on its fields (`plan_issues`), and the LLM critic reads
+    its compact fact listing instead of the Markdown. Raises AdmissionRejected (with .retry_after) when saturated.
+    `on_section(section, markdown)` receives plan sections as they complete,
+    `on_update(node, update)` each graph node's update (tool results first).
 
     Returns:
         {
-            "plan":       str   — the travel plan text,
-            "validation": dict  — confidence score & uncertain claims
+            "plan":         str   — the travel plan text,
+            "validation":   dict  — confidence score & uncertain claims,
+            "degradation":  str   — one of utils.deadline.DEGRADATION_LEVELS,
+            "thread_id":    str | None,
+            "repeat_calls": int   — tool calls the agent repeated (served from cache),
+            "tool_outputs": list  — successful tool results the plan was written from,
+            "provenance":   dict  — plan values linked to those outputs (utils/provenance.py),
+            "structured_plan": dict | None — TravelPlan fields (utils/plan_model.py),
+            "plan_issues":  list  — consistency problems found on those fields
         }
     """
+    from utils.fast_critic import fast_validate
     from utils.response_validator import validate
 
-    plan = get_travel_plan(question)
-    validation = validate(question=question, plan=plan)
+    deadline = Deadline(deadline_s)
+    with get_admission_controller().admit(priority, timeout=deadline.remaining()):
+        result = _run_safely(question, deadline, thread_id, on_section, on_update)
+        degradation = result["degradation"]
+        provenance = ProvenanceIndex(result["tool_outputs"])
+        structured = TravelPlan.model_validate(result["structured_plan"]) if result["structured_plan"] else None
+        issues = plan_issues(structured, parse_query(question)["days"]) if structured else []
+
+        if deadline.remaining() < CRITIC_MIN:
+            # No time for the LLM critic; the rule-based check takes milliseconds
+            validation = fast_validate(question, result["plan"], provenance)
+            degradation = worst_degradation(degradation, "no_critic")
+        else:
+            validation = validate(
+                question=question, plan=result["plan"], timeout=deadline.share(cap=30),
+                provenance=provenance, critic_plan=compact_text(structured) if structured else None,
+            )
 
-    return {"plan": plan, "validation": validation}
+    return {
+        "plan": result["plan"],
+        "validation": validation,
+        "degradation": degradation,
+        "thread_id": thread_id,
+        "repeat_calls": result["repeat_calls"],
+        "tool_outputs": result["tool_outputs"],
+        "provenance": provenance.link(result["plan"]),
+        "structured_plan": result["structured_plan"],
+        "plan_issues": issues,
+    }
@@ -0,0 +1,181 @@
+"""
+Admission Control — bounded concurrency and backpressure for plan requests
+--------------------------------------------------------------------------
+Every planner run holds one of `max_concurrent` slots. When all slots are
+busy, requests wait in a priority queue (lower number = served first) for
+at most `max_wait_seconds`. When the queue itself is full, or the wait runs
+out, the request is rejected immediately with `AdmissionRejected`, which
+carries a retry-after estimate ("busy, retry in N s").
+
+Used by travel_agent.py, so the Streamlit app and programmatic callers
+share one controller per process (config.yaml → admission).
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.config_loader import load_config
+
+
+PRIORITY_INTERACTIVE = 0    # a user is waiting on the page
+PRIORITY_NORMAL = 1         # programmatic callers
+PRIORITY_BATCH = 2          # background work (benchmarks)
+
+_DEFAULTS = {"max_concurrent": 4, "max_queue": 16, "max_wait_seconds": 20}
+_WINDOW = 200               # recent requests kept for wait / service-time metrics
+
+
+class AdmissionRejected(Exception):
+    """The planner is saturated; retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Planner busy ({reason}), retry in {math.ceil(retry_after)} s")
+
+
+class _Waiter:
+    __slots__ = ("granted", "cancelled")
+
+    def __init__(self):
+        self.granted = threading.Event()
+        self.cancelled = False
+
+
+class AdmissionController:
+    """Bounded slot pool with a priority wait queue and fast rejection."""
+
+    def __init__(
+        self,
+        max_concurrent: int = _DEFAULTS["max_concurrent"],
+        max_queue: int = _DEFAULTS["max_queue"],
+        max_wait_seconds: float = _DEFAULTS["max_wait_seconds"],
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._queued = 0
+        self._seq = itertools.count()
+
+        self._waits: deque[float] = deque(maxlen=_WINDOW)
+        self._service: deque[float] = deque(maxlen=_WINDOW)
+        self._counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    # ---- admission ----
+
+    def _retry_after(self) -> float:
+        """Rough time until a slot frees up for a newcomer at the back of the queue."""
+        service = sum(self._service) / len(self._service) if self._service else 30.0
+        return max(1.0, service * (self._queued + 1) / self.max_concurrent)
+
+    def acquire(self, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None) -> float:
+        """
+        Take a slot, waiting at most `timeout` (default max_wait_seconds).
+        Returns the time spent queued; raises AdmissionRejected.
+        """
+        timeout = self.max_wait_seconds if timeout is None else min(timeout, self.max_wait_seconds)
+        started = time.monotonic()
+
+        with self._lock:
+            if self._running < self.max_concurrent and not self._queued:
+                self._running += 1
+                self._counters["admitted"] += 1
+                self._waits.append(0.0)
+                return 0.0
+            if self._queued >= self.max_queue or timeout <= 0:
+                self._counters["rejected_queue_full"] += 1
+                raise AdmissionRejected("queue full", self._retry_after())
+            waiter = _Waiter()
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._queued += 1
+
+        granted = waiter.granted.wait(timeout)
+        with self._lock:
+            if not granted and not waiter.granted.is_set():
+                # Stays in the heap until popped; release() skips cancelled waiters
+                waiter.cancelled = True
+                self._queued -= 1
+                self._counters["rejected_timeout"] += 1
+                raise AdmissionRejected("queue wait timed out", self._retry_after())
+            waited = time.monotonic() - started
+            self._counters["admitted"] += 1
+            self._waits.append(waited)
+        return waited
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """Free a slot and hand it to the highest-priority waiter, if any."""
+        with self._lock:
+            if service_seconds is not None:
+                self._service.append(service_seconds)
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                # The slot passes directly to the waiter; _running is unchanged
+                self._queued -= 1
+                waiter.granted.set()
+                return
+            self._running -= 1
+
+    @contextmanager
+    def admit(self, priority: int = PRIORITY_NORMAL, timeout: Optional[float] = None):
+        """`with controller.admit(...)`: hold a slot for the duration of the block."""
+        self.acquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    # ---- metrics ----
+
+    def metrics(self) -> dict:
+        """Current load plus recent wait-time and service-time figures (seconds)."""
+        with self._lock:
+            waits = sorted(self._waits)
+            service = list(self._service)
+            result = {
+                "running": self._running,
+                "queued": self._queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                **self._counters,
+            }
+
+        def percentile(values: list[float], q: float) -> float:
+            return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+        result["wait_p50"] = percentile(waits, 0.50)
+        result["wait_p95"] = percentile(waits, 0.95)
+        result["wait_max"] = waits[-1] if waits else 0.0
+        result["service_avg"] = sum(service) / len(service) if service else 0.0
+        return result
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide controller configured by config.yaml → admission."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            try:
+                settings = {**_DEFAULTS, **(load_config().get("admission") or {})}
+            except Exception:
+                settings = dict(_DEFAULTS)
+            _controller = AdmissionController(**settings)
+        return _controller
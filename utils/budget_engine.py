@@ -0,0 +1,122 @@
+"""
+Budget Engine — whole-trip cost breakdown in one pass
+-----------------------------------------------------
+Takes structured line items (category, unit cost, quantity, currency,
+per-day or per-trip) and computes, for several target currencies at once:
+  - trip total and per-day average
+  - per-category totals
+  - per-item totals
+
+All conversions go through one rate matrix built from a single cached
+rate table (CurrencyConverter.get_rates), so a budget in N currencies
+needs at most one exchange-rate request instead of one tool call per
+conversion.
+"""
+
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from utils.currency_converter import CurrencyConverter
+from utils.gazetteer import canonical_currency
+
+
+# Rates are fetched relative to one pivot currency; any pair is a ratio of two rows
+PIVOT_CURRENCY = "USD"
+
+
+class LineItem(BaseModel):
+    category: str = Field(description="e.g. hotel, food, transport, activities, visa")
+    description: str = Field(default="", description="Short label, e.g. 'Hotel Le Marais'")
+    unit_cost: float = Field(ge=0, description="Cost of one unit in `currency`")
+    quantity: float = Field(default=1, ge=0, description="Units per day (per_day) or per trip")
+    currency: str = Field(default="USD", description="ISO 4217 code of unit_cost")
+    per_day: bool = Field(default=False, description="True if the cost repeats every day of the trip")
+
+
+def _currency(text: str) -> str:
+    return canonical_currency(text) or text.strip().upper()
+
+
+class BudgetEngine:
+    """Vectorized multi-currency budget computation."""
+
+    def __init__(self, converter: CurrencyConverter | None = None):
+        self.converter = converter
+
+    def rate_vector(self, currencies: list[str]) -> np.ndarray:
+        """Units of each currency per 1 PIVOT_CURRENCY."""
+        if all(c == PIVOT_CURRENCY for c in currencies):
+            return np.ones(len(currencies))
+        if self.converter is None:
+            raise ValueError("Exchange rates unavailable: no currency converter configured.")
+
+        rates = self.converter.get_rates(PIVOT_CURRENCY)
+        missing = [c for c in currencies if c not in rates]
+        if missing:
+            raise ValueError(f"{', '.join(missing)} not found in exchange rates.")
+        return np.array([rates[c] for c in currencies], dtype=float)
+
+    def rate_matrix(self, from_currencies: list[str], to_currencies: list[str]) -> np.ndarray:
+        """matrix[i, j] = units of to_currencies[j] per 1 unit of from_currencies[i]."""
+        currencies = list(dict.fromkeys(from_currencies + to_currencies))
+        rates = self.rate_vector(currencies)
+        index = {c: i for i, c in enumerate(currencies)}
+        source = rates[[index[c] for c in from_currencies]]
+        target = rates[[index[c] for c in to_currencies]]
+        return target[np.newaxis, :] / source[:, np.newaxis]
+
+    def compute(
+        self,
+        items: list[LineItem],
+        days: int,
+        target_currencies: list[str],
+    ) -> dict:
+        """Totals, per-day and per-category breakdowns in every target currency."""
+        if days < 1:
+            raise ValueError("days must be at least 1")
+        if not items:
+            raise ValueError("at least one line item is required")
+
+        targets = list(dict.fromkeys(_currency(c) for c in target_currencies)) or [_currency(items[0].currency)]
+        item_currencies = [_currency(item.currency) for item in items]
+        currencies = list(dict.fromkeys(item_currencies))
+        categories = list(dict.fromkeys(item.category.strip().lower() for item in items))
+
+        unit_cost = np.array([item.unit_cost for item in items], dtype=float)
+        quantity = np.array([item.quantity for item in items], dtype=float)
+        repeat = np.where([item.per_day for item in items], days, 1)
+        currency_idx = np.array([currencies.index(c) for c in item_currencies])
+        category_idx = np.array([categories.index(item.category.strip().lower()) for item in items])
+
+        # (items,) in their own currency → (items, targets)
+        local_total = unit_cost * quantity * repeat
+        converted = local_total[:, np.newaxis] * self.rate_matrix(currencies, targets)[currency_idx]
+
+        by_category = np.zeros((len(categories), len(targets)))
+        np.add.at(by_category, category_idx, converted)
+        total = converted.sum(axis=0)
+
+        def per_target(row: np.ndarray) -> dict:
+            return {c: round(float(v), 2) for c, v in zip(targets, row)}
+
+        return {
+            "days": days,
+            "currencies": targets,
+            "total": per_target(total),
+            "per_day": per_target(total / days),
+            "by_category": {cat: per_target(by_category[i]) for i, cat in enumerate(categories)},
+            "items": [
+                {
+                    "category": item.category,
+                    "description": item.description,
+                    "local_total": round(float(local_total[i]), 2),
+                    "currency": item_currencies[i],
+                    "total": per_target(converted[i]),
+                }
+                for i, item in enumerate(items)
+            ],
+        }
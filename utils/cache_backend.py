@@ -0,0 +1,541 @@
+"""
+Cache Backend — shared tool-result cache
+----------------------------------------
+One interface, three storage options (config.yaml → cache.backend):
+  - memory: in-process LRU (single worker)
+  - sqlite: SQLite in WAL mode, shared by all workers on one host
+  - redis:  any Redis-protocol server (Redis, Valkey, or the local stand-in
+            in benchmarks/redis_standin.py), shared across nodes
+
+Every backend supports namespaces ("weather", "places", "fx", "critic"),
+a per-entry TTL and a bounded size (LRU / oldest-first eviction; Redis
+relies on its maxmemory policy). Values must be JSON-serializable.
+
+`get_or_compute` adds stampede protection: concurrent misses for the same
+key, across threads and across processes, run the expensive call once
+while the others wait for its result. Its cross-process lock (public as
+`try_lock` / `unlock`) holds a unique token and is released with a
+compare-and-delete, so a caller that gave up waiting never deletes the
+lock of the worker still computing.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+from utils.config_loader import load_config
+
+
+_DEFAULTS = {
+    "backend": "memory",
+    "max_entries": 5000,
+    "default_ttl": 3600,
+    "sqlite_path": "./output/cache.sqlite3",
+    "redis_url": "redis://localhost:6379/0",
+    "ttl": {},
+}
+
+_LOCK_SUFFIX = "#computing"
+
+# Redis compare-and-delete: DEL only while the key still holds our token
+_DELETE_IF_EQUAL = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+
+
+class CacheBackend(ABC):
+    """Namespaced key/value cache with TTL and stampede-protected computation."""
+
+    def __init__(self, default_ttl: float = _DEFAULTS["default_ttl"], ttl: Optional[dict] = None):
+        self.default_ttl = float(default_ttl)
+        self.namespace_ttl = {k: float(v) for k, v in (ttl or {}).items()}
+        self._local_locks: dict[str, list] = {}     # key → [lock, users]
+        self._local_locks_guard = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    # ---- storage primitives (raw JSON strings) ----
+
+    @abstractmethod
+    def _get(self, namespace: str, key: str) -> Optional[str]:
+        """Stored value, or None if missing or expired."""
+
+    @abstractmethod
+    def _set(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def _add(self, namespace: str, key: str, value: str, ttl: float) -> bool:
+        """Atomically store only if absent (or expired); True if stored."""
+
+    @abstractmethod
+    def _delete_if(self, namespace: str, key: str, value: str) -> bool:
+        """Atomically delete only if the stored value is `value`; True if deleted."""
+
+    @abstractmethod
+    def _ttl_remaining(self, namespace: str, key: str) -> Optional[float]:
+        """Seconds until the entry expires, or None if missing or expired."""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, namespace: Optional[str] = None) -> None:
+        ...
+
+    # ---- public API ----
+
+    def ttl_for(self, namespace: str) -> float:
+        return self.namespace_ttl.get(namespace, self.default_ttl)
+
+    def get(self, namespace: str, key: str) -> Any:
+        raw = self._get(namespace, key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._set(namespace, key, json.dumps(value), self.ttl_for(namespace) if ttl is None else ttl)
+
+    def ttl_remaining(self, namespace: str, key: str) -> Optional[float]:
+        """Seconds left before the entry expires (None when absent); used by the prewarmer."""
+        return self._ttl_remaining(namespace, key)
+
+    def try_lock(self, namespace: str, key: str, ttl: float) -> Optional[str]:
+        """Take a lock entry shared by all workers for `ttl` seconds: its token, or None if held."""
+        token = uuid.uuid4().hex
+        return token if self._add(namespace, key, token, ttl) else None
+
+    def unlock(self, namespace: str, key: str, token: str) -> bool:
+        """Release a try_lock() entry only while it still holds `token`; True if released."""
+        return self._delete_if(namespace, key, token)
+
+    def refresh(self, namespace: str, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Recompute and store a value ahead of its expiry. Readers keep getting
+        the current value meanwhile; a None result leaves it untouched.
+        """
+        with self._local_lock(namespace, key):
+            self._count(namespace, "refreshes")
+            value = compute()
+            if value is not None:
+                self.set(namespace, key, value, ttl)
+            return value
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None,
+        lock_ttl: float = 30,
+    ) -> Any:
+        """
+        Cached value, or compute() it once across all waiting callers.
+        A None result is returned but not cached (used for failed fetches).
+        """
+        value = self.get(namespace, key)
+        if value is not None:
+            self._count(namespace, "hits")
+            return value
+
+        with self._local_lock(namespace, key):
+            # Another thread in this process may have filled it meanwhile
+            value = self.get(namespace, key)
+            if value is not None:
+                self._count(namespace, "hits")
+                return value
+
+            # Cross-process single flight: wait while another worker computes
+            lock_key = key + _LOCK_SUFFIX
+            give_up = time.monotonic() + lock_ttl
+            token = self.try_lock(namespace, lock_key, lock_ttl)
+            while token is None:
+                time.sleep(0.05)
+                value = self.get(namespace, key)
+                if value is not None:
+                    self._count(namespace, "waited_hits")
+                    return value
+                if time.monotonic() > give_up:
+                    # Holder died or is too slow; compute ourselves, leaving its lock alone
+                    self._count(namespace, "lock_timeouts")
+                    break
+                token = self.try_lock(namespace, lock_key, lock_ttl)
+
+            try:
+                self._count(namespace, "misses")
+                value = compute()
+                if value is not None:
+                    self.set(namespace, key, value, ttl)
+                return value
+            finally:
+                if token is not None:
+                    self.unlock(namespace, lock_key, token)
+
+    def stats(self) -> dict:
+        """Per-namespace hits / misses / waited_hits / lock_timeouts / refreshes and hit rate."""
+        with self._stats_lock:
+            result = {ns: dict(counts) for ns, counts in self._stats.items()}
+        for counts in result.values():
+            lookups = counts.get("hits", 0) + counts.get("waited_hits", 0) + counts.get("misses", 0)
+            counts["hit_rate"] = (lookups - counts.get("misses", 0)) / (lookups or 1)
+        return result
+
+    # ---- helpers ----
+
+    def _count(self, namespace: str, field: str) -> None:
+        with self._stats_lock:
+            counts = self._stats.setdefault(namespace, {})
+            counts[field] = counts.get(field, 0) + 1
+
+    @contextmanager
+    def _local_lock(self, namespace: str, key: str):
+        """Per-key lock shared by the threads of this process (removed when unused)."""
+        name = f"{namespace}:{key}"
+        with self._local_locks_guard:
+            entry = self._local_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._local_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._local_locks[name]
+
+
+# -----------------------------
+# In-process LRU
+# -----------------------------
+class MemoryCache(CacheBackend):
+    def __init__(self, max_entries: int = _DEFAULTS["max_entries"], **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._data: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, namespace, key):
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._data[(namespace, key)]
+                return None
+            self._data.move_to_end((namespace, key))
+            return entry[1]
+
+    def _set(self, namespace, key, value, ttl):
+        with self._lock:
+            self._data[(namespace, key)] = (time.time() + ttl, value)
+            self._data.move_to_end((namespace, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _add(self, namespace, key, value, ttl):
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is not None and entry[0] >= time.time():
+                return False
+            self._data[(namespace, key)] = (time.time() + ttl, value)
+            return True
+
+    def _delete_if(self, namespace, key, value):
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None or entry[0] < time.time() or entry[1] != value:
+                return False
+            del self._data[(namespace, key)]
+            return True
+
+    def _ttl_remaining(self, namespace, key):
+        with self._lock:
+            entry = self._data.get((namespace, key))
+        remaining = entry[0] - time.time() if entry else 0.0
+        return remaining if remaining > 0 else None
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._data.pop((namespace, key), None)
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+            else:
+                for k in [k for k in self._data if k[0] == namespace]:
+                    del self._data[k]
+
+
+# -----------------------------
+# SQLite (WAL) — one host, many workers
+# -----------------------------
+class SQLiteCache(CacheBackend):
+    _EVICT_EVERY = 100
+
+    def __init__(
+        self,
+        path: str = _DEFAULTS["sqlite_path"],
+        max_entries: int = _DEFAULTS["max_entries"],
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; WAL lets them read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, namespace, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at >= ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, namespace, key, value, ttl):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, value, now + ttl, now),
+        )
+        self._maybe_evict()
+
+    def _add(self, namespace, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at < ?",
+                (namespace, key, now),
+            )
+            added = conn.execute(
+                "INSERT OR IGNORE INTO cache (namespace, key, value, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, now + ttl, now),
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def _delete_if(self, namespace, key, value):
+        return self._conn().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ? AND value = ? AND expires_at >= ?",
+            (namespace, key, value, time.time()),
+        ).rowcount == 1
+
+    def _ttl_remaining(self, namespace, key):
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at >= ?",
+            (namespace, key, now),
+        ).fetchone()
+        return row[0] - now if row else None
+
+    def delete(self, namespace, key):
+        self._conn().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace=None):
+        if namespace is None:
+            self._conn().execute("DELETE FROM cache")
+        else:
+            self._conn().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def _maybe_evict(self) -> None:
+        with self._writes_lock:
+            self._writes += 1
+            if self._writes % self._EVICT_EVERY:
+                return
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE rowid IN ("
+            " SELECT rowid FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+# -----------------------------
+# Redis protocol — many nodes
+# -----------------------------
+class RedisCache(CacheBackend):
+    """
+    Minimal RESP2 client (GET / SET PX NX / PTTL / DEL / SCAN / EVAL), so no extra package
+    is needed. Size is bounded by the server's maxmemory / eviction policy.
+    """
+
+    def __init__(
+        self,
+        url: str = _DEFAULTS["redis_url"],
+        prefix: str = "tme",
+        timeout: float = 5,
+        **kwargs,
+    ):
+        kwargs.pop("max_entries", None)
+        super().__init__(**kwargs)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _name(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", str(self.db))
+        return conn
+
+    def _command(self, *args: str):
+        sock, reader = self._connection()
+        payload = f"*{len(args)}\r\n".encode()
+        for arg in args:
+            data = arg.encode("utf-8")
+            payload += b"$%d\r\n%s\r\n" % (len(data), data)
+        try:
+            sock.sendall(payload)
+            return self._read(reader)
+        except (OSError, ConnectionError):
+            # Drop the broken connection; the next command reconnects
+            self._local.conn = None
+            raise
+
+    def _read(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {body.decode()}")
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = reader.read(size + 2)[:-2]
+            return data.decode("utf-8")
+        if kind == b"*":
+            size = int(body)
+            return None if size < 0 else [self._read(reader) for _ in range(size)]
+        raise ConnectionError(f"Unexpected Redis reply: {line!r}")
+
+    @staticmethod
+    def _ms(ttl: float) -> str:
+        return str(max(int(ttl * 1000), 1))
+
+    def _get(self, namespace, key):
+        return self._command("GET", self._name(namespace, key))
+
+    def _set(self, namespace, key, value, ttl):
+        self._command("SET", self._name(namespace, key), value, "PX", self._ms(ttl))
+
+    def _add(self, namespace, key, value, ttl):
+        return self._command("SET", self._name(namespace, key), value, "PX", self._ms(ttl), "NX") == "OK"
+
+    def _delete_if(self, namespace, key, value):
+        return self._command("EVAL", _DELETE_IF_EQUAL, "1", self._name(namespace, key), value) == 1
+
+    def _ttl_remaining(self, namespace, key):
+        ms = self._command("PTTL", self._name(namespace, key))
+        return ms / 1000 if ms is not None and ms >= 0 else None   # -2 missing, -1 no expiry
+
+    def delete(self, namespace, key):
+        self._command("DEL", self._name(namespace, key))
+
+    def clear(self, namespace=None):
+        pattern = f"{self.prefix}:{namespace}:*" if namespace else f"{self.prefix}:*"
+        cursor = "0"
+        while True:
+            cursor, keys = self._command("SCAN", cursor, "MATCH", pattern, "COUNT", "500")
+            if keys:
+                self._command("DEL", *keys)
+            if cursor == "0":
+                break
+
+
+_BACKENDS = {"memory": MemoryCache, "sqlite": SQLiteCache, "redis": RedisCache}
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def create_cache(settings: dict) -> CacheBackend:
+    """Backend from a config.yaml → cache section."""
+    settings = {**_DEFAULTS, **settings}
+    common = {"default_ttl": settings["default_ttl"], "ttl": settings["ttl"]}
+    backend = settings["backend"]
+    if backend == "memory":
+        return MemoryCache(max_entries=settings["max_entries"], **common)
+    if backend == "sqlite":
+        return SQLiteCache(path=settings["sqlite_path"], max_entries=settings["max_entries"], **common)
+    if backend == "redis":
+        return RedisCache(url=settings["redis_url"], **common)
+    raise ValueError(f"Unknown cache backend {backend!r}; expected one of {', '.join(_BACKENDS)}")
+
+
+def get_cache() -> CacheBackend:
+    """Process-wide cache configured by config.yaml → cache (env CACHE_BACKEND overrides)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                settings = dict(load_config().get("cache") or {})
+            except Exception:
+                settings = {}
+            if os.environ.get("CACHE_BACKEND"):
+                settings["backend"] = os.environ["CACHE_BACKEND"]
+            _cache = create_cache(settings)
+        return _cache
@@ -26,17 +26,16 @@ class Calculator:
         """
         return sum(x)
 
+    @staticmethod
+    def calculate_daily_budget(total: float, days: int) -> float:
+        """
+        Calculate daily budget
 
-@staticmethod
-def calculate_daily_budget(total: float, days: int) -> float:
-    """
-    Calculate daily budget
-
-    Args:
-        total (float): Total cost.
-        days (int): Total number of days
+        Args:
+            total (float): Total cost.
+            days (int): Total number of days
 
-    Returns:
-        float: Expense for a single day
-    """
-    return total / days if days > 0 else 0
+        Returns:
+            float: Expense for a single day
+        """
+        return total / days if days > 0 else 0
@@ -0,0 +1,347 @@
+"""
+Cassettes — record / replay of LLM and HTTP traffic
+---------------------------------------------------
+Record mode captures every HTTP exchange made through `requests` (weather,
+exchange rates, Google Places, Tavily) and `httpx` (OpenAI / Groq SDKs,
+including streamed responses) into one gzip-compressed JSON-lines cassette.
+Replay mode serves those responses back deterministically, so planner runs
+can be compared offline as performance regression tests.
+
+Requests are matched on method + URL + body with secrets removed (API keys
+in query strings, paths and JSON bodies are redacted; headers are not stored).
+Identical requests replay their recordings in order; once exhausted, the
+last one repeats. An unmatched request fails like a connection error.
+
+Replay latency: "none" (instant), "recorded" (original timing, streamed
+bodies spread chunk by chunk) or a fixed number of seconds per exchange.
+
+Enable with environment variables (read by travel_agent.py):
+    CASSETTE_MODE=record|replay  CASSETTE_PATH=...  CASSETTE_LATENCY=none|recorded|0.5
+or in code:
+    with use_cassette("runs/paris.cassette.gz", mode="replay"):
+        get_travel_plan("3 days in Paris")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+_SECRET_PARAMS = {"appid", "key", "api_key", "apikey", "access_token", "token"}
+_SECRET_PATH = re.compile(r"(/v6/)[^/]+(/)")          # exchangerate-api: /v6/<key>/latest/...
+_KEPT_RESPONSE_HEADERS = {"content-type"}          # request headers (auth) are never stored
+_REDACTED = "REDACTED"
+
+
+class CassetteMiss(Exception):
+    """No recorded response matches a request made in replay mode."""
+
+
+# -----------------------------
+# Request normalization
+# -----------------------------
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = urlencode(sorted(
+        (k, _REDACTED if k.lower() in _SECRET_PARAMS else v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+    ))
+    path = _SECRET_PATH.sub(rf"\g<1>{_REDACTED}\g<2>", parts.path)
+    return urlunsplit((parts.scheme, parts.netloc, path, query, ""))
+
+
+def _redact_json(value):
+    if isinstance(value, dict):
+        return {k: _REDACTED if k.lower() in _SECRET_PARAMS else _redact_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_json(v) for v in value]
+    return value
+
+
+def _body_digest(body: Optional[bytes]) -> str:
+    if not body:
+        return ""
+    try:
+        canonical = json.dumps(_redact_json(json.loads(body)), sort_keys=True).encode()
+    except (ValueError, UnicodeDecodeError):
+        canonical = body
+    return hashlib.sha256(canonical).hexdigest()[:32]
+
+
+def request_key(method: str, url: str, body: Optional[bytes]) -> str:
+    return f"{method.upper()} {_redact_url(url)} {_body_digest(body)}"
+
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"b64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(entry: dict) -> bytes:
+    if "b64" in entry:
+        return base64.b64decode(entry["b64"])
+    return entry.get("text", "").encode("utf-8")
+
+
+# -----------------------------
+# Cassette
+# -----------------------------
+class Cassette:
+    """Records or replays HTTP exchanges while installed (use as a context manager)."""
+
+    def __init__(self, path: str, mode: str = "replay", latency: Union[str, float] = "none"):
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+        self._lock = threading.Lock()
+        self._entries: list[dict] = []
+        self._by_key: dict[str, list[dict]] = defaultdict(list)
+        self._cursor: dict[str, int] = defaultdict(int)
+        self._patches: list[tuple[object, str, object]] = []
+
+        if mode == "replay":
+            self._load()
+
+    # ---- storage ----
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "key" in entry:
+                    self._entries.append(entry)
+                    self._by_key[entry["key"]].append(entry)
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            entries = list(self._entries)
+        with gzip.open(self.path, "wt", encoding="utf-8", compresslevel=9) as f:
+            f.write(json.dumps({"version": 1, "created": time.time(), "exchanges": len(entries)}) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    # ---- record / replay ----
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int,
+               headers: dict, content: bytes, elapsed: float, streamed: bool) -> None:
+        entry = {
+            "key": request_key(method, url, body),
+            "url": _redact_url(url),
+            "status": status,
+            "headers": {k.lower(): v for k, v in headers.items() if k.lower() in _KEPT_RESPONSE_HEADERS},
+            "elapsed": round(elapsed, 4),
+            "streamed": streamed,
+            **_encode_body(content),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.stats["recorded"] += 1
+
+    def lookup(self, method: str, url: str, body: Optional[bytes]) -> dict:
+        key = request_key(method, url, body)
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded response for {key}")
+            index = min(self._cursor[key], len(recorded) - 1)
+            self._cursor[key] += 1
+            self.stats["replayed"] += 1
+        return recorded[index]
+
+    def delay_for(self, entry: dict) -> float:
+        if self.latency == "none":
+            return 0.0
+        if self.latency == "recorded":
+            return float(entry.get("elapsed", 0.0))
+        return float(self.latency)
+
+    # ---- installation ----
+
+    def _patch(self, owner, name: str, replacement) -> None:
+        self._patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def install(self) -> "Cassette":
+        _install_requests(self)
+        _install_httpx(self)
+        return self
+
+    def uninstall(self) -> None:
+        while self._patches:
+            owner, name, original = self._patches.pop()
+            setattr(owner, name, original)
+        if self.mode == "record":
+            self.save()
+
+    def __enter__(self) -> "Cassette":
+        return self.install()
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+
+
+def _chunks(content: bytes) -> list[bytes]:
+    """Server-sent-event boundaries for streamed bodies, so replay streams chunk by chunk."""
+    parts = [p + b"\n\n" for p in content.split(b"\n\n") if p]
+    return parts or [content]
+
+
+# -----------------------------
+# requests (weather, FX, Google Places, Tavily)
+# -----------------------------
+def _install_requests(cassette: Cassette) -> None:
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    original_send = requests.Session.send
+
+    def send(session, request, **kwargs):
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        if cassette.mode == "record":
+            started = time.perf_counter()
+            response = original_send(session, request, **kwargs)
+            content = response.content
+            cassette.record(request.method, request.url, body, response.status_code,
+                            dict(response.headers), content, time.perf_counter() - started, False)
+            return response
+
+        try:
+            entry = cassette.lookup(request.method, request.url, body)
+        except CassetteMiss as exc:
+            raise requests.ConnectionError(str(exc), request=request) from exc
+        time.sleep(cassette.delay_for(entry))
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response._content = _decode_body(entry)
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    cassette._patch(requests.Session, "send", send)
+
+
+# -----------------------------
+# httpx (OpenAI / Groq SDKs)
+# -----------------------------
+def _install_httpx(cassette: Cassette) -> None:
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    class _ReplayStream(httpx.SyncByteStream):
+        def __init__(self, chunks: list[bytes], delay: float):
+            self.chunks, self.delay = chunks, delay
+
+        def __iter__(self):
+            for chunk in self.chunks:
+                time.sleep(self.delay)
+                yield chunk
+
+    class _AsyncReplayStream(httpx.AsyncByteStream):
+        def __init__(self, chunks: list[bytes], delay: float):
+            self.chunks, self.delay = chunks, delay
+
+        async def __aiter__(self):
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield chunk
+
+    def _is_stream(response: httpx.Response) -> bool:
+        return response.headers.get("content-type", "").startswith("text/event-stream")
+
+    def _replay(request: httpx.Request, stream_cls):
+        try:
+            entry = cassette.lookup(request.method, str(request.url), request.content)
+        except CassetteMiss as exc:
+            raise httpx.ConnectError(str(exc), request=request) from exc
+        content = _decode_body(entry)
+        chunks = _chunks(content) if entry.get("streamed") else [content]
+        delay = cassette.delay_for(entry) / len(chunks)
+        return httpx.Response(
+            entry["status"], headers=entry.get("headers", {}),
+            stream=stream_cls(chunks, delay), request=request,
+        )
+
+    original_send = httpx.Client.send
+    original_async_send = httpx.AsyncClient.send
+
+    def send(client, request, **kwargs):
+        if cassette.mode == "replay":
+            response = _replay(request, _ReplayStream)
+            if not kwargs.get("stream"):
+                response.read()     # as httpx.Client.send does for non-streaming calls
+            return response
+        started = time.perf_counter()
+        response = original_send(client, request, **kwargs)
+        content = response.read()
+        cassette.record(request.method, str(request.url), request.content, response.status_code,
+                        dict(response.headers), content, time.perf_counter() - started, _is_stream(response))
+        return response
+
+    async def async_send(client, request, **kwargs):
+        if cassette.mode == "replay":
+            response = _replay(request, _AsyncReplayStream)
+            if not kwargs.get("stream"):
+                await response.aread()
+            return response
+        started = time.perf_counter()
+        response = await original_async_send(client, request, **kwargs)
+        content = await response.aread()
+        cassette.record(request.method, str(request.url), request.content, response.status_code,
+                        dict(response.headers), content, time.perf_counter() - started, _is_stream(response))
+        return response
+
+    cassette._patch(httpx.Client, "send", send)
+    cassette._patch(httpx.AsyncClient, "send", async_send)
+
+
+def use_cassette(path: str, mode: str = "replay", latency: Union[str, float] = "none") -> Cassette:
+    """Context manager: record or replay all HTTP traffic inside the block."""
+    return Cassette(path, mode=mode, latency=latency)
+
+
+_active: Optional[Cassette] = None
+
+
+def install_from_env() -> Optional[Cassette]:
+    """Install a process-wide cassette from CASSETTE_MODE / CASSETTE_PATH / CASSETTE_LATENCY."""
+    global _active
+    mode = os.environ.get("CASSETTE_MODE", "").lower()
+    if _active is not None or mode not in ("record", "replay"):
+        return _active
+
+    latency = os.environ.get("CASSETTE_LATENCY", "none")
+    if latency not in ("none", "recorded"):
+        latency = float(latency)
+    path = os.environ.get("CASSETTE_PATH", "./output/cassettes/session.cassette.gz")
+
+    _active = Cassette(path, mode=mode, latency=latency).install()
+    if mode == "record":
+        atexit.register(_active.save)
+    print(f"📼 Cassette {mode}: {path}")
+    return _active
@@ -0,0 +1,202 @@
+"""
+Checkpoint Store — persistent LangGraph threads with bounded storage
+--------------------------------------------------------------------
+One SQLite-backed LangGraph checkpointer per process, so a conversation
+(thread_id) can continue with follow-ups like "make it 3 days instead"
+without re-running every tool.
+
+Storage stays bounded:
+  - after each turn only the newest checkpoint(s) of the thread are kept
+    (the conversation itself is compacted by Agent/history.py)
+  - threads idle longer than `max_age_hours`, or beyond the newest
+    `max_threads`, are garbage-collected
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from utils.config_loader import load_config
+
+
+_DEFAULTS = {
+    "path": "./output/checkpoints.sqlite3",
+    "keep_per_thread": 1,
+    "max_threads": 1000,
+    "max_age_hours": 72,
+    "gc_every_turns": 50,
+}
+
+
+class CheckpointStore:
+    """SqliteSaver plus thread bookkeeping, pruning and garbage collection."""
+
+    def __init__(
+        self,
+        path: str = _DEFAULTS["path"],
+        keep_per_thread: int = _DEFAULTS["keep_per_thread"],
+        max_threads: int = _DEFAULTS["max_threads"],
+        max_age_hours: float = _DEFAULTS["max_age_hours"],
+        gc_every_turns: int = _DEFAULTS["gc_every_turns"],
+    ):
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.keep_per_thread = keep_per_thread
+        self.max_threads = max_threads
+        self.max_age_hours = max_age_hours
+        self.gc_every_turns = gc_every_turns
+
+        self.saver = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+        self.saver.setup()
+        # Separate connection for bookkeeping so it never interleaves with
+        # the saver's own transactions (WAL allows both)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._turns_since_gc = 0
+
+        with self._lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS thread_meta ("
+                " thread_id TEXT PRIMARY KEY,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " turns INTEGER NOT NULL DEFAULT 0)"
+            )
+            self.conn.commit()
+
+    def start_turn(self, thread_id: str) -> bool:
+        """Mark a thread as in use; returns True if it already has completed turns."""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT turns FROM thread_meta WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT INTO thread_meta (thread_id, created_at, last_used, turns) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_used = excluded.last_used",
+                (thread_id, now, now),
+            )
+            self.conn.commit()
+        return bool(row and row[0])
+
+    def finish_turn(self, thread_id: str) -> None:
+        """Record a completed turn, prune old checkpoints and occasionally GC threads."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE thread_meta SET last_used = ?, turns = turns + 1 WHERE thread_id = ?",
+                (time.time(), thread_id),
+            )
+            self.conn.commit()
+            self._turns_since_gc += 1
+            run_gc = self._turns_since_gc >= self.gc_every_turns
+            if run_gc:
+                self._turns_since_gc = 0
+
+        self.prune_thread(thread_id)
+        if run_gc:
+            self.gc_threads()
+
+    def prune_thread(self, thread_id: str) -> int:
+        """Keep only the newest `keep_per_thread` checkpoints of a thread."""
+        with self._lock:
+            stale = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                    "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                    (thread_id, self.keep_per_thread),
+                )
+            ]
+            for checkpoint_id in stale:
+                self.conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_id),
+                )
+                self.conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_id),
+                )
+            self.conn.commit()
+        return len(stale)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.saver.delete_thread(thread_id)
+        with self._lock:
+            self.conn.execute("DELETE FROM thread_meta WHERE thread_id = ?", (thread_id,))
+            self.conn.commit()
+
+    def gc_threads(self) -> int:
+        """Delete threads idle past max_age_hours and all but the newest max_threads."""
+        cutoff = time.time() - self.max_age_hours * 3600
+        with self._lock:
+            expired = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT thread_id FROM thread_meta WHERE last_used < ?", (cutoff,)
+                )
+            ] + [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT thread_id FROM thread_meta ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+                    (self.max_threads,),
+                )
+            ]
+            # Checkpoints without bookkeeping (e.g. written by an older version)
+            expired += [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT DISTINCT thread_id FROM checkpoints "
+                    "WHERE thread_id NOT IN (SELECT thread_id FROM thread_meta)"
+                )
+            ]
+
+        expired = list(dict.fromkeys(expired))
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        if expired:
+            print(f"🧹 Garbage-collected {len(expired)} conversation thread(s)")
+        return len(expired)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            pages, page_size = (
+                self.conn.execute("PRAGMA page_count").fetchone()[0],
+                self.conn.execute("PRAGMA page_size").fetchone()[0],
+            )
+        return pages * page_size
+
+
+_store: Optional[CheckpointStore] = None
+_store_unavailable = False
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """
+    Process-wide store configured by config.yaml → checkpoints; None when
+    langgraph-checkpoint-sqlite is not installed (runs are then not checkpointed).
+    """
+    global _store, _store_unavailable
+    with _store_lock:
+        if _store is None and not _store_unavailable:
+            try:
+                settings = {**_DEFAULTS, **(load_config().get("checkpoints") or {})}
+            except Exception:
+                settings = dict(_DEFAULTS)
+            try:
+                _store = CheckpointStore(**settings)
+            except ImportError as exc:
+                _store_unavailable = True
+                print(f"⚠️ Conversation threads disabled ({exc}); install langgraph-checkpoint-sqlite")
+                return None
+            _store.gc_threads()
+        return _store
@@ -1,8 +1,14 @@
 import yaml
 import os
 
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
 def load_config(config_path: str = "config/config.yaml") -> dict:
+    # Relative paths fall back to the project root so callers work from any cwd
+    if not os.path.isabs(config_path) and not os.path.exists(config_path):
+        config_path = os.path.join(_PROJECT_ROOT, config_path)
     with open(config_path, "r") as file:
         config = yaml.safe_load(file)
         # print(config)
-    return config
\ No newline at end of file
+    return config
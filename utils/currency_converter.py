@@ -1,16 +1,33 @@
+import os
+
 import requests
 
+from utils.cache_backend import get_cache
+
 class CurrencyConverter:
-    def __init__(self, api_key: str):
-        self.base_url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest/"
+    def __init__(self, api_key: str, timeout: float = 10):
+        # Overridable for local stand-ins (benchmarks/api_standins.py)
+        host = os.environ.get("EXCHANGE_RATE_BASE_URL", "https://v6.exchangerate-api.com")
+        self.base_url = f"{host}/v6/{api_key}/latest/"
+        self.timeout = timeout
+        self.cache = get_cache()
 
-    def convert(self, amount: float, from_currency: str, to_currency: str):
-        """Convert the amount from one currency to another"""
-        url = f"{self.base_url}/{from_currency}"
-        response = requests.get(url)
+    def get_rates(self, base_currency: str, refresh: bool = False) -> dict:
+        """All conversion rates from `base_currency`, shared through the "fx" cache namespace"""
+        base_currency = base_currency.upper()
+        lookup = self.cache.refresh if refresh else self.cache.get_or_compute
+        return lookup("fx", base_currency, lambda: self._fetch_rates(base_currency))
+
+    def _fetch_rates(self, base_currency: str) -> dict:
+        url = f"{self.base_url}/{base_currency}"
+        response = requests.get(url, timeout=self.timeout)
         if response.status_code != 200:
             raise Exception("API call failed:", response.json())
-        rates = response.json()["conversion_rates"]
+        return response.json()["conversion_rates"]
+
+    def convert(self, amount: float, from_currency: str, to_currency: str):
+        """Convert the amount from one currency to another"""
+        rates = self.get_rates(from_currency)
         if to_currency not in rates:
             raise ValueError(f"{to_currency} not found in exchange rates.")
-        return amount * rates[to_currency]
\ No newline at end of file
+        return amount * rates[to_currency]
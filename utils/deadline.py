@@ -0,0 +1,72 @@
+"""
+Request Deadline — one time budget for a whole planning request
+---------------------------------------------------------------
+A `Deadline` is created once per `get_travel_plan` call and passed down
+(via config["configurable"]["deadline"] inside the graph) to every LLM
+call, tool round and the critic. Each stage asks for its share of the
+remaining time instead of using its own fixed timeout.
+
+When time runs short the pipeline degrades in steps, recorded as one of
+DEGRADATION_LEVELS (least to most severe):
+  - "full"             everything ran
+  - "no_critic"        the critic was skipped
+  - "early_synthesis"  tool rounds stopped early, final plan forced
+  - "partial"          best partial plan returned (deadline hit mid-run)
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Optional
+
+
+DEGRADATION_LEVELS = ("full", "no_critic", "early_synthesis", "partial")
+
+# Seconds reserved at the end of the budget
+SYNTHESIS_RESERVE = 15.0   # below this, stop calling tools and write the plan
+CRITIC_MIN = 5.0           # below this, skip the critic
+
+
+def worst_degradation(*levels: Optional[str]) -> str:
+    """Most severe of the given degradation levels."""
+    known = [lvl for lvl in levels if lvl in DEGRADATION_LEVELS]
+    return max(known, key=DEGRADATION_LEVELS.index) if known else "full"
+
+
+class Deadline:
+    """Absolute deadline on the monotonic clock; `None` seconds means unbounded."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.budget = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return math.inf
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, fraction: float = 1.0, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Time a stage may use: `fraction` of what is left after `reserve`,
+        never more than `cap` (the stage's own default timeout).
+        """
+        available = max(self.remaining() - reserve, 0.0) * fraction
+        if cap is not None:
+            available = min(available, cap)
+        return available
+
+    def __repr__(self) -> str:
+        if self.expires_at is None:
+            return "Deadline(unbounded)"
+        return f"Deadline(remaining={self.remaining():.1f}s)"
+
+
+def deadline_from_config(config: Optional[dict]) -> Deadline:
+    """The run's Deadline from a LangGraph config, or an unbounded one."""
+    deadline = ((config or {}).get("configurable") or {}).get("deadline")
+    return deadline if isinstance(deadline, Deadline) else Deadline(None)
@@ -0,0 +1,171 @@
+"""
+Fast Critic — rule-based claim extraction and scoring
+-----------------------------------------------------
+Finds the claim types the LLM critic is asked to look for, using patterns:
+  - currency amounts stated without a range
+  - clock times (opening hours, departures)
+  - visa terms and fees
+  - fixed schedules ("every 15 minutes", "departs at")
+and credits hedging ("approximately", "around", "verify", "may vary").
+
+With the run's tool outputs (utils/provenance.py), a claim whose values
+all appear in a tool output is grounded: it costs nothing, is not listed
+as uncertain, and `verified_by_tools` names the tools that were actually
+quoted instead of guessing topics from keywords.
+
+Produces a `ValidationResult` locally in milliseconds. `response_validator`
+only escalates to the LLM critic when the score falls inside the ambiguous
+band (config.yaml → critic.ambiguous_band).
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Optional, TypedDict
+
+from utils.response_validator import ValidationResult
+
+if TYPE_CHECKING:
+    from utils.provenance import ProvenanceIndex
+
+
+class Claim(TypedDict):
+    kind: str          # "price" | "time" | "visa" | "schedule"
+    text: str          # the sentence the claim was found in
+    value: str         # the matched price / time / term
+    hedged: bool       # sentence carries an estimate / verify marker
+    grounded: bool     # every value of the claim is in a tool output
+    penalty: float
+
+
+_BASE_SCORE = 92
+
+# penalty per claim: (unhedged, hedged)
+_PENALTIES = {
+    "price": (9.0, 2.0),
+    "price_range": (2.0, 1.0),
+    "time": (6.0, 1.5),
+    "visa": (14.0, 3.0),
+    "schedule": (6.0, 1.5),
+}
+_MAX_PENALTY_PER_KIND = 45.0
+# Claim kinds whose values can be found in tool output (visa rules and schedules cannot)
+_GROUNDABLE = ("price", "price_range", "time")
+
+# Shared with utils/provenance.py, so claims and tool values are read the same way
+CURRENCY_PATTERN = r"(?:[€$£¥₹฿]|USD|EUR|GBP|JPY|INR|AUD|CAD|CHF|CNY|SGD|AED|THB|Rs\.?)"
+_NUM = r"\d[\d,]*(?:\.\d+)?"
+_RANGE_SEP = r"\s*(?:-|–|—|to)\s*"
+
+_PRICE_RANGE_RE = re.compile(
+    rf"{CURRENCY_PATTERN}\s?{_NUM}{_RANGE_SEP}{CURRENCY_PATTERN}?\s?{_NUM}|{_NUM}{_RANGE_SEP}{_NUM}\s?{CURRENCY_PATTERN}",
+    re.IGNORECASE,
+)
+_PRICE_RE = re.compile(rf"{CURRENCY_PATTERN}\s?{_NUM}|{_NUM}\s?{CURRENCY_PATTERN}\b", re.IGNORECASE)
+TIME_RE = re.compile(r"\b(?:[01]?\d|2[0-3]):[0-5]\d\s?(?:am|pm)?\b|\b(?:1[0-2]|0?[1-9])\s?(?:am|pm)\b", re.IGNORECASE)
+_VISA_RE = re.compile(r"\b(?:e-?visa|visa(?:[\s-]on[\s-]arrival|[\s-]free|\s+fee)?|entry permit|ETIAS|ESTA)\b", re.IGNORECASE)
+_SCHEDULE_RE = re.compile(
+    r"\b(?:every\s+\d+\s+(?:min(?:ute)?s?|hours?)|departs?\s+(?:at|from)|leaves?\s+at|runs?\s+(?:daily|hourly)\s+at|last\s+(?:train|bus|ferry)\s+(?:is\s+)?at)\b",
+    re.IGNORECASE,
+)
+_HEDGE_RE = re.compile(
+    r"\b(?:approx(?:imately|\.)?|around|about|roughly|estimated?|estimates?|typically|usually|"
+    r"expect|may\s+(?:vary|change)|subject\s+to|verify|check|confirm|at\s+the\s+time|starting\s+from|from\s+about)\b|~|≈",
+    re.IGNORECASE,
+)
+_DISCLAIMER_RE = re.compile(
+    r"\b(?:verify|check)\b.{0,60}\b(?:official|before\s+(?:booking|you\s+go|travel)|website)\b",
+    re.IGNORECASE,
+)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Topic → keywords that indicate live-tool data made it into the plan
+_GROUNDING = {
+    "weather": re.compile(r"°\s?[CF]|\bhumidity\b|\bforecast\b", re.IGNORECASE),
+    "attractions": re.compile(r"\battractions?\b|\bmuseum\b|\bmonument\b", re.IGNORECASE),
+    "restaurants": re.compile(r"\brestaurants?\b|\bcaf[eé]s?\b|\beateries\b", re.IGNORECASE),
+    "transportation": re.compile(r"\bmetro\b|\bsubway\b|\bbus(?:es)?\b|\btrain\b|\btaxi\b|\btram\b", re.IGNORECASE),
+    "currency": re.compile(r"\bexchange rate\b|\bconverted\b|\bconversion\b", re.IGNORECASE),
+}
+
+
+def split_sentences(plan: str) -> list[str]:
+    """Plan sentences and lines, stripped of markdown bullets and table bars."""
+    return [s.strip(" -*#|\t") for s in _SENTENCE_SPLIT_RE.split(plan) if s and s.strip(" -*#|\t")]
+
+
+def extract_claims(plan: str, provenance: Optional["ProvenanceIndex"] = None) -> list[Claim]:
+    """All volatile claims in the plan, one entry per match; grounded ones cost nothing."""
+    claims: list[Claim] = []
+    for sentence in split_sentences(plan):
+        hedged = bool(_HEDGE_RE.search(sentence))
+        found: list[tuple[str, str]] = []
+
+        found += [("price_range", m) for m in _PRICE_RANGE_RE.findall(sentence)]
+        # Amounts that are not part of a range
+        found += [("price", m) for m in _PRICE_RE.findall(_PRICE_RANGE_RE.sub(" ", sentence))]
+        found += [("time", m) for m in TIME_RE.findall(sentence)]
+        found += [("visa", m) for m in _VISA_RE.findall(sentence)]
+        found += [("schedule", m) for m in _SCHEDULE_RE.findall(sentence)]
+
+        for kind, value in found:
+            unhedged, hedged_penalty = _PENALTIES[kind]
+            grounded = bool(provenance) and kind in _GROUNDABLE and provenance.grounded(value)
+            claims.append(Claim(
+                kind="price" if kind == "price_range" else kind,
+                text=sentence[:160],
+                value=value,
+                hedged=hedged or kind == "price_range",
+                grounded=grounded,
+                penalty=0.0 if grounded else hedged_penalty if hedged else unhedged,
+            ))
+    return claims
+
+
+def score_claims(plan: str, claims: list[Claim]) -> int:
+    """0-100 confidence: base score minus capped per-kind penalties, plus disclaimer credit."""
+    per_kind: dict[str, float] = {}
+    for claim in claims:
+        per_kind[claim["kind"]] = per_kind.get(claim["kind"], 0.0) + claim["penalty"]
+
+    score = _BASE_SCORE - sum(min(p, _MAX_PENALTY_PER_KIND) for p in per_kind.values())
+    if _DISCLAIMER_RE.search(plan):
+        score += 5
+    if not plan.strip() or plan.startswith("Error:"):
+        score = 0
+    return int(max(0, min(100, round(score))))
+
+
+def fast_validate(question: str, plan: str, provenance: Optional["ProvenanceIndex"] = None) -> ValidationResult:
+    """Rule-based ValidationResult for a plan (no LLM call); `provenance` indexes the run's tool outputs."""
+    claims = extract_claims(plan, provenance)
+    score = score_claims(plan, claims)
+
+    uncertain: list[str] = []
+    for claim in sorted(claims, key=lambda c: -c["penalty"]):
+        if claim["hedged"] or claim["grounded"] or claim["text"] in uncertain:
+            continue
+        uncertain.append(claim["text"])
+        if len(uncertain) == 10:
+            break
+
+    if provenance is not None:
+        verified = provenance.link(plan)["verified_by_tools"]
+    else:
+        verified = [topic for topic, pattern in _GROUNDING.items() if pattern.search(plan)]
+    unhedged = sum(not c["hedged"] and not c["grounded"] for c in claims)
+
+    if score >= 80:
+        summary = "Mostly general advice; volatile facts are absent or marked as estimates."
+    elif score >= 50:
+        summary = f"{unhedged} specific price/time/visa claim(s) stated as fact; verify before booking."
+    else:
+        summary = f"Many precise but unverifiable claims ({unhedged}); treat details as unconfirmed."
+
+    return ValidationResult(
+        confidence_score=score,
+        trustworthy=score >= 60,
+        uncertain_claims=uncertain,
+        verified_by_tools=verified,
+        summary=f"Rule-based check: {summary}",
+    )
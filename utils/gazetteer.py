@@ -0,0 +1,284 @@
+"""
+Gazetteer — offline place-name normalization
+--------------------------------------------
+A small bundled table of travel destinations (config/gazetteer.csv) with
+their aliases, country, currency and coordinates. Maps the many ways users
+and the LLM write a place ("NYC", "New York", "new york city, USA") to one
+canonical id, so that:
+  - tool-result caches and prefetches share keys across spellings
+  - weather lookups go by coordinates instead of ambiguous `q=` names
+  - place searches get an unambiguous "City, Country" query
+
+Lookup order: exact alias (trie) → alias after dropping qualifiers
+(", USA", "city", "the") → unique trie prefix → fuzzy match (typos).
+Unknown places resolve to None and callers fall back to the raw string.
+"""
+
+from __future__ import annotations
+
+import csv
+import difflib
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Optional, TypedDict
+
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "gazetteer.csv")
+
+_MIN_PREFIX = 4
+_FUZZY_CUTOFF = 0.84
+_RESOLVE_CACHE_SIZE = 4096
+_FILLER_WORDS = {"the", "city", "of", "town", "downtown", "greater", "metro"}
+
+# Active ISO 4217 currency codes (funds, metals and test codes left out)
+ISO_4217_CODES = frozenset("""
+    AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL
+    BSD BTN BWP BYN BZD CAD CDF CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP
+    ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD GNF GTQ GYD HKD HNL HTG HUF IDR ILS INR
+    IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD KZT LAK LBP LKR LRD LSL
+    LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR
+    NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD
+    SHP SLE SLL SOS SRD SSP STN SVC SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH
+    UGX USD UYU UZS VES VND VUV WST XAF XCD XCG XOF XPF YER ZAR ZMW ZWG
+""".split())
+
+# Currency names as users and the LLM write them; a bare "dollar", "peso" or
+# "krone" means the most-travelled one. Plurals are handled by the lookup.
+CURRENCY_NAMES = {
+    "euro": "EUR", "dollar": "USD", "us dollar": "USD", "american dollar": "USD",
+    "canadian dollar": "CAD", "australian dollar": "AUD", "new zealand dollar": "NZD",
+    "singapore dollar": "SGD", "hong kong dollar": "HKD", "taiwan dollar": "TWD",
+    "pound": "GBP", "pound sterling": "GBP", "sterling": "GBP", "british pound": "GBP",
+    "egyptian pound": "EGP", "yen": "JPY", "japanese yen": "JPY",
+    "yuan": "CNY", "renminbi": "CNY", "rmb": "CNY", "won": "KRW", "korean won": "KRW",
+    "rupee": "INR", "indian rupee": "INR", "sri lankan rupee": "LKR", "rupiah": "IDR",
+    "baht": "THB", "dong": "VND", "ringgit": "MYR", "peso": "MXN", "mexican peso": "MXN",
+    "philippine peso": "PHP", "argentine peso": "ARS", "chilean peso": "CLP",
+    "colombian peso": "COP", "real": "BRL", "reais": "BRL", "sol": "PEN",
+    "franc": "CHF", "swiss franc": "CHF", "krona": "SEK", "kronor": "SEK",
+    "krone": "NOK", "kroner": "NOK", "danish krone": "DKK", "icelandic krona": "ISK",
+    "zloty": "PLN", "forint": "HUF", "koruna": "CZK", "leu": "RON", "lei": "RON",
+    "lev": "BGN", "lira": "TRY", "ruble": "RUB", "rouble": "RUB", "hryvnia": "UAH",
+    "shekel": "ILS", "riyal": "SAR", "dirham": "AED", "dinar": "JOD", "rand": "ZAR",
+    "shilling": "KES", "naira": "NGN", "cedi": "GHS",
+}
+CURRENCY_SYMBOLS = {"€": "EUR", "$": "USD", "us$": "USD", "£": "GBP", "¥": "JPY", "₹": "INR", "₩": "KRW", "฿": "THB"}
+
+
+class Place(TypedDict):
+    id: str            # e.g. "new-york-us"
+    name: str          # display name, e.g. "New York City"
+    country: str
+    country_code: str  # ISO 3166-1 alpha-2
+    currency: str      # ISO 4217
+    lat: float
+    lon: float
+
+
+def normalize_place_name(text: str) -> str:
+    """Lower-case, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^0-9a-z]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+class _TrieNode:
+    __slots__ = ("children", "place_id", "ids")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.place_id: Optional[str] = None
+        self.ids: set[str] = set()        # every place reachable below this node
+
+
+class Gazetteer:
+    """Alias trie + fuzzy matcher over a fixed list of places."""
+
+    def __init__(self, rows: list[dict]):
+        self.places: dict[str, Place] = {}
+        self._root = _TrieNode()
+        self._aliases: dict[str, str] = {}
+        self._qualifiers: dict[str, str] = {}   # normalized country name/code → country_code
+        self._resolved: dict[str, Optional[Place]] = {}   # stripped input → result, oldest first
+
+        for row in rows:
+            place = Place(
+                id=row["id"],
+                name=row["name"],
+                country=row["country"],
+                country_code=row["country_code"],
+                currency=row["currency"],
+                lat=float(row["lat"]),
+                lon=float(row["lon"]),
+            )
+            self.places[place["id"]] = place
+            self._qualifiers[normalize_place_name(place["country"])] = place["country_code"]
+            self._qualifiers[place["country_code"].lower()] = place["country_code"]
+
+            aliases = [place["name"], place["id"].rsplit("-", 1)[0].replace("-", " ")]
+            aliases += [a for a in (row.get("aliases") or "").split("|") if a.strip()]
+            for alias in aliases:
+                self._insert(normalize_place_name(alias), place["id"])
+
+        # Common ways of writing countries that are not their official names
+        for alias, code in (("usa", "US"), ("u s a", "US"), ("america", "US"), ("uk", "GB"),
+                            ("england", "GB"), ("scotland", "GB"), ("uae", "AE"), ("holland", "NL")):
+            self._qualifiers[alias] = code
+
+        self._alias_list = list(self._aliases)
+
+    @classmethod
+    def from_csv(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        with open(path, encoding="utf-8", newline="") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def _insert(self, alias: str, place_id: str) -> None:
+        if not alias or alias in self._aliases:
+            return
+        self._aliases[alias] = place_id
+        node = self._root
+        node.ids.add(place_id)
+        for ch in alias:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.ids.add(place_id)
+        node.place_id = place_id
+
+    def _find_node(self, key: str) -> Optional[_TrieNode]:
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _exact(self, key: str) -> Optional[str]:
+        node = self._find_node(key)
+        return node.place_id if node else None
+
+    def _unique_prefix(self, key: str) -> Optional[str]:
+        if len(key) < _MIN_PREFIX:
+            return None
+        node = self._find_node(key)
+        if node and len(node.ids) == 1:
+            return next(iter(node.ids))
+        return None
+
+    def _strip_qualifiers(self, text: str) -> tuple[str, Optional[str], bool]:
+        """
+        ("new york city, USA") → ("new york", "US", False).
+        The flag is True when a region we cannot check is given ("Paris, Texas").
+        """
+        country = None
+        segments = [normalize_place_name(s) for s in text.split(",")]
+        segments = [s for s in segments if s]
+        if len(segments) > 1 and segments[-1] in self._qualifiers:
+            country = self._qualifiers[segments.pop()]
+        unverifiable = len(segments) > 1 and country is None
+        words = " ".join(segments[:1]).split()
+
+        # Trailing country ("paris france", "tokyo japan")
+        for size in (3, 2, 1):
+            tail = " ".join(words[-size:])
+            if len(words) > size and tail in self._qualifiers:
+                country = country or self._qualifiers[tail]
+                words = words[:-size]
+                break
+        words = [w for w in words if w not in _FILLER_WORDS] or words
+        return " ".join(words), country, unverifiable
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """Canonical place for a free-form name, or None when unknown."""
+        if not text or not text.strip():
+            return None
+        text = text.strip()
+        if text not in self._resolved:
+            if len(self._resolved) >= _RESOLVE_CACHE_SIZE:
+                self._resolved.pop(next(iter(self._resolved), None), None)   # safe if another thread evicted it
+            self._resolved[text] = self._resolve(text)
+        return self._resolved[text]
+
+    def _resolve(self, text: str) -> Optional[Place]:
+        key = normalize_place_name(text)
+        place_id = self._exact(key)
+
+        if place_id is None:
+            stripped, country, unverifiable = self._strip_qualifiers(text)
+            if unverifiable:
+                return None
+            place_id = self._exact(stripped) or self._unique_prefix(stripped)
+            if place_id is None and len(stripped) >= _MIN_PREFIX:
+                close = difflib.get_close_matches(stripped, self._alias_list, n=1, cutoff=_FUZZY_CUTOFF)
+                place_id = self._aliases[close[0]] if close else None
+            if place_id and country and self.places[place_id]["country_code"] != country:
+                # "Paris, USA" must not become Paris, France
+                place_id = None
+
+        return self.places[place_id] if place_id else None
+
+    def complete(self, prefix: str, limit: int = 5) -> list[Place]:
+        """Places whose alias starts with `prefix` (for autocomplete)."""
+        node = self._find_node(normalize_place_name(prefix))
+        if node is None:
+            return []
+        return [self.places[i] for i in sorted(node.ids)[:limit]]
+
+    @staticmethod
+    def display_name(place: Place) -> str:
+        if place["name"] == place["country"]:
+            return place["name"]
+        return f"{place['name']}, {place['country']}"
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer loaded from the bundled CSV."""
+    return Gazetteer.from_csv()
+
+
+def canonical_place_key(text: str) -> str:
+    """Canonical id for known places, otherwise the normalized text."""
+    place = get_gazetteer().resolve(text)
+    return place["id"] if place else normalize_place_name(text)
+
+
+def canonical_currency(text: str) -> Optional[str]:
+    """
+    ISO 4217 code for a currency code, name or symbol ("ron", "Euros", "€")
+    or a known place ("Tokyo" → "JPY"). Other three-letter tokens go
+    through the place lookup ("BKK" → "THB").
+    """
+    if not text or not text.strip():
+        return None
+    code = text.strip().upper()
+    if code in ISO_4217_CODES:
+        return code
+    if text.strip().lower() in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[text.strip().lower()]
+    name = normalize_place_name(text)
+    for key in (name, name[:-1] if name.endswith("s") else name):
+        if key in CURRENCY_NAMES:
+            return CURRENCY_NAMES[key]
+    place = get_gazetteer().resolve(text)
+    return place["currency"] if place else None
+
+
+def trip_stops(destinations: list[str]) -> list[str]:
+    """
+    The distinct stops of a trip from parsed destinations: "Milan, Italy"
+    parses as ["Milan", "Italy"], but only Milan is a stop; "NYC" and
+    "New York" are one stop.
+    """
+    gazetteer = get_gazetteer()
+    resolved = [(name, gazetteer.resolve(name)) for name in destinations]
+    countries = {normalize_place_name(p["country"]) for _, p in resolved if p and p["name"] != p["country"]}
+    stops, seen = [], set()
+    for name, place in resolved:
+        key = place["id"] if place else normalize_place_name(name)
+        if key in countries or key in seen:
+            continue
+        seen.add(key)
+        stops.append(name)
+    return stops
@@ -1,34 +1,148 @@
+import os
+from typing import Optional, TypedDict
+
 from langchain_tavily import TavilySearch
 from langchain_google_community import GooglePlacesTool, GooglePlacesAPIWrapper
 
+from utils.cache_backend import get_cache
+from utils.gazetteer import canonical_place_key
+from utils.spatial_index import get_spatial_index
+
+
+class PlaceRecord(TypedDict):
+    name: str
+    address: str
+    lat: Optional[float]
+    lon: Optional[float]
+    rating: Optional[float]
+    place_id: str
+
+
+def place_cache_key(source: str, kind: str, place: str) -> str:
+    return f"{source}:{kind}:{canonical_place_key(place)}"
+
+
+def _cached_search(source: str, kind: str, place: str, search, refresh: bool = False) -> str:
+    """
+    Place searches shared across workers through the "places" cache namespace;
+    `refresh` re-runs the search ahead of expiry (utils/prewarm.py).
+    """
+    cache = get_cache()
+    lookup = cache.refresh if refresh else cache.get_or_compute
+    return lookup("places", place_cache_key(source, kind, place), lambda: search() or None)
+
 
 # -----------------------------
 # Google Places
 # -----------------------------
+GOOGLE_QUERIES = {
+    "attractions": "Top tourist attractions in {place}. Return short bullet points only.",
+    "restaurants": "Top restaurants and eateries in {place}. Return short bullet points only.",
+    "activities": "Popular activities in {place}. Return short bullet points only.",
+    "transportation": "Modes of local transportation in {place}. Return concise list.",
+}
+
+# Location-biased searches behind search_nearby (utils/spatial_index.py)
+NEARBY_QUERIES = {
+    "restaurants": "restaurants",
+    "attractions": "tourist attractions",
+    "activities": "things to do",
+    "transportation": "public transport stations",
+    "hotels": "hotels",
+}
+
+
 class GooglePlaceSearchTool:
     def __init__(self, api_key: str):
         self.places_wrapper = GooglePlacesAPIWrapper(gplaces_api_key=api_key)
+        # Overridable for local stand-ins (benchmarks/api_standins.py)
+        if os.environ.get("GPLACES_BASE_URL"):
+            self.places_wrapper.google_map_client.base_url = os.environ["GPLACES_BASE_URL"]
         self.places_tool = GooglePlacesTool(api_wrapper=self.places_wrapper)
 
+    def search(self, kind: str, place: str, refresh: bool = False) -> str:
+        """One of GOOGLE_QUERIES for `place`, through the shared cache."""
+        query = GOOGLE_QUERIES[kind].format(place=place)
+        return _cached_search("google", kind, place, lambda: self._text_search(kind, place, query), refresh)
+
+    def _text_search(self, kind: str, place: str, query: str) -> str:
+        """
+        The same text as GooglePlacesTool.run(); the text-search results it is
+        built from are also kept as records (coordinates for the spatial
+        index), without an extra request.
+        """
+        wrapper = self.places_wrapper
+        results = wrapper.google_map_client.places(query).get("results", [])
+        if not results:
+            return "Google Places did not find any places that match the description"
+        records = [_place_record(result) for result in results]
+        get_cache().set("places", place_cache_key("google-records", kind, place), records)
+        get_spatial_index().add(place, kind, records)
+
+        details = [wrapper.fetch_place_details(result["place_id"]) for result in results]
+        return "\n".join(f"{i + 1}. {item}" for i, item in enumerate(d for d in details if d is not None))
+
+    def records(self, kind: str, place: str, refresh: bool = False) -> list[PlaceRecord]:
+        """
+        Structured results of one of GOOGLE_QUERIES (name, address, coordinates,
+        rating) from a single text search, without the per-place details
+        requests of search(); cached in "places" like the text results.
+        """
+        query = GOOGLE_QUERIES[kind].format(place=place)
+
+        def fetch():
+            results = self.places_wrapper.google_map_client.places(query).get("results", [])
+            return [_place_record(result) for result in results] or None
+
+        cache = get_cache()
+        lookup = cache.refresh if refresh else cache.get_or_compute
+        records = lookup("places", place_cache_key("google-records", kind, place), fetch) or []
+        get_spatial_index().add(place, kind, records)
+        return records
+
+    @staticmethod
+    def record_kinds() -> tuple:
+        return tuple(GOOGLE_QUERIES)
+
+    @staticmethod
+    def cached_records(kind: str, place: str) -> list[PlaceRecord]:
+        """Records already in the shared cache for `place`; never calls the API."""
+        return get_cache().get("places", place_cache_key("google-records", kind, place)) or []
+
+    def nearby_records(self, kind: str, lat: float, lon: float, radius_km: float) -> list[PlaceRecord]:
+        """One location-biased text search around (lat, lon), cached per ~100 m and radius."""
+        query = NEARBY_QUERIES.get(kind, kind)
+        radius_m = int(radius_km * 1000)
+
+        def fetch():
+            response = self.places_wrapper.google_map_client.places(query, location=(lat, lon), radius=radius_m)
+            return [_place_record(result) for result in response.get("results", [])] or None
+
+        key = f"google-nearby:{kind}:{lat:.3f},{lon:.3f}:{radius_m}"
+        return get_cache().get_or_compute("places", key, fetch) or []
+
+    def locate(self, text: str) -> Optional[PlaceRecord]:
+        """The best text-search match for a landmark or address, with coordinates."""
+
+        def fetch():
+            results = self.places_wrapper.google_map_client.places(text).get("results", [])
+            records = [_place_record(result) for result in results[:1]]
+            return records if records and records[0]["lat"] is not None else None
+
+        records = get_cache().get_or_compute("places", place_cache_key("google-locate", "place", text), fetch)
+        return records[0] if records else None
+
     def attractions(self, place: str) -> str:
-        return self.places_tool.run(
-            f"Top tourist attractions in {place}. Return short bullet points only."
-        )
+        return self.search("attractions", place)
 
     def restaurants(self, place: str) -> str:
-        return self.places_tool.run(
-            f"Top restaurants and eateries in {place}. Return short bullet points only."
-        )
+        return self.search("restaurants", place)
 
     def activities(self, place: str) -> str:
-        return self.places_tool.run(
-            f"Popular activities in {place}. Return short bullet points only."
-        )
+        return self.search("activities", place)
 
     def transportation(self, place: str) -> str:
-        return self.places_tool.run(
-            f"Modes of local transportation in {place}. Return concise list."
-        )
+        return self.search("transportation", place)
 
     # Aliases used by place_search_tool.py
     def google_search_attractions(self, place: str) -> str:
@@ -44,6 +158,18 @@ class GooglePlaceSearchTool:
         return self.transportation(place)
 
 
+def _place_record(result: dict) -> PlaceRecord:
+    location = (result.get("geometry") or {}).get("location") or {}
+    return PlaceRecord(
+        name=result.get("name", "Unknown"),
+        address=result.get("formatted_address", ""),
+        lat=location.get("lat"),
+        lon=location.get("lng"),
+        rating=result.get("rating"),
+        place_id=result.get("place_id", ""),
+    )
+
+
 # -----------------------------
 # Tavily (Web Search)
 # -----------------------------
@@ -66,15 +192,19 @@ class TavilyPlaceSearchTool:
         return str(result)[:1500]
 
     def attractions(self, place: str) -> str:
-        return self._query(f"Top tourist attractions in {place}")
+        return _cached_search("tavily", "attractions", place, lambda: self._query(f"Top tourist attractions in {place}"))
 
     def restaurants(self, place: str) -> str:
-        return self._query(f"Best restaurants and local food in {place}")
+        return _cached_search("tavily", "restaurants", place, lambda: self._query(f"Best restaurants and local food in {place}"))
 
     def activities(self, place: str) -> str:
-        return self._query(f"Best activities and experiences in {place}")
+        return _cached_search("tavily", "activities", place, lambda: self._query(f"Best activities and experiences in {place}"))
 
     def transportation(self, place: str) -> str:
-        return self._query(f"Local transportation options in {place}")
+        return _cached_search("tavily", "transportation", place, lambda: self._query(f"Local transportation options in {place}"))
+
+    def nearby(self, category: str, anchor: str, city: str) -> str:
+        where = ", ".join(p for p in (anchor, city) if p)
+        return _cached_search("tavily", f"nearby-{category}", where, lambda: self._query(f"{category} near {where}"))
 
 
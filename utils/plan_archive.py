@@ -0,0 +1,285 @@
+"""
+Plan Archive — content-addressed, compressed plan storage
+---------------------------------------------------------
+Stores generated travel plans in append-only segment files instead of one
+Markdown file per plan:
+  - every plan is zlib-compressed and keyed by the SHA-256 of its text,
+    so identical plans are stored once
+  - segments roll over at a fixed size, keeping the directory small
+  - a SQLite index maps destination, date and query hash to segment offsets
+    for fast lookup and export
+
+Record layout inside a segment:
+    MAGIC (4 bytes) | sha256 digest (32 bytes) | payload length (4 bytes) | zlib payload
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from typing import Optional, TypedDict
+
+
+_MAGIC = b"TMEP"
+_HEADER = struct.Struct(">4s32sI")
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".seg"
+
+
+class ArchiveEntry(TypedDict):
+    content_hash: str
+    query_hash: str
+    question: str
+    destination: str
+    created_at: str     # ISO-8601, seconds precision
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest used as the archive key of a plan."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def query_hash(question: str) -> str:
+    """Hash of a whitespace/case-normalized user query."""
+    normalized = " ".join(question.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class PlanArchive:
+    """
+    Append-only segmented archive with a SQLite index.
+    Safe for concurrent writers: appends happen inside an IMMEDIATE
+    SQLite transaction, which serializes writers across processes.
+    Within a process every use of the shared connection takes `_lock`, so
+    reads never run inside another thread's open write transaction.
+    """
+
+    def __init__(
+        self,
+        directory: str = "./output/archive",
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        compression_level: int = 9,
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None,  # explicit BEGIN/COMMIT below
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_hash TEXT PRIMARY KEY,
+                segment      INTEGER NOT NULL,
+                offset       INTEGER NOT NULL,
+                length       INTEGER NOT NULL,
+                raw_size     INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id           INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT NOT NULL REFERENCES blobs(content_hash),
+                query_hash   TEXT NOT NULL,
+                question     TEXT NOT NULL,
+                destination  TEXT NOT NULL,
+                created_at   TEXT NOT NULL,
+                created_date TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_destination
+                ON entries (destination, created_date);
+            CREATE INDEX IF NOT EXISTS idx_entries_date ON entries (created_date);
+            CREATE INDEX IF NOT EXISTS idx_entries_query ON entries (query_hash);
+            CREATE INDEX IF NOT EXISTS idx_entries_content ON entries (content_hash);
+            """
+        )
+
+    # -------------------------
+    # Write path
+    # -------------------------
+
+    def put(self, plan_text: str, question: str = "", destination: str = "") -> str:
+        """
+        Archive a plan and return its content hash.
+        The plan body is written only if this exact text is not stored yet.
+        """
+        key = content_hash(plan_text)
+        now = datetime.datetime.now().replace(microsecond=0)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM blobs WHERE content_hash = ?", (key,)
+                ).fetchone()
+                if not exists:
+                    self._append_blob(key, plan_text)
+
+                self._conn.execute(
+                    "INSERT INTO entries "
+                    "(content_hash, query_hash, question, destination, created_at, created_date) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        query_hash(question),
+                        question,
+                        destination.strip().lower(),
+                        now.isoformat(),
+                        now.date().isoformat(),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return key
+
+    def _append_blob(self, key: str, plan_text: str) -> None:
+        raw = plan_text.encode("utf-8")
+        payload = zlib.compress(raw, self.compression_level)
+        record = _HEADER.pack(_MAGIC, bytes.fromhex(key), len(payload)) + payload
+
+        segment = self._current_segment(len(record))
+        path = self._segment_path(segment)
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._conn.execute(
+            "INSERT INTO blobs (content_hash, segment, offset, length, raw_size) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, segment, offset, len(record), len(raw)),
+        )
+
+    def _current_segment(self, incoming: int) -> int:
+        row = self._conn.execute("SELECT MAX(segment) FROM blobs").fetchone()
+        segment = row[0] if row and row[0] is not None else 0
+        path = self._segment_path(segment)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size and size + incoming > self.segment_max_bytes:
+            segment += 1
+        return segment
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(
+            self.directory, f"{_SEGMENT_PREFIX}{segment:06d}{_SEGMENT_SUFFIX}"
+        )
+
+    # -------------------------
+    # Read path
+    # -------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the plan text for a content hash, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, length FROM blobs WHERE content_hash = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+
+        segment, offset, length = row
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            record = f.read(length)
+
+        magic, digest, size = _HEADER.unpack_from(record)
+        if magic != _MAGIC or digest.hex() != key:
+            raise ValueError(f"Corrupt archive record for {key}")
+
+        return zlib.decompress(record[_HEADER.size:_HEADER.size + size]).decode("utf-8")
+
+    def find(
+        self,
+        destination: Optional[str] = None,
+        since: Optional[datetime.date] = None,
+        until: Optional[datetime.date] = None,
+        question: Optional[str] = None,
+        limit: int = 100,
+    ) -> list[ArchiveEntry]:
+        """Look up archive entries by destination, date range and/or query (newest first)."""
+        clauses, params = [], []
+        if destination:
+            clauses.append("destination = ?")
+            params.append(destination.strip().lower())
+        if since:
+            clauses.append("created_date >= ?")
+            params.append(since.isoformat())
+        if until:
+            clauses.append("created_date <= ?")
+            params.append(until.isoformat())
+        if question:
+            clauses.append("query_hash = ?")
+            params.append(query_hash(question))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content_hash, query_hash, question, destination, created_at "
+                f"FROM entries {where} ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+
+        return [
+            ArchiveEntry(
+                content_hash=r[0],
+                query_hash=r[1],
+                question=r[2],
+                destination=r[3],
+                created_at=r[4],
+            )
+            for r in rows
+        ]
+
+    def first_seen(self, key: str) -> Optional[datetime.datetime]:
+        """When a plan with this content hash was first archived."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(created_at) FROM entries WHERE content_hash = ?", (key,)
+            ).fetchone()
+        return datetime.datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def stats(self) -> dict:
+        """Entry/blob counts and raw vs. stored byte totals."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            blobs, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(length), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "unique_plans": blobs,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_archive: Optional[PlanArchive] = None
+_default_lock = threading.Lock()
+
+
+def get_archive(directory: str = "./output/archive") -> PlanArchive:
+    """Process-wide archive instance; asking for another directory closes the previous one."""
+    global _default_archive
+    with _default_lock:
+        if _default_archive is None or _default_archive.directory != directory:
+            if _default_archive is not None:
+                _default_archive.close()
+            _default_archive = PlanArchive(directory)
+        return _default_archive
@@ -0,0 +1,385 @@
+"""
+Plan Model — the travel plan as typed fields, Markdown rendered locally
+-----------------------------------------------------------------------
+A free-form Markdown plan can only be re-read: the critic scans its text,
+a currency change or an edited day means another LLM call. With sectioned
+synthesis in structured mode (config.yaml → synthesis.structured) every
+section call returns its part of a `TravelPlan` as a forced tool call
+(the same mechanism as compute_trip_budget's LineItems):
+
+  TravelPlan
+    ├── overview, weather, currency
+    ├── popular / offbeat: days → slots (time, place, area, CostRange)
+    ├── hotels (per-night CostRange), restaurants (per-person CostRange)
+    ├── transport tips
+    └── budget rows (CostRange, per day or per trip)
+
+and everything after synthesis works on the fields:
+
+  - plan_markdown():  the Markdown for the UI and saved documents
+  - plan_issues():    consistency checks (days covered, ranges, currencies)
+  - convert_plan():   every cost re-quoted in another currency from one
+                      rate table (BudgetEngine.rate_matrix)
+  - replace_day() / remove_place(): partial edits, re-rendered locally
+  - compact_text():   a short fact listing for the LLM critic
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Optional, TypedDict
+
+from pydantic import BaseModel, Field
+
+from utils.gazetteer import canonical_currency
+
+
+class CostRange(BaseModel):
+    low: float = Field(ge=0, description="Lowest typical cost")
+    high: float = Field(ge=0, description="Highest typical cost (equal to low for a fixed price)")
+    currency: str = Field(default="USD", description="ISO 4217 code, e.g. EUR")
+
+
+class Slot(BaseModel):
+    time: str = Field(description="morning, afternoon, evening, or a clock time")
+    place: str = Field(description="Name of the place, as in the data")
+    activity: str = Field(default="", description="What to do there, a few words")
+    area: str = Field(default="", description="Neighbourhood or district")
+    cost: Optional[CostRange] = Field(default=None, description="Entry / activity cost per person, if any")
+
+
+class DayPlan(BaseModel):
+    day: int = Field(ge=1, description="Day number within the whole trip")
+    theme: str = Field(default="", description="The day's theme or area, a few words")
+    slots: list[Slot] = Field(default_factory=list)
+
+
+class Hotel(BaseModel):
+    name: str
+    area: str = ""
+    per_night: Optional[CostRange] = None
+
+
+class Restaurant(BaseModel):
+    name: str
+    area: str = ""
+    cuisine: str = ""
+    per_person: Optional[CostRange] = None
+
+
+class BudgetRow(BaseModel):
+    category: str = Field(description="e.g. accommodation, food, transport, activities")
+    cost: CostRange
+    per_day: bool = Field(default=False, description="True if the cost repeats every day of the trip")
+
+
+class TravelPlan(BaseModel):
+    destination: str = ""
+    days: Optional[int] = None
+    currency: str = "USD"
+    overview: str = ""
+    weather: str = ""
+    popular: list[DayPlan] = Field(default_factory=list)
+    offbeat: list[DayPlan] = Field(default_factory=list)
+    hotels: list[Hotel] = Field(default_factory=list)
+    restaurants: list[Restaurant] = Field(default_factory=list)
+    transport: list[str] = Field(default_factory=list)
+    budget: list[BudgetRow] = Field(default_factory=list)
+    notes: list[str] = Field(default_factory=list)
+
+
+# ---- section parts: what one sectioned-synthesis call fills in ----
+
+class OverviewPart(BaseModel):
+    """Overview of the trip and what the weather means for it."""
+    destination: str = Field(description="Destination(s), e.g. 'Paris' or 'Paris → Rome'")
+    currency: str = Field(description="ISO 4217 code all costs in the plan are quoted in")
+    overview: str = Field(description="Two or three sentences about the trip")
+    weather: str = Field(default="", description="Expected weather and what it means for packing and activities")
+
+
+class ItineraryPart(BaseModel):
+    """Day-by-day itinerary for the requested days."""
+    days: list[DayPlan]
+
+
+class StayFoodPart(BaseModel):
+    """Recommended hotels and restaurants."""
+    hotels: list[Hotel]
+    restaurants: list[Restaurant]
+
+
+class TransportPart(BaseModel):
+    """Ways of getting around, one short tip each, with typical costs."""
+    tips: list[str]
+
+
+class BudgetPart(BaseModel):
+    """Cost breakdown of the trip."""
+    rows: list[BudgetRow]
+    notes: list[str] = Field(default_factory=list, description="Missing data or assumptions, one line each")
+
+
+# Section part (utils/planner/sections.py → Section["part"]) → schema of its call
+PART_SCHEMAS = {
+    "overview": OverviewPart,
+    "popular": ItineraryPart,
+    "offbeat": ItineraryPart,
+    "stay_food": StayFoodPart,
+    "transport": TransportPart,
+    "budget": BudgetPart,
+}
+
+ITINERARY_TITLES = {
+    "popular": "Popular Tourist Itinerary",
+    "offbeat": "Off-beat / Hidden Gems Itinerary",
+}
+
+
+class PlanIssue(TypedDict):
+    field: str          # e.g. "popular", "hotels[2].per_night", "budget"
+    message: str
+
+
+def invoke_structured(llm, schema: type[BaseModel], messages: list, **kwargs) -> BaseModel:
+    """One LLM call forced to answer with `schema` as its only tool; raises if it does not."""
+    bound = llm.bind_tools([schema], tool_choice=schema.__name__)
+    response = bound.invoke(messages, **kwargs)
+    calls = [call for call in response.tool_calls or [] if call["name"] == schema.__name__]
+    if not calls:
+        raise ValueError(f"no {schema.__name__} in the response")
+    return schema.model_validate(calls[0]["args"])
+
+
+def merge_part(plan: TravelPlan, part: str, value: BaseModel) -> None:
+    """Copy one section's result into `plan` (itinerary days are added by day number, in day order)."""
+    if part == "overview":
+        plan.destination, plan.overview, plan.weather = value.destination, value.overview, value.weather
+        plan.currency = canonical_currency(value.currency) or plan.currency
+    elif part in ITINERARY_TITLES:
+        days = {d.day: d for d in getattr(plan, part)}
+        days.update((d.day, d) for d in value.days)
+        setattr(plan, part, sorted(days.values(), key=lambda d: d.day))
+    elif part == "stay_food":
+        plan.hotels, plan.restaurants = value.hotels, value.restaurants
+    elif part == "transport":
+        plan.transport = value.tips
+    elif part == "budget":
+        plan.budget = value.rows
+        plan.notes += value.notes
+
+
+# ---- rendering ----
+
+def format_cost(cost: Optional[CostRange]) -> str:
+    if cost is None:
+        return ""
+    if cost.low == 0 and cost.high == 0:
+        return "free"
+    if round(cost.low) == round(cost.high):
+        return f"{cost.low:,.0f} {cost.currency}"
+    return f"{cost.low:,.0f}–{cost.high:,.0f} {cost.currency}"
+
+
+def _join(*parts: str) -> str:
+    return " · ".join(p for p in parts if p)
+
+
+def _overview_md(plan: TravelPlan) -> list[str]:
+    lines = [plan.overview, ""] if plan.overview else []
+    if plan.weather:
+        lines.append(f"**Weather:** {plan.weather}")
+    return lines
+
+
+def _days_md(days: list[DayPlan]) -> list[str]:
+    lines = []
+    for day in days:
+        lines.append(f"### Day {day.day}{f' — {day.theme}' if day.theme else ''}")
+        for slot in day.slots:
+            detail = _join(slot.activity, slot.area, format_cost(slot.cost))
+            lines.append(f"- **{slot.time.capitalize()}:** {slot.place}{f' — {detail}' if detail else ''}")
+        lines.append("")
+    return lines[:-1]
+
+
+def _stay_food_md(plan: TravelPlan) -> list[str]:
+    lines = []
+    if plan.hotels:
+        lines += ["**Hotels**", "", "| Hotel | Area | Per night |", "|---|---|---|"]
+        lines += [f"| {h.name} | {h.area} | {format_cost(h.per_night)} |" for h in plan.hotels]
+    if plan.restaurants:
+        lines += ["", "**Restaurants**", "", "| Restaurant | Area | Cuisine | Per person |", "|---|---|---|---|"]
+        lines += [f"| {r.name} | {r.area} | {r.cuisine} | {format_cost(r.per_person)} |" for r in plan.restaurants]
+    return lines if lines[:1] != [""] else lines[1:]
+
+
+def budget_totals(plan: TravelPlan) -> dict[str, CostRange]:
+    """Trip total per currency: per-day rows × days, plus one-off rows."""
+    totals: dict[str, CostRange] = {}
+    for row in plan.budget:
+        repeat = (plan.days or 1) if row.per_day else 1
+        total = totals.setdefault(row.cost.currency, CostRange(low=0, high=0, currency=row.cost.currency))
+        total.low += row.cost.low * repeat
+        total.high += row.cost.high * repeat
+    return totals
+
+
+def _budget_md(plan: TravelPlan) -> list[str]:
+    if not plan.budget:
+        return []
+    lines = ["| Category | Cost | Basis |", "|---|---|---|"]
+    lines += [f"| {row.category.capitalize()} | {format_cost(row.cost)} | {'per day' if row.per_day else 'per trip'} |"
+              for row in plan.budget]
+    for total in budget_totals(plan).values():
+        lines.append(f"| **Total{f' ({plan.days} days)' if plan.days else ''}** | **{format_cost(total)}** | |")
+        if plan.days:
+            daily = CostRange(low=total.low / plan.days, high=total.high / plan.days, currency=total.currency)
+            lines.append(f"| Daily average | {format_cost(daily)} | per day |")
+    return lines
+
+
+def part_markdown(plan: TravelPlan, part: str) -> list[str]:
+    """Body lines of one part of the plan (no heading)."""
+    if part == "overview":
+        return _overview_md(plan)
+    if part in ITINERARY_TITLES:
+        return _days_md(getattr(plan, part))
+    if part == "stay_food":
+        return _stay_food_md(plan)
+    if part == "transport":
+        return [f"- {tip}" for tip in plan.transport]
+    if part == "budget":
+        return _budget_md(plan) + ([""] + [f"- _{note}_" for note in plan.notes] if plan.notes else [])
+    raise ValueError(f"unknown plan part: {part}")
+
+
+PART_TITLES = {
+    "overview": "Trip Overview & Weather",
+    **ITINERARY_TITLES,
+    "stay_food": "Where to Stay & Eat",
+    "transport": "Getting Around",
+    "budget": "Cost Breakdown & Daily Budget",
+}
+
+
+def plan_markdown(plan: TravelPlan) -> str:
+    """The whole plan as Markdown, in the section order of sectioned synthesis."""
+    blocks = []
+    for part, title in PART_TITLES.items():
+        body = part_markdown(plan, part)
+        blocks.append(f"## {title}\n\n" + ("\n".join(body) if body else "_No data for this section._"))
+    return "\n\n".join(blocks)
+
+
+def compact_text(plan: TravelPlan) -> str:
+    """One line per fact: what the LLM critic needs to read, without the Markdown around it."""
+    lines = [f"{plan.destination}, {plan.days or '?'} days, costs in {plan.currency}"]
+    for part in ITINERARY_TITLES:
+        for day in getattr(plan, part):
+            for slot in day.slots:
+                lines.append(f"{part} day {day.day} {slot.time}: {_join(slot.place, slot.activity, format_cost(slot.cost))}")
+    lines += [f"hotel: {_join(h.name, h.area, format_cost(h.per_night))} per night" for h in plan.hotels]
+    lines += [f"restaurant: {_join(r.name, r.cuisine, format_cost(r.per_person))} per person" for r in plan.restaurants]
+    lines += [f"transport: {tip}" for tip in plan.transport]
+    lines += [f"budget {row.category}: {format_cost(row.cost)} {'per day' if row.per_day else 'per trip'}"
+              for row in plan.budget]
+    return "\n".join(lines)
+
+
+# ---- checks and edits on fields ----
+
+def _cost_fields(plan: TravelPlan) -> list[tuple[str, CostRange]]:
+    """(field path, CostRange) of every cost in the plan."""
+    fields = []
+    for part in ITINERARY_TITLES:
+        for d, day in enumerate(getattr(plan, part)):
+            fields += [(f"{part}[{d}].slots[{s}].cost", slot.cost) for s, slot in enumerate(day.slots) if slot.cost]
+    fields += [(f"hotels[{i}].per_night", h.per_night) for i, h in enumerate(plan.hotels) if h.per_night]
+    fields += [(f"restaurants[{i}].per_person", r.per_person) for i, r in enumerate(plan.restaurants) if r.per_person]
+    fields += [(f"budget[{i}].cost", row.cost) for i, row in enumerate(plan.budget)]
+    return fields
+
+
+def plan_issues(plan: TravelPlan, days: Optional[int] = None) -> list[PlanIssue]:
+    """Consistency problems found on the fields alone (no LLM call)."""
+    issues: list[PlanIssue] = []
+    days = days or plan.days
+    for part, title in ITINERARY_TITLES.items():
+        covered = sorted({d.day for d in getattr(plan, part)})
+        if days and covered != list(range(1, days + 1)):
+            issues.append(PlanIssue(field=part, message=f"{title} covers {len(covered)} of {days} days"))
+        empty = [d.day for d in getattr(plan, part) if not d.slots]
+        if empty:
+            issues.append(PlanIssue(field=part, message=f"{title}: nothing planned on day(s) {', '.join(map(str, empty))}"))
+
+    currencies = set()
+    for field, cost in _cost_fields(plan):
+        currencies.add(cost.currency)
+        if cost.low > cost.high:
+            issues.append(PlanIssue(field=field, message=f"Cost range {cost.low:g}–{cost.high:g} is reversed"))
+    if len(currencies) > 1:
+        issues.append(PlanIssue(field="currency", message=f"Costs are quoted in {', '.join(sorted(currencies))}"))
+
+    if not plan.hotels:
+        issues.append(PlanIssue(field="hotels", message="No hotels listed"))
+    nightly = [h.per_night for h in plan.hotels if h.per_night and h.per_night.currency == plan.currency]
+    stay = [r.cost for r in plan.budget if r.per_day and r.category.lower() in ("accommodation", "hotel", "hotels", "stay")]
+    if nightly and stay and stay[0].currency == plan.currency:
+        cheapest, dearest = min(h.low for h in nightly), max(h.high for h in nightly)
+        if stay[0].high < cheapest or stay[0].low > dearest:
+            issues.append(PlanIssue(
+                field="budget", message=f"Accommodation budget {format_cost(stay[0])} per day does not match "
+                                        f"the hotels listed ({cheapest:,.0f}–{dearest:,.0f} {plan.currency})",
+            ))
+    return issues
+
+
+def convert_plan(plan: TravelPlan, currency: str, engine) -> TravelPlan:
+    """
+    A copy of `plan` with every cost in `currency`. `engine` is a
+    utils.budget_engine.BudgetEngine: one rate table for all source currencies.
+    """
+    target = canonical_currency(currency) or currency.strip().upper()
+    converted = plan.model_copy(deep=True)
+    fields = _cost_fields(converted)
+    sources = list(dict.fromkeys(cost.currency for _, cost in fields))
+    if sources:
+        factors = engine.rate_matrix(sources, [target])[:, 0]
+        factor = dict(zip(sources, factors.tolist()))
+        for _, cost in fields:
+            cost.low, cost.high = round(cost.low * factor[cost.currency], 2), round(cost.high * factor[cost.currency], 2)
+            cost.currency = target
+    converted.currency = target
+    return converted
+
+
+def replace_day(plan: TravelPlan, itinerary: str, day: DayPlan) -> TravelPlan:
+    """A copy of `plan` with `day` replacing (or adding) that day of the "popular" / "offbeat" itinerary."""
+    if itinerary not in ITINERARY_TITLES:
+        raise ValueError(f"itinerary must be one of {', '.join(ITINERARY_TITLES)}")
+    edited = plan.model_copy(deep=True)
+    merge_part(edited, itinerary, ItineraryPart(days=[day]))
+    return edited
+
+
+def remove_place(plan: TravelPlan, name: str) -> TravelPlan:
+    """A copy of `plan` without the slots, hotels and restaurants named `name`."""
+    key = name.strip().lower()
+    edited = plan.model_copy(deep=True)
+    for part in ITINERARY_TITLES:
+        for day in getattr(edited, part):
+            day.slots = [s for s in day.slots if s.place.strip().lower() != key]
+    edited.hotels = [h for h in edited.hotels if h.name.strip().lower() != key]
+    edited.restaurants = [r for r in edited.restaurants if r.name.strip().lower() != key]
+    return edited
+
+
+def plan_from_text(text: str) -> Optional[TravelPlan]:
+    """A TravelPlan stored as JSON (e.g. in the plan archive), or None for a Markdown plan."""
+    if not text.lstrip().startswith("{"):
+        return None
+    try:
+        return TravelPlan.model_validate(json.loads(text))
+    except ValueError:
+        return None
@@ -1,21 +1,82 @@
 # utils/planner/planner.py
 
+import threading
+from typing import Callable, Optional, TypedDict
+
+from utils.planner.sections import synthesis_settings
 from utils.planner.steps import (
     weather_constraints,
     attraction_plan,
     stay_strategy,
     transport_strategy,
     detailed_itinerary,
+    sectioned_itinerary,
+)
+
+
+# Which inputs / earlier step outputs each step reads, in execution order.
+# replan() recomputes a step only when one of these changed.
+STEP_DEPENDENCIES = {
+    "weather_summary": ("weather_data",),
+    "places_plan": ("places_data", "travel_style", "days"),
+    "stay_plan": ("hotels_data", "budget"),
+    "transport_plan": ("transport_data",),
+    "final_plan": ("weather_summary", "places_plan", "stay_plan", "transport_plan", "days"),
+}
+
+PLAN_INPUTS = (
+    "destination",
+    "days",
+    "travel_style",
+    "budget",
+    "weather_data",
+    "places_data",
+    "hotels_data",
+    "transport_data",
 )
 
 
+class PlanResult(TypedDict):
+    inputs: dict            # the create_plan() arguments
+    steps: dict             # step name → output (includes "final_plan")
+    llm_calls: int          # LLM requests actually sent for this plan
+    llm_calls_saved: int    # steps answered without an LLM request
+
+
+class _CountingLLM:
+    """Pass-through wrapper that counts real LLM requests (memo hits never reach it)."""
+
+    def __init__(self, llm):
+        self.wrapped = llm
+        self.calls = 0
+        self._lock = threading.Lock()   # sections call the LLM concurrently
+
+    def invoke(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+        return self.wrapped.invoke(*args, **kwargs)
+
+
 class TravelPlanner:
     """
     High-level planner that orchestrates multi-step LLM reasoning.
+    Steps are memoized (see utils/planner/steps.py), and replan() only
+    recomputes the steps whose inputs changed.
+
+    With `sectioned` (default: config.yaml → synthesis.mode) the final
+    itinerary is written as concurrent sections; `on_section(section, markdown)`
+    receives each one as it completes.
     """
 
-    def __init__(self, llm):
+    def __init__(
+        self,
+        llm,
+        sectioned: Optional[bool] = None,
+        on_section: Optional[Callable] = None,
+    ):
         self.llm = llm
+        self.sectioned = synthesis_settings()["mode"] == "sectioned" if sectioned is None else sectioned
+        self.on_section = on_section
 
     def create_plan(
         self,
@@ -24,49 +85,118 @@ class TravelPlanner:
         travel_style: str,
         budget: str,
         weather_data: dict,
-        places_data: str,
+        places_data: str | list,
         hotels_data: str,
         transport_data: str,
     ) -> str:
         """
         Generate a detailed travel itinerary.
         """
+        return self.build_plan(
+            destination=destination,
+            days=days,
+            travel_style=travel_style,
+            budget=budget,
+            weather_data=weather_data,
+            places_data=places_data,
+            hotels_data=hotels_data,
+            transport_data=transport_data,
+        )["steps"]["final_plan"]
 
-        # Step 1: Weather reasoning
-        weather_summary = weather_constraints(
-            self.llm,
-            weather_data,
+    def build_plan(self, **inputs) -> PlanResult:
+        """
+        Like create_plan(), but returns every step output so the result can
+        be passed to replan() later.
+        """
+        missing = [name for name in PLAN_INPUTS if name not in inputs]
+        if missing:
+            raise TypeError(f"build_plan() missing inputs: {', '.join(missing)}")
+        return self._run(inputs, previous_steps={}, stale=set(STEP_DEPENDENCIES))
+
+    def replan(self, previous: PlanResult, **changes) -> PlanResult:
+        """
+        Re-plan after changing some inputs, e.g. replan(plan, budget="luxury").
+        Steps whose inputs (and upstream step outputs) are unchanged are
+        reused from `previous`.
+        """
+        unknown = [name for name in changes if name not in PLAN_INPUTS]
+        if unknown:
+            raise TypeError(f"replan() got unknown inputs: {', '.join(unknown)}")
+
+        inputs = {**previous["inputs"], **changes}
+        changed = {name for name in changes if changes[name] != previous["inputs"].get(name)}
+        result = self._run(inputs, previous_steps=previous["steps"], stale=set(changed))
+
+        print(
+            f"♻️ Replan ({', '.join(sorted(changed)) or 'no changes'}): "
+            f"{result['llm_calls']} LLM call(s), {result['llm_calls_saved']} saved"
         )
+        return result
 
-        # Step 2: Attractions planning
-        places_plan = attraction_plan(
-            self.llm,
-            places_data,
-            travel_style,
-            days,
+    def _run(self, inputs: dict, previous_steps: dict, stale: set) -> PlanResult:
+        llm = _CountingLLM(self.llm)
+        values = dict(inputs)
+        steps: dict = {}
+        saved = 0
+
+        for step, dependencies in STEP_DEPENDENCIES.items():
+            if step in previous_steps and not stale.intersection(dependencies):
+                steps[step] = previous_steps[step]
+                saved += 1
+            else:
+                calls_before = llm.calls
+                steps[step] = self._compute(step, llm, values)
+                # Steps recomputed but served from the memo also saved a call
+                saved += llm.calls == calls_before
+                if steps[step] != previous_steps.get(step):
+                    stale.add(step)
+            values[step] = steps[step]
+
+        return PlanResult(
+            inputs=dict(inputs),
+            steps=steps,
+            llm_calls=llm.calls,
+            llm_calls_saved=saved,
         )
 
+    def _compute(self, step: str, llm, values: dict) -> str:
+        # Step 1: Weather reasoning
+        if step == "weather_summary":
+            return weather_constraints(llm, values["weather_data"])
+
+        # Step 2: Attractions planning
+        if step == "places_plan":
+            return attraction_plan(
+                llm,
+                values["places_data"],
+                values["travel_style"],
+                values["days"],
+            )
+
         # Step 3: Stay strategy
-        stay_plan = stay_strategy(
-            self.llm,
-            hotels_data,
-            budget,
-        )
+        if step == "stay_plan":
+            return stay_strategy(llm, values["hotels_data"], values["budget"])
 
         # Step 4: Transport strategy
-        transport_plan = transport_strategy(
-            self.llm,
-            transport_data,
-        )
+        if step == "transport_plan":
+            return transport_strategy(llm, values["transport_data"])
 
-        # Step 5: Final itinerary synthesis
-        final_plan = detailed_itinerary(
-            self.llm,
-            weather_summary,
-            places_plan,
-            stay_plan,
-            transport_plan,
-            days,
+        # Step 5: Final itinerary synthesis (outline + concurrent sections, or one call)
+        if self.sectioned:
+            return sectioned_itinerary(
+                llm,
+                values["weather_summary"],
+                values["places_plan"],
+                values["stay_plan"],
+                values["transport_plan"],
+                values["days"],
+                on_section=self.on_section,
+            )
+        return detailed_itinerary(
+            llm,
+            values["weather_summary"],
+            values["places_plan"],
+            values["stay_plan"],
+            values["transport_plan"],
+            values["days"],
         )
-
-        return final_plan
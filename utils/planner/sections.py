@@ -0,0 +1,324 @@
+"""
+Sectioned Synthesis — the final itinerary as parallel, bounded LLM calls
+------------------------------------------------------------------------
+Writing two itineraries, hotels, restaurants, transport and a cost
+breakdown in one call under a single max_tokens limit is the slowest call
+of a run and is often truncated. Sectioned synthesis splits it:
+
+  1. an outline (day themes for both itineraries, areas to stay, budget
+     level) that every section sees, so the sections agree
+  2. the sections (overview, each itinerary — split into day ranges for
+     long trips — stay & food, transport, budget) written concurrently,
+     each as its own call bounded by `section_max_tokens`
+  3. the sections stitched into one Markdown plan in outline order
+
+`on_section(section, markdown)` is called as each section completes (in
+completion order), so a UI can show it before the others are done.
+
+In structured mode (`write_plan`, config.yaml → synthesis.structured) each
+section call returns its part of a utils/plan_model.py TravelPlan instead
+of Markdown, and the Markdown is rendered locally from the merged plan.
+
+Each section only receives the data topics it needs (weather, places,
+food, stay, transport, budget), which keeps the per-call input small.
+
+Used by the agent graph's synthesize node (Agent/agentic_workflow.py) and
+by TravelPlanner (utils/planner/steps.py); config.yaml → synthesis.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional, TypedDict
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from utils.config_loader import load_config
+from utils.plan_model import PART_SCHEMAS, TravelPlan, merge_part, part_markdown, plan_markdown
+
+
+_DEFAULTS = {
+    "mode": "sectioned",          # sectioned | single
+    "outline_max_tokens": 400,
+    "section_max_tokens": 900,
+    "max_parallel": 6,
+    "days_per_section": 3,        # longer itineraries are split into day ranges
+    "structured": True,           # sections return TravelPlan parts (utils/plan_model.py)
+}
+
+
+class Section(TypedDict):
+    key: str
+    title: str              # the section's Markdown heading (without "## ")
+    instruction: str
+    topics: tuple           # data topics the section reads (see TOOL_TOPICS)
+    part: str               # the TravelPlan part it fills (utils/plan_model.py → PART_SCHEMAS)
+
+
+class SectionedPlan(TypedDict):
+    markdown: str                   # stitched plan
+    sections: list[dict]            # {"key", "title", "markdown", "ok"} in outline order
+    failed: int                     # sections replaced by a placeholder
+
+
+class StructuredPlan(SectionedPlan):
+    plan: TravelPlan                # merged parts; `markdown` is rendered from it
+
+
+# Tool name → data topic; unknown tools go to "other", which every section reads
+TOOL_TOPICS = {
+    "get_current_weather": "weather",
+    "get_weather_forecast": "weather",
+    "search_attractions": "places",
+    "search_activities": "places",
+    "plan_attraction_route": "places",
+    "search_nearby": "places",
+    "search_restaurants": "food",
+    "search_transportation": "transport",
+    "convert_currency": "budget",
+    "compute_trip_budget": "budget",
+    "estimate_total_hotel_cost": "budget",
+    "calculate_total_expense": "budget",
+    "calculate_daily_expense_budget": "budget",
+}
+
+SECTION_SYSTEM_PROMPT = SystemMessage(
+    content="""You are a travel planner writing ONE section of a larger Markdown travel plan.
+The other sections are written separately from the same outline, so:
+- Start with the exact heading you are given and cover only that section
+- No introduction, no closing remarks, no summary of other sections
+- Follow the outline so your section agrees with the rest of the plan
+- Use only the data provided; if something is missing, say so instead of guessing
+"""
+)
+
+STRUCTURED_SECTION_PROMPT = SystemMessage(
+    content="""You are a travel planner filling in ONE part of a structured travel plan.
+The other parts are filled in separately from the same outline, so:
+- Answer only with the tool call you are given, for this part only
+- Follow the outline so your part agrees with the rest of the plan
+- Use only the data provided; leave a field empty rather than guessing
+- Give costs as low/high ranges in the outline's currency; keep text fields short
+"""
+)
+
+OUTLINE_INSTRUCTIONS = """Write a compact outline (at most 200 words, bullet points, no prose) for this trip:
+- For each day: the theme and areas of the popular itinerary and of the off-beat itinerary
+- Recommended areas to stay and the accommodation level
+- The overall budget level and the currency to quote costs in
+The full plan will be written section by section from this outline."""
+
+
+def synthesis_settings() -> dict:
+    try:
+        return {**_DEFAULTS, **(load_config().get("synthesis") or {})}
+    except Exception:
+        return dict(_DEFAULTS)
+
+
+_TRIP_RE = re.compile(r"\b(trip|itinerar\w*|plan\w*|holiday|vacation|getaway|visit\w*|tour\w*)\b", re.I)
+
+
+def wants_itinerary(question: str, days: Optional[int]) -> bool:
+    """Sectioning only pays off for a full trip plan, not for a quick factual question."""
+    return bool(days) or bool(_TRIP_RE.search(question))
+
+
+def _day_ranges(days: Optional[int], per_section: int) -> list[tuple[int, int]]:
+    if not days or days <= per_section:
+        return [(1, days or 0)]
+    return [(start, min(start + per_section - 1, days)) for start in range(1, days + 1, per_section)]
+
+
+def plan_sections(days: Optional[int], days_per_section: int = _DEFAULTS["days_per_section"]) -> list[Section]:
+    """The plan's sections in output order."""
+    sections = [Section(
+        key="overview", title="Trip Overview & Weather",
+        instruction="A short overview of the trip and what the weather means for packing and activities.",
+        topics=("weather", "places"), part="overview",
+    )]
+
+    for key, label, focus in (
+        ("popular", "Popular Tourist Itinerary", "the well-known sights"),
+        ("offbeat", "Off-beat / Hidden Gems Itinerary", "lesser-known places in and around the destination"),
+    ):
+        for start, end in _day_ranges(days, days_per_section):
+            if not end:
+                span, title = "every day of the trip", label
+            elif start == end:
+                span, title = f"day {start}", f"{label} — Day {start}"
+            else:
+                span, title = f"days {start}–{end}", f"{label} — Days {start}–{end}"
+            if (start, end) == (1, days):
+                title = label
+            sections.append(Section(
+                key=f"{key}_{start}" if end else key, title=title,
+                instruction=f"A day-by-day itinerary for {span} focused on {focus}: activities, "
+                            f"timing, meals nearby and how to get between places.",
+                topics=("places", "weather", "food"), part=key,
+            ))
+
+    sections += [
+        Section(
+            key="stay_food", title="Where to Stay & Eat",
+            instruction="Recommended hotels with approximate per-night cost and restaurants with price ranges.",
+            topics=("stay", "food", "places"), part="stay_food",
+        ),
+        Section(
+            key="transport", title="Getting Around",
+            instruction="Modes of transport available, with typical costs and tips.",
+            topics=("transport", "places"), part="transport",
+        ),
+        Section(
+            key="budget", title="Cost Breakdown & Daily Budget",
+            instruction="A clear cost breakdown table and an approximate per-day budget.",
+            topics=("budget", "stay", "food", "transport"), part="budget",
+        ),
+    ]
+    return sections
+
+
+def _context_for(section: Section, context: dict[str, str]) -> str:
+    parts = [context[t] for t in (*section["topics"], "other") if context.get(t)]
+    if not parts:
+        parts = [text for text in context.values() if text]
+    return "\n\n".join(parts) or "(no data gathered)"
+
+
+def section_messages(
+    section: Section, request: str, outline: str, context: dict[str, str], structured: bool = False,
+) -> list:
+    task = (
+        f"Fill in only the {section['title']} part with the {PART_SCHEMAS[section['part']].__name__} tool."
+        if structured else f"Write only this section, starting with the heading \"## {section['title']}\"."
+    )
+    return [
+        STRUCTURED_SECTION_PROMPT if structured else SECTION_SYSTEM_PROMPT,
+        HumanMessage(content=f"""Trip request:
+{request}
+
+Outline (shared by all sections):
+{outline}
+
+Data:
+{_context_for(section, context)}
+
+{task}
+{section['instruction']}
+"""),
+    ]
+
+
+def _run_sections(
+    sections: list[Section],
+    write: Callable[[Section], str],
+    on_section: Optional[Callable[[Section, str], None]],
+    settings: dict,
+) -> tuple[dict[str, str], dict[str, Exception]]:
+    """
+    `write(section)` → Markdown for every section concurrently. A failed
+    section becomes a short placeholder; if every section fails, the first
+    error is raised.
+    """
+    results: dict[str, str] = {}
+    errors: dict[str, Exception] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(settings["max_parallel"], len(sections)))) as pool:
+        futures = {pool.submit(write, s): s for s in sections}
+        for future in as_completed(futures):
+            section = futures[future]
+            try:
+                text = future.result()
+            except Exception as exc:
+                errors[section["key"]] = exc
+                text = (f"## {section['title']}\n\n_This section could not be generated "
+                        f"({type(exc).__name__}); please check back or ask again._")
+            results[section["key"]] = text
+            if on_section:
+                on_section(section, text)
+
+    if len(errors) == len(sections):
+        raise next(iter(errors.values()))
+    if errors:
+        print(f"⚠️ {len(errors)} of {len(sections)} plan section(s) failed: {', '.join(errors)}")
+    return results, errors
+
+
+def _ordered(sections: list[Section], results: dict[str, str], errors: dict[str, Exception]) -> list[dict]:
+    return [
+        {"key": s["key"], "title": s["title"], "markdown": results[s["key"]], "ok": s["key"] not in errors}
+        for s in sections
+    ]
+
+
+def write_sections(
+    invoke: Callable[[list, int], str],
+    request: str,
+    outline: str,
+    context: dict[str, str],
+    days: Optional[int],
+    on_section: Optional[Callable[[Section, str], None]] = None,
+    settings: Optional[dict] = None,
+) -> SectionedPlan:
+    """
+    Write every section concurrently with `invoke(messages, max_tokens)` and
+    stitch them in order. A failed section becomes a short placeholder; if
+    every section fails, the first error is raised.
+    """
+    settings = settings or synthesis_settings()
+    sections = plan_sections(days, settings["days_per_section"])
+
+    def write(section: Section) -> str:
+        text = str(invoke(section_messages(section, request, outline, context), settings["section_max_tokens"])).strip()
+        return text if text.startswith("#") else f"## {section['title']}\n\n{text}"
+
+    results, errors = _run_sections(sections, write, on_section, settings)
+    ordered = _ordered(sections, results, errors)
+    return SectionedPlan(
+        markdown="\n\n".join(item["markdown"] for item in ordered),
+        sections=ordered,
+        failed=len(errors),
+    )
+
+
+def write_plan(
+    invoke: Callable[[list, type, int], object],
+    request: str,
+    outline: str,
+    context: dict[str, str],
+    days: Optional[int],
+    on_section: Optional[Callable[[Section, str], None]] = None,
+    settings: Optional[dict] = None,
+) -> StructuredPlan:
+    """
+    Structured sectioned synthesis: `invoke(messages, schema, max_tokens)`
+    returns each section's part (utils/plan_model.py → PART_SCHEMAS) and the
+    parts are merged into one TravelPlan. `on_section` gets each part
+    rendered locally; a failed section is listed in the plan's notes.
+    """
+    settings = settings or synthesis_settings()
+    sections = plan_sections(days, settings["days_per_section"])
+    plan = TravelPlan(days=days)
+    merge_lock = threading.Lock()
+
+    def write(section: Section) -> str:
+        messages = section_messages(section, request, outline, context, structured=True)
+        value = invoke(messages, PART_SCHEMAS[section["part"]], settings["section_max_tokens"])
+        with merge_lock:
+            merge_part(plan, section["part"], value)
+        # Rendered from the part alone: other sections may still be merging into `plan`
+        only = TravelPlan(days=days, currency=plan.currency)
+        merge_part(only, section["part"], value)
+        body = "\n".join(part_markdown(only, section["part"])) or "_No data for this section._"
+        return f"## {section['title']}\n\n{body}"
+
+    results, errors = _run_sections(sections, write, on_section, settings)
+    plan.notes += [f"{s['title']} could not be generated." for s in sections if s["key"] in errors]
+    return StructuredPlan(
+        markdown=plan_markdown(plan),
+        sections=_ordered(sections, results, errors),
+        failed=len(errors),
+        plan=plan,
+    )
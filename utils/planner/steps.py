@@ -1,14 +1,81 @@
 
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
 from prompt_library.prompt import SYSTEM_PROMPT
 from langchain_core.messages import HumanMessage
 
+from utils.planner.sections import OUTLINE_INSTRUCTIONS, synthesis_settings, write_sections
+from utils.route_optimizer import format_route, optimize_days, route_settings
+
+
+# -------------------------
+# Step memoization
+# -------------------------
+# Every step is keyed by a hash of the LLM configuration and the fully
+# rendered prompt (which embeds all of the step's inputs), so an unchanged
+# step never calls the LLM twice.
+
+_MEMO_SIZE = 512
+_memo: OrderedDict = OrderedDict()
+_memo_lock = threading.Lock()
+_memo_stats = {"hits": 0, "misses": 0}
+
+
+def llm_identity(llm) -> str:
+    """Model settings that change a step's output."""
+    llm = getattr(llm, "wrapped", llm)
+    parts = [type(llm).__name__]
+    for attr in ("model_name", "model", "temperature", "max_tokens"):
+        if hasattr(llm, attr):
+            parts.append(f"{attr}={getattr(llm, attr)}")
+    return ";".join(parts)
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return json.dumps([[type(m).__name__, m.content] for m in prompt], default=str)
+
+
+def step_key(llm, prompt, **kwargs) -> str:
+    raw = llm_identity(llm) + "\n" + json.dumps(kwargs, sort_keys=True) + "\n" + _prompt_text(prompt)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _invoke(llm, prompt, **kwargs) -> str:
+    """LLM call through the memo; `kwargs` (e.g. max_tokens) are part of the key."""
+    key = step_key(llm, prompt, **kwargs)
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            _memo_stats["hits"] += 1
+            return _memo[key]
+        _memo_stats["misses"] += 1
+
+    content = llm.invoke(prompt, **kwargs).content
+
+    with _memo_lock:
+        _memo[key] = content
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return content
+
+
+def memo_stats() -> dict:
+    with _memo_lock:
+        return {**_memo_stats, "entries": len(_memo)}
+
 
 def weather_constraints(llm, weather_data):
     """
     Convert raw weather data into travel-relevant constraints.
     """
-    return llm.invoke(
+    return _invoke(
+        llm,
         f"""
 You are a travel expert.
 
@@ -19,14 +86,39 @@ Avoid raw data repetition.
 Weather data:
 {weather_data}
 """
-    ).content
+    )
 
 
 def attraction_plan(llm, places_data, travel_style, days):
     """
     Create a day-wise attraction plan.
+    `places_data` is text, or place records with coordinates
+    (utils/place_info.py → PlaceRecord): those are grouped into days and
+    ordered locally (utils/route_optimizer.py), and the LLM only writes the plan.
     """
-    return llm.invoke(
+    if isinstance(places_data, list):
+        route = optimize_days(places_data, max(1, int(days)), per_day=route_settings()["per_day"])
+        return _invoke(
+            llm,
+            f"""
+You are an expert travel planner.
+
+The attractions below are already grouped into {days} days, and each day is
+ordered as a short route by distance. For the travel style "{travel_style}",
+write a {days}-day attraction plan.
+
+Rules:
+- Keep the day grouping and the order within each day
+- Balance busy and relaxed days (e.g. a longer stop or a break on busy days)
+- Do NOT repeat raw text
+
+Day routes:
+{format_route(route)}
+"""
+        )
+
+    return _invoke(
+        llm,
         f"""
 You are an expert travel planner.
 
@@ -42,14 +134,15 @@ Rules:
 Attractions data:
 {places_data}
 """
-    ).content
+    )
 
 
 def stay_strategy(llm, hotels_data, budget):
     """
     Decide where and how to stay.
     """
-    return llm.invoke(
+    return _invoke(
+        llm,
         f"""
 You are a travel accommodation expert.
 
@@ -64,14 +157,15 @@ Avoid listing individual hotels unless necessary.
 Hotel data:
 {hotels_data}
 """
-    ).content
+    )
 
 
 def transport_strategy(llm, transport_data):
     """
     Decide local transport strategy.
     """
-    return llm.invoke(
+    return _invoke(
+        llm,
         f"""
 You are a local transport expert.
 
@@ -83,7 +177,7 @@ Using the information below, design a transport strategy that:
 Transport data:
 {transport_data}
 """
-    ).content
+    )
 
 
 def detailed_itinerary(
@@ -131,4 +225,38 @@ Transport strategy:
         ),
     ]
 
-    return llm.invoke(messages).content
+    return _invoke(llm, messages)
+
+
+def sectioned_itinerary(
+    llm,
+    weather_summary,
+    places_plan,
+    stay_plan,
+    transport_plan,
+    days,
+    on_section=None,
+):
+    """
+    Final itinerary as an outline plus concurrently written, bounded
+    sections (utils/planner/sections.py). Every call goes through the memo.
+    """
+    settings = synthesis_settings()
+    context = {
+        "weather": f"Weather summary:\n{weather_summary}",
+        "places": f"Attraction plan:\n{places_plan}",
+        "stay": f"Stay strategy:\n{stay_plan}",
+        "transport": f"Transport strategy:\n{transport_plan}",
+    }
+    request = f"A {days}-day trip with two itineraries (popular and off-beat)."
+
+    outline = _invoke(
+        llm,
+        [SYSTEM_PROMPT, HumanMessage(content=f"{OUTLINE_INSTRUCTIONS}\n\n{request}\n\n" + "\n\n".join(context.values()))],
+        max_tokens=settings["outline_max_tokens"],
+    )
+    plan = write_sections(
+        lambda messages, max_tokens: _invoke(llm, messages, max_tokens=max_tokens),
+        request, outline, context, days, on_section=on_section, settings=settings,
+    )
+    return plan["markdown"]
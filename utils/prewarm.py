@@ -0,0 +1,279 @@
+"""
+Cache Prewarmer — keep popular destinations warm
+------------------------------------------------
+Traffic is skewed toward a few dozen destinations, so the prewarmer
+refreshes their shared-cache entries (utils/cache_backend.py) before they
+expire, and the first user after a quiet period doesn't pay cold-cache
+latency:
+
+  - current weather and forecast   ("weather", "forecast")
+  - Google place searches          ("places"; kinds from prewarm.place_kinds)
+  - exchange-rate tables           ("fx"; the pivot currency, each popular
+                                    destination's currency and the most
+                                    requested currencies)
+
+for the top-N destinations of the query log (utils/query_log.py). An entry
+is refreshed when it is missing or has less than `refresh_ahead` of its
+TTL left.
+
+Every refresh counts as one API call against a rolling hourly quota
+(`max_calls_per_hour`); when it runs out, the least popular work waits for
+the next hour. Refreshes run `max_parallel` at a time on the prewarmer's
+own threads, outside the planner's admission pool: no slot is held, but
+each fetch first checks that the planner has a free slot and nobody
+queued, and is skipped otherwise. Only one worker per interval runs a
+cycle (CacheBackend.try_lock on a shared-cache entry).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from utils.admission import get_admission_controller
+from utils.budget_engine import PIVOT_CURRENCY
+from utils.cache_backend import get_cache
+from utils.config_loader import load_config
+from utils.query_log import QueryLog, get_query_log
+
+
+_DEFAULTS = {
+    "enabled": True,
+    "top_n": 20,
+    "interval_seconds": 300,
+    "refresh_ahead": 0.2,
+    "max_calls_per_hour": 200,
+    "max_parallel": 4,          # concurrent refreshes within a cycle
+    "place_kinds": ["attractions", "restaurants"],
+}
+
+
+class _HourlyQuota:
+    """Rolling one-hour call budget."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._calls: deque[float] = deque()
+        self._lock = threading.Lock()       # taken from the refresh threads
+
+    def used(self) -> int:
+        with self._lock:
+            return self._used()
+
+    def _used(self) -> int:
+        cutoff = time.monotonic() - 3600
+        while self._calls and self._calls[0] < cutoff:
+            self._calls.popleft()
+        return len(self._calls)
+
+    def take(self) -> bool:
+        with self._lock:
+            if self._used() >= self.limit:
+                return False
+            self._calls.append(time.monotonic())
+            return True
+
+
+class CachePrewarmer:
+    """Refreshes shared-cache entries for the most requested destinations."""
+
+    def __init__(
+        self,
+        query_log: Optional[QueryLog] = None,
+        top_n: int = _DEFAULTS["top_n"],
+        interval_seconds: float = _DEFAULTS["interval_seconds"],
+        refresh_ahead: float = _DEFAULTS["refresh_ahead"],
+        max_calls_per_hour: int = _DEFAULTS["max_calls_per_hour"],
+        max_parallel: int = _DEFAULTS["max_parallel"],
+        place_kinds: tuple = tuple(_DEFAULTS["place_kinds"]),
+        **_ignored,
+    ):
+        self.query_log = query_log or get_query_log()
+        self.cache = get_cache()
+        self.top_n = top_n
+        self.interval_seconds = interval_seconds
+        self.refresh_ahead = refresh_ahead
+        self.place_kinds = tuple(place_kinds)
+        self.quota = _HourlyQuota(max_calls_per_hour)
+        self.max_parallel = max(1, max_parallel)
+
+        self._services = None
+        self._lock = threading.Lock()           # guards _stats
+        self._cycle_lock = threading.Lock()     # one cycle at a time in this process
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "cycles": 0, "refreshed": 0, "fresh": 0, "errors": 0,
+            "skipped_quota": 0, "deferred_busy": 0, "skipped_busy": 0, "skipped_other_worker": 0,
+            "last_cycle_at": None, "last_cycle_seconds": 0.0,
+        }
+
+    # ---- work list ----
+
+    def _clients(self):
+        """API clients, created on first use with the same settings as the tools."""
+        if self._services is None:
+            from utils.currency_converter import CurrencyConverter
+            from utils.place_info import GooglePlaceSearchTool
+            from utils.weather import WeatherForecastTool
+
+            self._services = (
+                WeatherForecastTool(os.environ.get("OPENWEATHERMAP_API_KEY")),
+                GooglePlaceSearchTool(os.environ.get("GPLACES_API_KEY")),
+                CurrencyConverter(os.environ.get("EXCHANGE_RATE_API_KEY")),
+            )
+        return self._services
+
+    def tasks(self) -> list[tuple[str, str, Callable[[], object]]]:
+        """(namespace, cache key, refresh) in priority order: most popular destination first."""
+        from utils.place_info import place_cache_key
+        from utils.weather import forecast_cache_key, weather_cache_key
+
+        weather, places, fx = self._clients()
+        tasks = []
+        currencies = [PIVOT_CURRENCY]
+        for item in self.query_log.top(self.top_n):
+            if not item["currency"]:
+                continue        # not a gazetteer place (rows logged before unknown names were dropped)
+            place = item["label"]
+            tasks.append(("weather", weather_cache_key(place),
+                          lambda p=place: weather.get_current_weather(p, refresh=True)))
+            tasks.append(("forecast", forecast_cache_key(place),
+                          lambda p=place: weather.get_forecast_weather(p, refresh=True)))
+            for kind in self.place_kinds:
+                tasks.append(("places", place_cache_key("google", kind, place),
+                              lambda k=kind, p=place: places.search(k, p, refresh=True)))
+            currencies.append(item["currency"])
+        currencies += [item["key"] for item in self.query_log.top(self.top_n, kind="currency")]
+
+        for code in dict.fromkeys(currencies):
+            tasks.append(("fx", code, lambda c=code: fx.get_rates(c, refresh=True)))
+        return tasks
+
+    def _needs_refresh(self, namespace: str, key: str) -> bool:
+        remaining = self.cache.ttl_remaining(namespace, key)
+        return remaining is None or remaining < self.refresh_ahead * self.cache.ttl_for(namespace)
+
+    # ---- cycles ----
+
+    @staticmethod
+    def _planner_busy() -> bool:
+        """True when users are queued for the planner or every admission slot is taken."""
+        load = get_admission_controller().metrics()
+        return bool(load["queued"]) or load["running"] >= load["max_concurrent"]
+
+    def _refresh_if_idle(self, refresh: Callable[[], object]) -> str:
+        """Run one refresh unless the planner is busy or the quota is spent."""
+        if self._planner_busy():
+            return "deferred_busy"
+        if not self.quota.take():
+            return "skipped_quota"
+        refresh()
+        return "refreshed"
+
+    def run_once(self) -> dict:
+        """One prewarm cycle; returns what it did."""
+        done = {"refreshed": 0, "fresh": 0, "errors": 0, "skipped_quota": 0, "deferred_busy": 0}
+
+        # One worker per interval across processes / hosts; the entry expires on its own
+        token = self.cache.try_lock("prewarm", "leader", max(self.interval_seconds - 1, 1))
+        if token is None:
+            self._count("skipped_other_worker")
+            return done
+        if self._planner_busy():
+            # Users are waiting for the planner; let any worker try again
+            self.cache.unlock("prewarm", "leader", token)
+            self._count("skipped_busy")
+            return done
+
+        started = time.monotonic()
+        with self._cycle_lock:
+            due = []
+            for namespace, key, refresh in self.tasks():
+                if self._needs_refresh(namespace, key):
+                    due.append((namespace, key, refresh))
+                else:
+                    done["fresh"] += 1
+
+            # Checked per fetch, so a burst of users pauses the rest of the cycle
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+                futures = {pool.submit(self._refresh_if_idle, refresh): (namespace, key) for namespace, key, refresh in due}
+                for future in as_completed(futures):
+                    try:
+                        done[future.result()] += 1
+                    except Exception as exc:
+                        done["errors"] += 1
+                        print(f"⚠️ Prewarm {':'.join(futures[future])} failed: {exc}")
+
+        with self._lock:
+            self._stats["cycles"] += 1
+            for field, value in done.items():
+                self._stats[field] += value
+            self._stats["last_cycle_at"] = time.time()
+            self._stats["last_cycle_seconds"] = time.monotonic() - started
+        if done["refreshed"] or done["skipped_quota"] or done["deferred_busy"]:
+            print(
+                f"🔥 Prewarm: {done['refreshed']} refreshed, {done['fresh']} still fresh, "
+                f"{done['skipped_quota']} over quota, {done['deferred_busy']} deferred (planner busy)"
+            )
+        return done
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._stats[field] += 1
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                print(f"⚠️ Prewarm cycle failed: {exc}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> "CachePrewarmer":
+        """Run cycles every `interval_seconds` on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="cache-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = dict(self._stats)
+        result["calls_last_hour"] = self.quota.used()
+        result["quota_per_hour"] = self.quota.limit
+        result["top"] = [(item["label"], round(item["score"], 1)) for item in self.query_log.top(self.top_n)]
+        return result
+
+
+_prewarmer: Optional[CachePrewarmer] = None
+_prewarmer_lock = threading.Lock()
+
+
+def prewarm_settings() -> dict:
+    try:
+        return {**_DEFAULTS, **(load_config().get("prewarm") or {})}
+    except Exception:
+        return dict(_DEFAULTS)
+
+
+def get_prewarmer() -> CachePrewarmer:
+    """Process-wide prewarmer configured by config.yaml → prewarm (not started)."""
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = CachePrewarmer(**prewarm_settings())
+        return _prewarmer
+
+
+if __name__ == "__main__":
+    # One cycle, e.g. from cron: python -m utils.prewarm
+    print(get_prewarmer().run_once())
@@ -0,0 +1,236 @@
+"""
+Provenance — link plan claims to the tool outputs they came from
+----------------------------------------------------------------
+The agent's ToolMessages hold the live data a plan was written from.
+`ProvenanceIndex` indexes the checkable facts in those outputs:
+
+  - numbers (prices, temperatures, percentages, totals), keyed by their
+    rounded value so "€28" matches "28.0" in a budget breakdown
+  - clock times, normalized to 24-hour HH:MM
+  - place names: Google Places result names ("1. Musée d'Orsay") and
+    multi-word proper names in free text
+
+`link(plan)` scans each plan sentence once, with hash lookups for every
+number, time and name n-gram (up to `_MAX_NAME_WORDS` words), so linking
+is linear in the size of the plan plus the outputs. The report names the
+tool behind every linked value; the fast critic (utils/fast_critic.py)
+uses it for `verified_by_tools` and to drop grounded claims from the
+uncertain list.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Optional, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from utils.fast_critic import CURRENCY_PATTERN, TIME_RE, split_sentences
+from utils.gazetteer import normalize_place_name
+
+
+class ToolOutput(TypedDict):
+    tool: str
+    args: dict
+    content: str
+
+
+class Link(TypedDict):
+    sentence: str      # plan sentence (trimmed to 160 chars)
+    kind: str          # "price" | "temperature" | "percent" | "number" | "time" | "place"
+    value: str         # as written in the plan (place names normalized)
+    tool: str          # first tool whose output holds the value
+    source: str        # the output line it was found in (trimmed to 120 chars)
+
+
+class ProvenanceReport(TypedDict):
+    links: list[Link]
+    verified_by_tools: list[str]    # tools with at least one linked value, by link count
+    sentences: int
+    grounded_sentences: int
+
+
+_MAX_NAME_WORDS = 6
+
+# Output lines that only carry identifiers (phone numbers, ids, URLs)
+_SKIP_LINE_RE = re.compile(r"^\s*(?:Google place ID|Phone|Website|URL)\s*:", re.IGNORECASE)
+_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?\b")   # forecast timestamps
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d[\d,]*(?:\.\d+)?(?![\w])")
+_LIST_NAME_RE = re.compile(r"^\s*\d+\.\s+(.+?)\s*$")
+_NAME_CONNECTORS = r"(?:of|the|de|la|le|les|del|di|du|da|des|and|&|von|van)"
+_PROPER_NAME_RE = re.compile(
+    rf"\b[A-Z][\w'’.-]+(?:\s+(?:{_NAME_CONNECTORS}\s+)*[A-Z][\w'’.-]+)+"
+)
+_UNIT_BEFORE_RE = re.compile(rf"{CURRENCY_PATTERN}\s?$", re.IGNORECASE)
+_UNIT_AFTER_RE = re.compile(rf"^\s?(?:°\s?[CF]?|%|{CURRENCY_PATTERN}\b)", re.IGNORECASE)
+
+
+def tool_outputs_from_messages(messages: list) -> list[ToolOutput]:
+    """
+    Successful tool results since the latest question, with the arguments
+    they were called with. Earlier turns' results are left out: a plan is
+    only grounded by what this turn fetched (or reused, which re-adds it).
+    """
+    start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+    args_by_id = {}
+    for message in messages[start:]:
+        if isinstance(message, AIMessage):
+            for call in message.tool_calls or []:
+                args_by_id[call["id"]] = call["args"]
+    return [
+        ToolOutput(tool=m.name, args=args_by_id.get(m.tool_call_id, {}), content=str(m.content))
+        for m in messages[start:]
+        if isinstance(m, ToolMessage) and m.status != "error"
+    ]
+
+
+def _time_key(text: str) -> Optional[str]:
+    match = re.match(r"\s*(\d{1,2})(?::(\d{2}))?\s?(am|pm)?", text, re.IGNORECASE)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").lower()
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    return f"{hour:02d}:{minute:02d}"
+
+
+def _number_keys(text: str) -> set[int]:
+    """Rounded value(s) of a number; both neighbours for a fraction (18.5 → 18, 19)."""
+    value = float(text.replace(",", ""))
+    return {math.floor(value), math.ceil(value)}
+
+
+def _worth_indexing(text: str) -> bool:
+    """Single digits ("3 days", "1.") say nothing about provenance."""
+    return "." in text or abs(float(text.replace(",", ""))) >= 10
+
+
+def _number_kind(line: str, start: int, end: int) -> str:
+    before, after = line[max(0, start - 4):start], line[end:end + 5]
+    if re.match(r"\s?(?:°|degrees?\b)", line[end:end + 10]):
+        return "temperature"
+    if after.lstrip().startswith("%"):
+        return "percent"
+    if _UNIT_BEFORE_RE.search(before) or _UNIT_AFTER_RE.match(after):
+        return "price"
+    return "number"
+
+
+def _values(line: str) -> list[tuple[str, str, tuple]]:
+    """
+    (kind, text, key) for every time and number in a line. Timestamps are
+    dropped and times are taken before numbers; temperatures get their own
+    keys, so a 15 °C forecast never grounds a €15 ticket.
+    """
+    found = []
+    line = _DATE_RE.sub(lambda m: " " * len(m.group(0)), line)
+    for match in TIME_RE.finditer(line):
+        key = _time_key(match.group(0))
+        if key:
+            found.append(("time", match.group(0), ("time", key)))
+    rest = TIME_RE.sub(lambda m: " " * len(m.group(0)), line)
+    for match in _NUMBER_RE.finditer(rest):
+        text = match.group(0)
+        if _worth_indexing(text):
+            kind = _number_kind(rest, match.start(), match.end())
+            unit = "temperature" if kind == "temperature" else "amount"
+            for key in _number_keys(text):
+                found.append((kind, text, (unit, key)))
+    return found
+
+
+class ProvenanceIndex:
+    """Fact → (tool, source line) for a run's tool outputs."""
+
+    def __init__(self, outputs: list[ToolOutput]):
+        self.outputs = outputs
+        self._facts: dict[tuple, tuple[str, str]] = {}
+        self._reports: dict[str, ProvenanceReport] = {}
+
+        for output in outputs:
+            # The place the tool was asked about is in every line of its output
+            queried = {normalize_place_name(str(v)) for v in output["args"].values() if isinstance(v, str)}
+            for line in output["content"].splitlines():
+                if not line.strip() or _SKIP_LINE_RE.match(line):
+                    continue
+                source = (output["tool"], line.strip()[:120])
+                for _, _, key in _values(line):
+                    self._facts.setdefault(key, source)
+                for name in self._names(line):
+                    normalized = normalize_place_name(name)
+                    if normalized and normalized not in queried:
+                        self._facts.setdefault(("place", normalized), source)
+
+    @staticmethod
+    def _names(line: str) -> list[str]:
+        listed = _LIST_NAME_RE.match(line)
+        names = [listed.group(1)] if listed else []
+        return names + _PROPER_NAME_RE.findall(line)
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def _place_links(self, sentence: str) -> list[tuple[str, tuple]]:
+        """Longest indexed name at each word position of the sentence."""
+        words = normalize_place_name(sentence).split()
+        found, i = [], 0
+        while i < len(words):
+            for n in range(min(_MAX_NAME_WORDS, len(words) - i), 0, -1):
+                key = ("place", " ".join(words[i:i + n]))
+                if key in self._facts:
+                    found.append((key[1], key))
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def _sentence_links(self, sentence: str) -> list[Link]:
+        links, seen = [], set()
+        candidates = [(kind, text, key) for kind, text, key in _values(sentence)]
+        candidates += [("place", text, key) for text, key in self._place_links(sentence)]
+        for kind, text, key in candidates:
+            if key not in self._facts or (kind, text) in seen:
+                continue
+            seen.add((kind, text))
+            tool, source = self._facts[key]
+            links.append(Link(sentence=sentence[:160], kind=kind, value=text, tool=tool, source=source))
+        return links
+
+    def grounded(self, text: str) -> bool:
+        """True when every number / time in `text` is in a tool output (and it has at least one)."""
+        values = _values(text)
+        if not values:
+            return False
+        by_text: dict[str, bool] = {}
+        for _, value, key in values:
+            by_text[value] = by_text.get(value, False) or key in self._facts
+        return all(by_text.values())
+
+    def link(self, plan: str) -> ProvenanceReport:
+        """Every indexed value the plan mentions, with the tool output it came from."""
+        if plan in self._reports:
+            return self._reports[plan]
+
+        sentences = split_sentences(plan)
+        links: list[Link] = []
+        grounded = 0
+        for sentence in sentences:
+            found = self._sentence_links(sentence)
+            grounded += bool(found)
+            links += found
+
+        counts: dict[str, int] = {}
+        for item in links:
+            counts[item["tool"]] = counts.get(item["tool"], 0) + 1
+        report = ProvenanceReport(
+            links=links,
+            verified_by_tools=sorted(counts, key=lambda tool: -counts[tool]),
+            sentences=len(sentences),
+            grounded_sentences=grounded,
+        )
+        self._reports[plan] = report
+        return report
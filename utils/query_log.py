@@ -0,0 +1,145 @@
+"""
+Query Log — destination popularity over time
+--------------------------------------------
+Every planner request records the destinations (canonicalized through the
+gazetteer, so "NYC" and "New York" count once; names the gazetteer does
+not know are not counted) and the currency it mentions, in hourly buckets in a small SQLite file shared by all workers
+on the host.
+
+`top()` ranks by exponentially decayed counts (`half_life_hours`), so
+yesterday's spike fades while steady favourites stay on top. The cache
+prewarmer (utils/prewarm.py) reads it to decide what to keep warm.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, TypedDict
+
+from utils.config_loader import load_config
+from utils.gazetteer import canonical_place_key, get_gazetteer, trip_stops
+from utils.query_parser import parse_query
+
+
+_DEFAULTS = {
+    "query_log_path": "./output/query_log.sqlite3",
+    "half_life_hours": 24,
+    "window_hours": 168,      # buckets older than this are pruned
+}
+
+_PRUNE_EVERY = 500            # records between prunes
+
+
+class PopularItem(TypedDict):
+    key: str                  # canonical place key / ISO currency code
+    label: str                # "City, Country" (what tools are called with) / code
+    currency: Optional[str]   # the place's local currency, if known
+    score: float              # decayed request count
+
+
+class QueryLog:
+    """Hourly destination / currency counts with decayed ranking."""
+
+    def __init__(
+        self,
+        path: str = _DEFAULTS["query_log_path"],
+        half_life_hours: float = _DEFAULTS["half_life_hours"],
+        window_hours: float = _DEFAULTS["window_hours"],
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.half_life_hours = half_life_hours
+        self.window_hours = window_hours
+        self.gazetteer = get_gazetteer()
+
+        self._lock = threading.Lock()
+        self._records = 0
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS popularity ("
+            " kind TEXT NOT NULL,"            # 'place' | 'currency'
+            " key TEXT NOT NULL,"
+            " bucket INTEGER NOT NULL,"       # hours since the epoch
+            " label TEXT NOT NULL,"
+            " currency TEXT,"
+            " count INTEGER NOT NULL,"
+            " PRIMARY KEY (kind, key, bucket))"
+        )
+
+    @staticmethod
+    def _bucket(now: Optional[float] = None) -> int:
+        return int((time.time() if now is None else now) // 3600)
+
+    def record(self, question: str, now: Optional[float] = None) -> list[str]:
+        """Count the destinations and currency of one request; returns the place keys."""
+        parsed = parse_query(question)
+        rows = []
+        for name in trip_stops(parsed["destinations"]):
+            known = self.gazetteer.resolve(name)
+            if known:
+                rows.append(("place", canonical_place_key(name), self.gazetteer.display_name(known), known["currency"]))
+        if parsed["currency"]:
+            rows.append(("currency", parsed["currency"], parsed["currency"], parsed["currency"]))
+        if not rows:
+            return []
+
+        bucket = self._bucket(now)
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO popularity (kind, key, bucket, label, currency, count) VALUES (?, ?, ?, ?, ?, 1)"
+                " ON CONFLICT (kind, key, bucket) DO UPDATE SET count = count + 1",
+                [(kind, key, bucket, label, currency) for kind, key, label, currency in rows],
+            )
+            self._records += 1
+            if self._records % _PRUNE_EVERY == 0:
+                self.prune(now)
+        return [row[1] for row in rows if row[0] == "place"]
+
+    def top(self, n: int = 20, kind: str = "place", now: Optional[float] = None) -> list[PopularItem]:
+        """The `n` most popular keys of `kind`, by decayed count."""
+        current = self._bucket(now)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, label, currency, bucket, count FROM popularity WHERE kind = ? AND bucket > ?",
+                (kind, current - self.window_hours),
+            ).fetchall()
+
+        items: dict[str, PopularItem] = {}
+        for key, label, currency, bucket, count in rows:
+            item = items.setdefault(key, PopularItem(key=key, label=label, currency=currency, score=0.0))
+            item["score"] += count * 0.5 ** ((current - bucket) / self.half_life_hours)
+        return sorted(items.values(), key=lambda item: item["score"], reverse=True)[:n]
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete buckets outside the window; returns rows removed."""
+        cursor = self.conn.execute(
+            "DELETE FROM popularity WHERE bucket <= ?", (self._bucket(now) - self.window_hours,)
+        )
+        return cursor.rowcount
+
+
+_log: Optional[QueryLog] = None
+_log_lock = threading.Lock()
+
+
+def get_query_log() -> QueryLog:
+    """Process-wide log configured by config.yaml → prewarm."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            try:
+                settings = {**_DEFAULTS, **(load_config().get("prewarm") or {})}
+            except Exception:
+                settings = dict(_DEFAULTS)
+            _log = QueryLog(
+                path=settings["query_log_path"],
+                half_life_hours=settings["half_life_hours"],
+                window_hours=settings["window_hours"],
+            )
+        return _log
@@ -0,0 +1,150 @@
+"""
+Query Parser — fast, deterministic extraction of trip parameters
+----------------------------------------------------------------
+Pulls the obvious facts out of a raw travel question without an LLM call:
+  - destinations  ("trip to Paris and Rome", "3 days in Kyoto")
+  - days          ("5-day", "two weeks", "a weekend")
+  - budget tier   ("budget" / "mid" / "luxury")
+  - currency      (ISO code, symbol or currency name)
+
+Used to start tool lookups speculatively while the agent's first LLM call
+is still deciding what to do. Being wrong only costs a wasted prefetch.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional, TypedDict
+
+
+class ParsedQuery(TypedDict):
+    destinations: list[str]        # in order of appearance, de-duplicated
+    days: Optional[int]
+    budget_tier: Optional[str]     # "budget" | "mid" | "luxury"
+    currency: Optional[str]        # ISO 4217 code
+
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+}
+
+_DAYS_RE = re.compile(
+    r"\b(\d{1,2}|" + "|".join(_NUMBER_WORDS) + r")[\s-]*(day|night|week)s?\b",
+    re.IGNORECASE,
+)
+_WEEKEND_RE = re.compile(r"\b(long\s+)?weekend\b", re.IGNORECASE)
+
+_BUDGET_TIERS = [
+    ("luxury", re.compile(r"\b(luxur\w*|5[\s-]?star|five[\s-]star|premium|high[\s-]end|splurge)\b", re.I)),
+    ("budget", re.compile(r"\b(budget(?!\s+(?:breakdown|estimate|plan|table|summary|detail))|cheap\w*|backpack\w*|low[\s-]cost|affordable|shoestring|hostel)\b", re.I)),
+    ("mid", re.compile(r"\b(mid[\s-]?range|moderate|mid[\s-]budget|comfortable|3[\s-]?star)\b", re.I)),
+]
+
+_CURRENCY_CODES = {
+    "USD", "EUR", "GBP", "JPY", "INR", "AUD", "CAD", "CHF", "CNY", "SGD",
+    "AED", "THB", "NZD", "HKD", "KRW", "MXN", "BRL", "ZAR", "SEK", "NOK",
+    "DKK", "TRY", "IDR", "MYR", "VND", "PHP", "LKR", "NPR", "EGP", "MAD",
+}
+_CURRENCY_SYMBOLS = {"€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR", "$": "USD", "฿": "THB", "₩": "KRW"}
+_CURRENCY_WORDS = {
+    "euro": "EUR", "euros": "EUR", "dollar": "USD", "dollars": "USD",
+    "pound": "GBP", "pounds": "GBP", "sterling": "GBP", "yen": "JPY",
+    "rupee": "INR", "rupees": "INR", "yuan": "CNY", "renminbi": "CNY",
+    "baht": "THB", "dirham": "AED", "dirhams": "AED",
+    "franc": "CHF", "francs": "CHF", "peso": "MXN", "pesos": "MXN",
+}
+
+# A destination is a run of capitalized words following a travel preposition/verb
+# (any case: "Visit Rio"). "from" is not one: it names the origin.
+_DEST_TRIGGER = r"(?:\b(?i:to|in|at|visit(?:ing)?|explore|exploring|around|via|then|and)\s+|,\s*)"
+# "." only inside a word ("St.Ives", "D.C"), so a name stops at the end of a
+# sentence; abbreviations before a space are listed ("St. Ives", "Mt. Fuji")
+_ABBREVIATION = r"(?:St|Ste|Sta|Mt|Ft|Pt)\.\s*"
+_WORD = rf"(?:{_ABBREVIATION})?[A-Z][\w'’-]*(?:\.(?=\w)[\w'’-]+)*"
+_CAPITALIZED = rf"{_WORD}(?:\s+(?:de|del|da|di|la|le|el|of|upon|am|sur)\s+{_WORD}|\s+{_WORD})*"
+_DEST_RE = re.compile(rf"{_DEST_TRIGGER}({_CAPITALIZED})")
+# First item of a list ("6 days: Paris, Rome and Barcelona"): kept when the next item is a destination
+_LIST_HEAD_RE = re.compile(rf"\b({_CAPITALIZED})(?=(?:\s*,\s*|\s+and\s+)({_CAPITALIZED}))")
+# Where the trip starts, not a stop ("flying from London", "leaving Oslo")
+_ORIGIN_RE = re.compile(rf"\b(?i:from|leaving(?:\s+from)?|departing(?:\s+from)?)\s+({_CAPITALIZED})")
+
+_NOT_PLACES = {
+    "I", "I'm", "Im", "Me", "My", "We", "Please", "Plan", "Trip", "Tour", "Day", "Days",
+    "Budget", "Luxury", "Weekend", "Week", "Also", "Include", "With", "And", "The",
+    "January", "February", "March", "April", "May", "June", "July", "August",
+    "September", "October", "November", "December", "Christmas", "Easter",
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+} | _CURRENCY_CODES
+
+
+def _parse_days(question: str) -> Optional[int]:
+    match = _DAYS_RE.search(question)
+    if match:
+        raw, unit = match.group(1).lower(), match.group(2).lower()
+        count = int(raw) if raw.isdigit() else _NUMBER_WORDS[raw]
+        if unit == "week":
+            return count * 7
+        if unit == "night":
+            return count + 1
+        return count
+    weekend = _WEEKEND_RE.search(question)
+    if weekend:
+        return 3 if weekend.group(1) else 2
+    return None
+
+
+def _parse_budget(question: str) -> Optional[str]:
+    for tier, pattern in _BUDGET_TIERS:
+        if pattern.search(question):
+            return tier
+    return None
+
+
+def _parse_currency(question: str) -> Optional[str]:
+    for token in re.findall(r"\b[A-Z]{3}\b", question):
+        if token in _CURRENCY_CODES:
+            return token
+    for symbol, code in _CURRENCY_SYMBOLS.items():
+        if symbol in question:
+            return code
+    for word in re.findall(r"[a-z]+", question.lower()):
+        if word in _CURRENCY_WORDS:
+            return _CURRENCY_WORDS[word]
+    return None
+
+
+def _place_name(text: str) -> str:
+    words = text.strip(" .,'’").split()
+    # Drop leading/trailing non-place words ("Paris Budget", "Rome Please")
+    while words and words[0].strip(".,") in _NOT_PLACES:
+        words.pop(0)
+    while words and words[-1].strip(".,") in _NOT_PLACES:
+        words.pop()
+    name = " ".join(words).strip(" .,")
+    return "" if name in _NOT_PLACES else name
+
+
+def _parse_destinations(question: str) -> list[str]:
+    origins = {_place_name(m.group(1)) for m in _ORIGIN_RE.finditer(question)}
+    found = {m.start(1): _place_name(m.group(1)) for m in _DEST_RE.finditer(question)}
+    for match in _LIST_HEAD_RE.finditer(question):
+        if found.get(match.start(2)):
+            found.setdefault(match.start(1), _place_name(match.group(1)))
+
+    destinations: list[str] = []
+    for _, name in sorted(found.items()):
+        if name and name not in origins and name not in destinations:
+            destinations.append(name)
+    return destinations
+
+
+def parse_query(question: str) -> ParsedQuery:
+    """Extract destinations, day count, budget tier and currency from a question."""
+    return ParsedQuery(
+        destinations=_parse_destinations(question),
+        days=_parse_days(question),
+        budget_tier=_parse_budget(question),
+        currency=_parse_currency(question),
+    )
@@ -9,16 +9,29 @@ Returns a structured trustworthiness assessment with:
   - verified_by_tools (which tools grounded the answer)
   - summary           (one-line verdict)
 
-No new API keys needed — uses the same Groq model already configured.
-Falls back gracefully if the critic call fails.
+A rule-based fast path (utils/fast_critic.py) scores every plan first;
+only plans whose score falls in the ambiguous band
+(config.yaml → critic.ambiguous_band) are sent to the critic LLM.
+With the run's tool outputs indexed (utils/provenance.py),
+`verified_by_tools` comes from exact matches rather than the critic's
+guess, and grounded claims are dropped from `uncertain_claims`.
+
+No new API keys needed — uses the same OpenAI key already configured.
+Falls back to the rule-based result if the critic call fails.
+Critic verdicts are shared across workers via utils/cache_backend.py.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import re
-from typing import TypedDict
+import threading
+from typing import TYPE_CHECKING, Optional, TypedDict
+
+if TYPE_CHECKING:
+    from utils.provenance import ProvenanceIndex
 
 
 class ValidationResult(TypedDict):
@@ -62,19 +75,94 @@ A plan that says "tickets are approximately €20-30, verify on the official sit
 """
 
 
-def validate(question: str, plan: str) -> ValidationResult:
+_DEFAULT_BAND = (45, 80)
+
+_stats = {"fast_path": 0, "escalated": 0, "critic_failed": 0}
+_stats_lock = threading.Lock()
+
+
+def critic_stats() -> dict:
+    """How many plans were settled by the rule-based path vs. the LLM critic."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def ambiguous_band() -> tuple[int, int]:
+    """Inclusive score range in which the LLM critic is consulted."""
+    try:
+        from utils.config_loader import load_config
+        low, high = load_config().get("critic", {}).get("ambiguous_band", _DEFAULT_BAND)
+        return int(low), int(high)
+    except Exception:
+        return _DEFAULT_BAND
+
+
+def validate(
+    question: str,
+    plan: str,
+    timeout: float = 30,
+    band: tuple[int, int] | None = None,
+    provenance: Optional["ProvenanceIndex"] = None,
+    critic_plan: Optional[str] = None,
+) -> ValidationResult:
     """
-    Run the critic LLM on the generated travel plan.
-    Never raises — returns a safe default on any failure.
+    Score the generated travel plan: rule-based first, critic LLM only when
+    the rule-based score is inside the ambiguous band.
+    `timeout` is the critic's share of the request deadline (seconds);
+    `provenance` indexes the run's tool outputs for exact grounding;
+    `critic_plan` is what the critic LLM reads instead of `plan` (a structured
+    plan's compact fact listing, utils/plan_model.py → compact_text).
+    Never raises — falls back to the rule-based result on any failure.
     """
+    from utils.fast_critic import fast_validate
+
+    fast = fast_validate(question, plan, provenance)
+    low, high = band or ambiguous_band()
+    if not low <= fast["confidence_score"] <= high:
+        _count("fast_path")
+        return fast
+
+    _count("escalated")
     try:
-        return _run_critic(question, plan)
+        result = _cached_critic(question, critic_plan or plan, timeout)
     except Exception as exc:
         print(f"⚠️ ResponseValidator failed (non-critical): {exc}")
-        return _safe_default()
+        result = _safe_default()
+
+    if result["confidence_score"] == -1:
+        _count("critic_failed")
+        return fast
+    if provenance is not None:
+        # Grounding is exact from the tool outputs; the critic only judges the rest
+        result = ValidationResult(**{
+            **result,
+            "verified_by_tools": fast["verified_by_tools"],
+            "uncertain_claims": [c for c in result["uncertain_claims"] if not provenance.grounded(c)],
+        })
+    return result
+
+
+def _cached_critic(question: str, plan: str, timeout: float = 30) -> ValidationResult:
+    """Critic verdicts are shared across workers (cache namespace "critic")."""
+    from utils.cache_backend import get_cache
+
+    key = hashlib.sha256(f"{question}\n{plan}".encode("utf-8")).hexdigest()
+
+    def compute():
+        result = _run_critic(question, plan, timeout)
+        # Failed checks are not cached, so a later request can retry
+        return None if result["confidence_score"] == -1 else dict(result)
+
+    cached = get_cache().get_or_compute("critic", key, compute, lock_ttl=timeout)
+    return ValidationResult(**cached) if cached else _safe_default()
 
 
-def _run_critic(question: str, plan: str) -> ValidationResult:
+def _run_critic(question: str, plan: str, timeout: float = 30) -> ValidationResult:
     from langchain_openai import ChatOpenAI
 
     api_key = os.getenv("OPENAI_API_KEY")
@@ -85,7 +173,7 @@ def _run_critic(question: str, plan: str) -> ValidationResult:
         model="gpt-4o-mini",
         temperature=0,
         max_tokens=512,
-        timeout=30,
+        timeout=timeout,
     )
 
     prompt = _CRITIC_PROMPT.format(question=question, plan=plan[:3000])  # cap length
@@ -0,0 +1,273 @@
+"""
+Route Optimizer — attractions grouped into days and ordered by distance
+-----------------------------------------------------------------------
+Asked to "group attractions day-wise" from a text list, the LLM has no
+distances: days zig-zag across the city and tokens go into guessing
+geography. Given place records with coordinates (utils/place_info.py →
+GooglePlaceSearchTool.records), the optimizer computes the days locally:
+
+  1. a haversine distance matrix over all places (NumPy, one broadcast)
+  2. places clustered into one group per day: k-means on a local planar
+     projection, then capacity-balanced so no day gets more than
+     ceil(places / days) (or `per_day`) stops
+  3. each day ordered as an open walking route: nearest neighbour from
+     the group's outermost place, improved with 2-opt (the best
+     non-overlapping moves of the whole delta matrix per round)
+
+`format_route()` gives the planner a compact ordered list. Hundreds of
+places take milliseconds (python -m benchmarks.route_optimizer).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional, TypedDict
+
+import numpy as np
+
+from utils.config_loader import load_config
+
+
+_DEFAULTS = {
+    "per_day": 4,       # attractions planned per day; the rest are listed as not placed
+}
+
+EARTH_RADIUS_KM = 6371.0088
+_KMEANS_ITERATIONS = 25
+_BALANCE_ROUNDS = 4
+
+
+class DayRoute(TypedDict):
+    day: int
+    places: list[dict]      # place records in visiting order
+    km: float               # distance between consecutive stops, straight line
+
+
+class RoutePlan(TypedDict):
+    days: list[DayRoute]
+    total_km: float
+    skipped: list[str]      # places without coordinates or beyond days × per_day
+
+
+def route_settings() -> dict:
+    try:
+        return {**_DEFAULTS, **(load_config().get("routes") or {})}
+    except Exception:
+        return dict(_DEFAULTS)
+
+
+def distance_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km between every pair of points."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat = lat[:, np.newaxis] - lat[np.newaxis, :]
+    dlon = lon[:, np.newaxis] - lon[np.newaxis, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, np.newaxis] * np.cos(lat)[np.newaxis, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _project(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """(n, 2) km on an equirectangular projection around the points' mean latitude."""
+    scale = math.cos(math.radians(float(lat.mean())))
+    return np.column_stack((np.radians(lon) * scale, np.radians(lat))) * EARTH_RADIUS_KM
+
+
+def _squared_distances(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return ((points[:, np.newaxis, :] - centroids[np.newaxis, :, :]) ** 2).sum(axis=2)
+
+
+def _kmeans_pp(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        nearest = _squared_distances(points, np.array(centroids)).min(axis=1)
+        total = nearest.sum()
+        index = rng.choice(len(points), p=nearest / total) if total > 0 else rng.integers(len(points))
+        centroids.append(points[index])
+    return np.array(centroids)
+
+
+def _balanced_assign(points: np.ndarray, centroids: np.ndarray, capacity: int) -> np.ndarray:
+    """Nearest centroid with room left; points with the most to lose choose first."""
+    distances = _squared_distances(points, centroids)
+    preference = np.argsort(distances, axis=1)
+    if distances.shape[1] > 1:
+        ranked = np.take_along_axis(distances, preference[:, :2], axis=1)
+        order = np.argsort(ranked[:, 0] - ranked[:, 1])     # largest regret first
+    else:
+        order = np.arange(len(points))
+
+    labels = np.empty(len(points), dtype=int)
+    room = np.full(len(centroids), capacity)
+    for i in order:
+        for cluster in preference[i]:
+            if room[cluster]:
+                labels[i] = cluster
+                room[cluster] -= 1
+                break
+    return labels
+
+
+def cluster_days(points: np.ndarray, days: int, capacity: Optional[int] = None, seed: int = 0) -> np.ndarray:
+    """
+    Day index (0 … days-1) for every point: k-means, then capacity-balanced.
+    Points sharing coordinates count once when choosing the number of days,
+    unless `capacity` needs more days to fit them all.
+    """
+    n = len(points)
+    distinct = len(np.unique(points, axis=0))
+    needed = math.ceil(n / capacity) if capacity else 1
+    k = max(1, min(days, n, max(distinct, needed)))
+    capacity = max(capacity or 0, math.ceil(n / k))
+    rng = np.random.default_rng(seed)
+
+    centroids = _kmeans_pp(points, k, rng)
+    labels = np.full(n, -1)
+    for _ in range(_KMEANS_ITERATIONS):
+        new_labels = _squared_distances(points, centroids).argmin(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        _update_centroids(points, labels, centroids)
+
+    if np.bincount(labels, minlength=k).max() > capacity:
+        for _ in range(_BALANCE_ROUNDS):
+            new_labels = _balanced_assign(points, centroids, capacity)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            _update_centroids(points, labels, centroids)
+    return labels
+
+
+def _update_centroids(points: np.ndarray, labels: np.ndarray, centroids: np.ndarray) -> None:
+    """Move centroids to their members' mean; an empty cluster is reseeded at the worst-fitting point."""
+    for cluster in range(len(centroids)):
+        members = points[labels == cluster]
+        if len(members):
+            centroids[cluster] = members.mean(axis=0)
+    for cluster in np.flatnonzero(np.bincount(labels, minlength=len(centroids)) == 0):
+        misfit = ((points - centroids[labels]) ** 2).sum(axis=1)
+        if misfit.max() > 0:
+            centroids[cluster] = points[misfit.argmax()]
+        # all points sit on their centroids: keep the previous centroid
+
+
+def _path_length(order: np.ndarray, distances: np.ndarray) -> float:
+    return float(distances[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def _nearest_neighbour(distances: np.ndarray, start: int) -> np.ndarray:
+    n = len(distances)
+    order = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, distances[order[-1]])
+        order.append(int(row.argmin()))
+        visited[order[-1]] = True
+    return np.array(order)
+
+
+def two_opt(order: np.ndarray, distances: np.ndarray, max_rounds: Optional[int] = None) -> np.ndarray:
+    """
+    Improve an open path with 2-opt. A zero-distance dummy node closes the
+    path into a tour, so both ends stay free. Every round evaluates all
+    moves at once and applies the best non-overlapping improving ones.
+    """
+    n = len(order)
+    if n < 3:
+        return order
+    extended = np.zeros((n + 1, n + 1))
+    extended[:n, :n] = distances
+    tour = np.concatenate(([n], order))
+    m = n + 1
+    upper = np.triu(np.ones((m, m), dtype=bool), k=2)
+    upper[0, m - 1] = False        # same two edges
+
+    for _ in range(max_rounds or 10 * n):
+        following = np.roll(tour, -1)
+        edge = extended[tour, following]
+        delta = (extended[np.ix_(tour, tour)] + extended[np.ix_(following, following)]
+                 - edge[:, np.newaxis] - edge[np.newaxis, :])
+        delta[~upper] = 0.0
+
+        flat = delta.ravel()
+        best = np.argpartition(flat, min(m, flat.size - 1))[:m]
+        best = best[flat[best] < -1e-9]
+        if not len(best):
+            break
+        # Moves on disjoint position ranges change disjoint edges: apply them together
+        taken: list[tuple[int, int]] = []
+        for index in best[np.argsort(flat[best])]:
+            i, j = divmod(int(index), m)
+            if all(j < a or i > b for a, b in taken):
+                taken.append((i, j))
+                tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+
+    # Reversals start after position 0, so the dummy never moves
+    return tour[1:]
+
+
+def order_day(distances: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Visiting order for one day's places (indices into `distances`)."""
+    if len(distances) < 3:
+        return np.arange(len(distances))
+    outermost = int(((points - points.mean(axis=0)) ** 2).sum(axis=1).argmax())
+    return two_opt(_nearest_neighbour(distances, outermost), distances)
+
+
+def _coordinates(place: dict) -> Optional[tuple[float, float]]:
+    lat, lon = place.get("lat"), place.get("lon")
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+
+def optimize_days(places: list[dict], days: int, per_day: Optional[int] = None, seed: int = 0) -> RoutePlan:
+    """
+    Group `places` (records with "name", "lat", "lon"; best first) into
+    `days` day routes. With `per_day`, only the first days × per_day places
+    with coordinates are planned.
+    """
+    if days < 1:
+        raise ValueError("days must be at least 1")
+    located = [p for p in places if _coordinates(p)]
+    skipped = [p.get("name", "?") for p in places if not _coordinates(p)]
+    if per_day:
+        skipped += [p.get("name", "?") for p in located[days * per_day:]]
+        located = located[:days * per_day]
+    if not located:
+        return RoutePlan(days=[], total_km=0.0, skipped=skipped)
+
+    lat = np.array([p["lat"] for p in located], dtype=float)
+    lon = np.array([p["lon"] for p in located], dtype=float)
+    distances = distance_matrix(lat, lon)
+    points = _project(lat, lon)
+    labels = cluster_days(points, days, capacity=per_day, seed=seed)
+
+    groups = [np.flatnonzero(labels == cluster) for cluster in range(labels.max() + 1)]
+    # Days in a sweep across the city: by each group's angle around the centre
+    centre = points.mean(axis=0)
+    angle = [math.atan2(*(points[g].mean(axis=0) - centre)[::-1]) for g in groups]
+    routes = []
+    for day, cluster in enumerate(np.argsort(angle), start=1):
+        members = groups[cluster]
+        local = distances[np.ix_(members, members)]
+        order = members[order_day(local, points[members])]
+        routes.append(DayRoute(
+            day=day,
+            places=[located[i] for i in order],
+            km=round(_path_length(order, distances), 2),
+        ))
+    return RoutePlan(days=routes, total_km=round(sum(r["km"] for r in routes), 2), skipped=skipped)
+
+
+def format_route(plan: RoutePlan) -> str:
+    """Compact ordered list for the planner: one line per day."""
+    lines = [
+        f"Day {route['day']} (~{route['km']:.1f} km between stops): "
+        + " → ".join(place["name"] for place in route["places"])
+        for route in plan["days"]
+    ]
+    if plan["skipped"]:
+        lines.append(f"Not placed: {', '.join(plan['skipped'][:10])}")
+    return "\n".join(lines)
@@ -1,40 +1,82 @@
 import os
+import json
 import datetime
+from typing import Optional
 
+from utils.plan_archive import get_archive
+from utils.plan_model import plan_from_text, plan_markdown
 
-def save_document(response_text: str, directory: str = "./output"):
-    """Export travel plan to Markdown file with proper formatting"""
-    os.makedirs(directory, exist_ok=True)
 
-    # Create markdown content with metadata header
-    markdown_content = f"""# 🌍 AI Travel Plan
-    
-    # **Generated:** {datetime.datetime.now().strftime('%Y-%m-%d at %H:%M')}  
-      # **Created by:** Roameo's Travel Agent
+def render_markdown(response_text: str, generated_at: Optional[datetime.datetime] = None) -> str:
+    """Render a travel plan as a Markdown document with a metadata header"""
+    generated_at = generated_at or datetime.datetime.now()
 
-      ---
+    return f"""# 🌍 AI Travel Plan
 
-      {response_text}
+**Generated:** {generated_at.strftime('%Y-%m-%d at %H:%M')}
+**Created by:** Roameo's Travel Agent
 
-      ---
+---
 
-      *This travel plan was generated by AI. Please verify all information, especially prices, operating hours, and travel requirements before your trip.*
-      """
+{response_text}
+
+---
+
+*This travel plan was generated by AI. Please verify all information, especially prices, operating hours, and travel requirements before your trip.*
+"""
+
+
+def save_document(
+    response_text: str,
+    directory: str = "./output",
+    question: str = "",
+    destination: str = "",
+    structured_plan: Optional[dict] = None,
+):
+    """
+    Store a travel plan in the compressed plan archive.
+    With `structured_plan` (a TravelPlan dict, utils/plan_model.py) its
+    compact JSON is stored instead of the Markdown, which export_document
+    renders from it.
+    Returns the plan's content hash (use export_document to get Markdown).
+    """
+    try:
+        if structured_plan:
+            response_text = json.dumps(structured_plan, ensure_ascii=False, separators=(",", ":"))
+        key = get_archive(os.path.join(directory, "archive")).put(
+            response_text, question=question, destination=destination
+        )
+        print(f"Plan archived as: {key}")
+        return key
+
+    except Exception as e:
+        print(f"Error archiving plan: {e}")
+        return None
+
+
+def export_document(key: str, directory: str = "./output"):
+    """Render an archived plan to a Markdown file on demand"""
+    archive = get_archive(os.path.join(directory, "archive"))
 
     try:
-        # Write to markdown file with UTF-8 encoding
-        # Generate timestamp-based filename
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{directory}/AI_Trip_Planner_{timestamp}.md"
+        response_text = archive.get(key)
+        if response_text is None:
+            print(f"No archived plan for: {key}")
+            return None
+
+        # Content-addressed filename: identical plans map to the same file
+        filename = f"{directory}/AI_Trip_Planner_{key[:16]}.md"
 
-        print(filename)
+        structured = plan_from_text(response_text)
+        if structured is not None:
+            response_text = plan_markdown(structured)
 
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+            f.write(render_markdown(response_text, archive.first_seen(key)))
 
         print(f"Markdown file saved as: {filename}")
         return filename
 
     except Exception as e:
         print(f"Error saving markdown file: {e}")
-        return None
\ No newline at end of file
+        return None
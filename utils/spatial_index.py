@@ -0,0 +1,342 @@
+"""
+Spatial Index — "near X" answered from places we already have
+--------------------------------------------------------------
+Every Google Places text search returns coordinates with its results
+(utils/place_info.py keeps them as PlaceRecords). `SpatialIndex` files
+those records per city (gazetteer id) in a grid of `cell_km` cells on a
+local projection, so "restaurants near the Louvre" is:
+
+  1. the anchor ("Louvre") looked up by name among the indexed places,
+     the gazetteer, or — only if unknown — one Places text search
+  2. the grid cells overlapping the radius, then exact distances for
+     their places (NumPy), filtered by kind and sorted
+
+A city's index fills from the shared cache ("places" namespace) the first
+time it is queried in a process, and from every search afterwards.
+`NearbySearch` only calls the network (a location-biased Places search)
+when fewer than `min_results` indexed places are within the radius.
+
+config.yaml → nearby.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from typing import Optional, TypedDict
+
+import numpy as np
+
+from utils.config_loader import load_config
+from utils.gazetteer import get_gazetteer, normalize_place_name
+from utils.route_optimizer import EARTH_RADIUS_KM
+
+
+_DEFAULTS = {
+    "cell_km": 0.5,
+    "min_results": 3,         # fewer indexed places within the radius → one network search
+    "max_results": 8,
+    "max_radius_km": 5.0,
+}
+
+# Category words → the record kind they search (place_info.GOOGLE_QUERIES kinds + hotels)
+NEARBY_KINDS = {
+    "restaurants": ("restaurant", "food", "eat", "eatery", "eateries", "dinner", "lunch", "breakfast",
+                    "brunch", "cafe", "coffee", "bakery", "bakeries", "bistro", "dining"),
+    "attractions": ("attraction", "sight", "sightseeing", "museum", "monument", "landmark", "gallery",
+                    "galleries", "church", "park", "garden", "viewpoint", "view", "lookout", "castle", "temple"),
+    "activities": ("activity", "activities", "things to do", "tour", "experience", "shopping", "nightlife",
+                   "bar", "pub", "club", "theater", "theatre", "show"),
+    "transportation": ("transport", "transportation", "metro", "subway", "station", "bus", "buses",
+                       "tram", "train", "taxi", "taxis", "parking"),
+    "hotels": ("hotel", "hostel", "stay", "accommodation", "lodging"),
+}
+# Whole words, optionally plural: "bars" is a bar, "barbers" and "sweat" are not
+_KIND_RES = {
+    kind: re.compile(rf"\b(?:{'|'.join(words)})s?\b") for kind, words in NEARBY_KINDS.items()
+}
+
+
+class NearbyResult(TypedDict):
+    name: str
+    address: str
+    km: float
+    rating: Optional[float]
+    kind: str
+
+
+class NearbyAnswer(TypedDict):
+    anchor: str               # what the distances are measured from
+    city: str                 # gazetteer display name, or the place text when unknown
+    kind: str
+    radius_km: float
+    results: list[NearbyResult]
+    source: str               # "local index" | "google"
+    seconds: float
+
+
+def nearby_settings() -> dict:
+    try:
+        return {**_DEFAULTS, **(load_config().get("nearby") or {})}
+    except Exception:
+        return dict(_DEFAULTS)
+
+
+def nearby_kind(category: str) -> str:
+    """Record kind for a free-form category ("cafes" → "restaurants"); unknown ones pass through."""
+    text = normalize_place_name(category)
+    for kind, pattern in _KIND_RES.items():
+        if pattern.search(text):
+            return kind
+    return text or "attractions"
+
+
+def _haversine(lat: np.ndarray, lon: np.ndarray, lat0: float, lon0: float) -> np.ndarray:
+    lat, lon, lat0, lon0 = np.radians(lat), np.radians(lon), math.radians(lat0), math.radians(lon0)
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * math.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class CityIndex:
+    """Grid-bucketed place records of one city."""
+
+    def __init__(self, lat0: float, lon0: float, cell_km: float):
+        self.lat0, self.lon0, self.cell_km = lat0, lon0, cell_km
+        self._scale = math.cos(math.radians(lat0))
+        self.records: list[dict] = []
+        self.kinds: list[set[str]] = []
+        self._by_id: dict[str, int] = {}
+        self._by_name: dict[str, int] = {}
+        self._dirty = True
+        self._lat = self._lon = np.empty(0)
+        self._cells: dict[tuple[int, int], np.ndarray] = {}
+        self._kind_masks: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _cell(self, lat, lon):
+        x = np.radians(np.asarray(lon) - self.lon0) * self._scale * EARTH_RADIUS_KM
+        y = np.radians(np.asarray(lat) - self.lat0) * EARTH_RADIUS_KM
+        return np.floor(x / self.cell_km).astype(int), np.floor(y / self.cell_km).astype(int)
+
+    def add(self, kind: str, records: list[dict]) -> int:
+        """Add records with coordinates; returns how many places were new."""
+        added = 0
+        for record in records:
+            if record.get("lat") is None or record.get("lon") is None:
+                continue
+            key = record.get("place_id") or f"{record['name']}@{record['lat']:.5f},{record['lon']:.5f}"
+            if key in self._by_id:
+                self.kinds[self._by_id[key]].add(kind)
+                continue
+            self._by_id[key] = len(self.records)
+            self._by_name.setdefault(normalize_place_name(record["name"]), len(self.records))
+            self.records.append(record)
+            self.kinds.append({kind})
+            added += 1
+        self._dirty = True
+        return added
+
+    def _build(self) -> None:
+        self._lat = np.array([r["lat"] for r in self.records], dtype=float)
+        self._lon = np.array([r["lon"] for r in self.records], dtype=float)
+        cx, cy = self._cell(self._lat, self._lon)
+        cells: dict[tuple[int, int], list[int]] = {}
+        for i, cell in enumerate(zip(cx.tolist(), cy.tolist())):
+            cells.setdefault(cell, []).append(i)
+        self._cells = {cell: np.array(members) for cell, members in cells.items()}
+        self._kind_masks = {}
+        for i, kinds in enumerate(self.kinds):
+            for kind in kinds:
+                self._kind_masks.setdefault(kind, np.zeros(len(self.records), dtype=bool))[i] = True
+        self._dirty = False
+
+    def find(self, name: str) -> Optional[dict]:
+        """An indexed place by name: exact, then the shortest name containing it."""
+        key = normalize_place_name(name)
+        if not key:
+            return None
+        if key in self._by_name:
+            return self.records[self._by_name[key]]
+        matches = [n for n in self._by_name if f" {key} " in f" {n} "]
+        return self.records[self._by_name[min(matches, key=len)]] if matches else None
+
+    def nearby(self, lat: float, lon: float, radius_km: float, kind: Optional[str] = None) -> list[tuple[dict, float, str]]:
+        """(record, km, kind) within `radius_km`, nearest first."""
+        if self._dirty:
+            self._build()
+        if not self.records:
+            return []
+        cx, cy = self._cell(lat, lon)
+        reach = math.ceil(radius_km / self.cell_km)
+        candidates = [
+            self._cells[(x, y)]
+            for x in range(int(cx) - reach, int(cx) + reach + 1)
+            for y in range(int(cy) - reach, int(cy) + reach + 1)
+            if (x, y) in self._cells
+        ]
+        if not candidates:
+            return []
+        members = np.concatenate(candidates)
+        if kind is not None:
+            mask = self._kind_masks.get(kind)
+            if mask is None:
+                return []
+            members = members[mask[members]]
+        km = _haversine(self._lat[members], self._lon[members], lat, lon)
+        inside = km <= radius_km
+        members, km = members[inside], km[inside]
+        order = np.argsort(km)
+        return [
+            (self.records[i], float(d), kind or sorted(self.kinds[i])[0])
+            for i, d in zip(members[order].tolist(), km[order].tolist())
+        ]
+
+
+class SpatialIndex:
+    """Process-wide CityIndex per gazetteer city (or per normalized place text)."""
+
+    def __init__(self, cell_km: float = _DEFAULTS["cell_km"]):
+        self.cell_km = cell_km
+        self.gazetteer = get_gazetteer()
+        self._cities: dict[str, CityIndex] = {}
+        self._warmed: set[str] = set()
+        self._lock = threading.Lock()
+
+    def city_key(self, place: str) -> str:
+        known = self.gazetteer.resolve(place)
+        return known["id"] if known else normalize_place_name(place)
+
+    def _city(self, place: str, near: Optional[tuple[float, float]] = None) -> Optional[CityIndex]:
+        key = self.city_key(place)
+        if key not in self._cities:
+            known = self.gazetteer.resolve(place)
+            centre = (known["lat"], known["lon"]) if known else near
+            if centre is None:
+                return None
+            self._cities[key] = CityIndex(centre[0], centre[1], self.cell_km)
+        return self._cities[key]
+
+    def add(self, place: str, kind: str, records: list[dict]) -> int:
+        """File search results for `place` (the city searched) under `kind`."""
+        located = [r for r in records or [] if r.get("lat") is not None and r.get("lon") is not None]
+        if not located:
+            return 0
+        with self._lock:
+            city = self._city(place, near=(located[0]["lat"], located[0]["lon"]))
+            return city.add(kind, located)
+
+    def needs_warming(self, place: str) -> bool:
+        """True once per city and process: the caller then adds the city's cached records."""
+        key = self.city_key(place)
+        with self._lock:
+            if key in self._warmed:
+                return False
+            self._warmed.add(key)
+            return True
+
+    def find(self, place: str, name: str) -> Optional[dict]:
+        with self._lock:
+            city = self._cities.get(self.city_key(place))
+            return city.find(name) if city else None
+
+    def nearby(self, place: str, lat: float, lon: float, radius_km: float, kind: Optional[str] = None):
+        with self._lock:
+            city = self._cities.get(self.city_key(place))
+            return city.nearby(lat, lon, radius_km, kind) if city else []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {key: len(city) for key, city in self._cities.items()}
+
+
+_index: Optional[SpatialIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_spatial_index() -> SpatialIndex:
+    """Process-wide index configured by config.yaml → nearby."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SpatialIndex(cell_km=nearby_settings()["cell_km"])
+        return _index
+
+
+class NearbySearch:
+    """
+    search_nearby's lookup: anchor → indexed places within a radius, with
+    one network search when the index is too thin there. `google` is a
+    utils.place_info.GooglePlaceSearchTool.
+    """
+
+    def __init__(self, google, index: Optional[SpatialIndex] = None, settings: Optional[dict] = None):
+        self.google = google
+        self.index = index or get_spatial_index()
+        self.settings = settings or nearby_settings()
+        self.gazetteer = get_gazetteer()
+
+    def split_place(self, place: str) -> tuple[str, str]:
+        """("Louvre Museum, Paris") → ("Louvre Museum", "Paris, France"); the city may be ""."""
+        parts = [p.strip() for p in place.split(",") if p.strip()]
+        for start in range(len(parts)):
+            known = self.gazetteer.resolve(", ".join(parts[start:]))
+            if known:
+                return ", ".join(parts[:start]), self.gazetteer.display_name(known)
+        return place.strip(), ""
+
+    def _warm(self, city: str) -> None:
+        if city and self.index.needs_warming(city):
+            for kind in self.google.record_kinds():
+                self.index.add(city, kind, self.google.cached_records(kind, city))
+
+    def locate(self, anchor: str, city: str) -> Optional[tuple[str, float, float, str]]:
+        """(label, lat, lon, city) of the anchor: index, gazetteer, then one text search."""
+        if city:
+            record = self.index.find(city, anchor) if anchor else None
+            if record:
+                return record["name"], record["lat"], record["lon"], city
+            if not anchor:
+                known = self.gazetteer.resolve(city)
+                return "the city centre", known["lat"], known["lon"], city
+
+        record = self.google.locate(", ".join(p for p in (anchor, city) if p))
+        if record is None:
+            return None
+        city = city or anchor
+        self.index.add(city, "landmarks", [record])
+        return record["name"], record["lat"], record["lon"], city
+
+    def search(self, place: str, category: str, radius_km: float = 1.0) -> Optional[NearbyAnswer]:
+        """Places of `category` within `radius_km` of `place`; None when the anchor cannot be found."""
+        started = time.perf_counter()
+        radius_km = min(max(radius_km, 0.1), self.settings["max_radius_km"])
+        kind = nearby_kind(category)
+        anchor, city = self.split_place(place)
+        self._warm(city)
+
+        located = self.locate(anchor, city)
+        if located is None:
+            return None
+        label, lat, lon, city = located
+
+        found = self.index.nearby(city, lat, lon, radius_km, kind)
+        source = "local index"
+        if len(found) < self.settings["min_results"]:
+            self.index.add(city, kind, self.google.nearby_records(kind, lat, lon, radius_km))
+            found = self.index.nearby(city, lat, lon, radius_km, kind)
+            source = "google"
+
+        results = [
+            NearbyResult(name=r["name"], address=r.get("address", ""), km=round(km, 2),
+                         rating=r.get("rating"), kind=k)
+            for r, km, k in found
+            if normalize_place_name(r["name"]) != normalize_place_name(label)
+        ][: self.settings["max_results"]]
+        return NearbyAnswer(
+            anchor=label, city=city, kind=kind, radius_km=radius_km, results=results,
+            source=source, seconds=time.perf_counter() - started,
+        )
@@ -0,0 +1,353 @@
+"""
+Speech-to-Text — chunked, parallel transcription
+------------------------------------------------
+Pipeline behind `transcribe_audio()`:
+  1. decode wav / mp3 / m4a as a stream of 16 kHz mono PCM blocks
+     (stdlib `wave` for WAV, an ffmpeg pipe for everything else)
+  2. split on silence into bounded chunks (min/max chunk length)
+  3. transcribe chunks in parallel on a process pool through a pluggable
+     `TranscriptionBackend` — chunks are submitted while decoding continues
+  4. stitch the chunk texts back together in order
+
+Results are memoized by the SHA-256 of the audio bytes, so the same upload
+is never transcribed twice by the same backend. With enough workers a long
+recording takes roughly as long as its longest chunk.
+
+Backends:
+  - WhisperBackend: local CPU inference with openai-whisper (optional dependency;
+                    `default_backend()` raises TranscriptionUnavailable without it)
+  - StubBackend:    deterministic, dependency-free output for tests
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+
+
+SAMPLE_RATE = 16_000
+_BLOCK_SECONDS = 1.0
+_FRAME_SECONDS = 0.03
+
+
+# -------------------------
+# Backends
+# -------------------------
+
+class TranscriptionUnavailable(RuntimeError):
+    """The configured backend cannot run here (e.g. openai-whisper is not installed)."""
+
+
+class TranscriptionBackend(ABC):
+    """Transcribes one chunk of 16 kHz mono float32 audio in [-1, 1]."""
+
+    name: str = "base"
+
+    @abstractmethod
+    def transcribe(self, samples: np.ndarray) -> str:
+        ...
+
+    def cache_key(self) -> str:
+        """Identifies the backend configuration in the memo cache."""
+        return self.name
+
+
+class StubBackend(TranscriptionBackend):
+    """Deterministic backend: describes each chunk by duration and content hash."""
+
+    name = "stub"
+
+    def transcribe(self, samples: np.ndarray) -> str:
+        digest = hashlib.sha256(samples.astype(np.float32).tobytes()).hexdigest()
+        return f"<{len(samples) / SAMPLE_RATE:.2f}s audio {digest[:8]}>"
+
+
+_whisper_models: dict = {}
+
+
+class WhisperBackend(TranscriptionBackend):
+    """Local CPU inference with openai-whisper; the model loads once per worker."""
+
+    name = "whisper"
+
+    def __init__(self, model_name: str = "base", language: Optional[str] = None):
+        self.model_name = model_name
+        self.language = language
+
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.model_name}:{self.language or 'auto'}"
+
+    def transcribe(self, samples: np.ndarray) -> str:
+        model = _whisper_models.get(self.model_name)
+        if model is None:
+            try:
+                import whisper
+            except ImportError as exc:
+                raise RuntimeError(
+                    "openai-whisper is not installed. Run `pip install openai-whisper`."
+                ) from exc
+            model = whisper.load_model(self.model_name, device="cpu")
+            _whisper_models[self.model_name] = model
+
+        result = model.transcribe(
+            samples.astype(np.float32), fp16=False, language=self.language
+        )
+        return result.get("text", "").strip()
+
+
+def default_backend() -> TranscriptionBackend:
+    """
+    Backend selected by STT_BACKEND ('whisper' or 'stub') and WHISPER_MODEL.
+    Raises TranscriptionUnavailable when whisper is selected but not installed.
+    """
+    backend = os.getenv("STT_BACKEND", "whisper").lower()
+    if backend == "stub":
+        return StubBackend()
+    if backend == "whisper":
+        if importlib.util.find_spec("whisper") is None:
+            raise TranscriptionUnavailable(
+                "openai-whisper is not installed (`pip install openai-whisper`, or set STT_BACKEND=stub)"
+            )
+        return WhisperBackend(model_name=os.getenv("WHISPER_MODEL", "base"))
+    raise ValueError(f"Unsupported STT backend: {backend}")
+
+
+# -------------------------
+# Streaming decode
+# -------------------------
+
+def _read_source(source) -> bytes:
+    """Raw bytes of a path, bytes object or file-like (e.g. Streamlit UploadedFile)."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def _is_wav(data: bytes) -> bool:
+    return data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+def _to_mono_16k(block: np.ndarray, channels: int, rate: int) -> np.ndarray:
+    if channels > 1:
+        block = block.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE and len(block):
+        n_out = int(round(len(block) * SAMPLE_RATE / rate))
+        block = np.interp(
+            np.linspace(0, len(block) - 1, n_out), np.arange(len(block)), block
+        )
+    return block.astype(np.float32)
+
+
+def _decode_wav(stream: BinaryIO) -> Iterator[np.ndarray]:
+    with wave.open(stream, "rb") as wav:
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        width = wav.getsampwidth()
+        if width not in (1, 2, 4):
+            raise ValueError(f"Unsupported WAV sample width: {width * 8} bit")
+
+        dtype, scale = {1: (np.uint8, 128.0), 2: (np.int16, 32768.0), 4: (np.int32, 2147483648.0)}[width]
+        frames_per_block = int(rate * _BLOCK_SECONDS)
+
+        while True:
+            raw = wav.readframes(frames_per_block)
+            if not raw:
+                break
+            block = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+            if width == 1:
+                block -= 128.0
+            yield _to_mono_16k(block / scale, channels, rate)
+
+
+def _decode_ffmpeg(data: bytes) -> Iterator[np.ndarray]:
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg is required to decode mp3/m4a audio but was not found on PATH.")
+
+    proc = subprocess.Popen(
+        [ffmpeg, "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    def feed():
+        try:
+            proc.stdin.write(data)
+        except BrokenPipeError:
+            pass
+        finally:
+            proc.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+
+    block_bytes = int(SAMPLE_RATE * _BLOCK_SECONDS) * 2
+    try:
+        while True:
+            raw = proc.stdout.read(block_bytes)
+            if not raw:
+                break
+            raw = raw[: len(raw) - (len(raw) % 2)]
+            yield np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        proc.stdout.close()
+        writer.join()
+        stderr = proc.stderr.read().decode("utf-8", "replace").strip()
+        proc.stderr.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode audio: {stderr}")
+
+
+def decode_stream(data: bytes) -> Iterator[np.ndarray]:
+    """Yield 16 kHz mono float32 blocks of roughly one second each."""
+    if _is_wav(data):
+        import io
+        return _decode_wav(io.BytesIO(data))
+    return _decode_ffmpeg(data)
+
+
+# -------------------------
+# Silence-based chunking
+# -------------------------
+
+def split_on_silence(
+    blocks: Iterator[np.ndarray],
+    min_chunk_s: float = 5.0,
+    max_chunk_s: float = 30.0,
+    min_silence_s: float = 0.4,
+    silence_db: float = -40.0,
+) -> Iterator[np.ndarray]:
+    """
+    Group decoded blocks into chunks that end in silence.
+    A chunk is cut at the first silent run of `min_silence_s` after
+    `min_chunk_s`, and forcibly at `max_chunk_s`.
+    """
+    frame = int(SAMPLE_RATE * _FRAME_SECONDS)
+    min_len = int(SAMPLE_RATE * min_chunk_s)
+    max_len = int(SAMPLE_RATE * max_chunk_s)
+    silence_frames = max(1, int(min_silence_s / _FRAME_SECONDS))
+    threshold = 10 ** (silence_db / 20)
+
+    buffer = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+
+        while len(buffer) >= min_len:
+            cut = _find_silence_cut(buffer, min_len, max_len, frame, silence_frames, threshold)
+            if cut is None:
+                if len(buffer) < max_len:
+                    break
+                cut = max_len
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+    if len(buffer) and np.abs(buffer).max() > threshold:
+        yield buffer
+
+
+def _find_silence_cut(buffer, min_len, max_len, frame, silence_frames, threshold) -> Optional[int]:
+    window = buffer[: (min(len(buffer), max_len) // frame) * frame]
+    if len(window) < min_len:
+        return None
+
+    rms = np.sqrt(np.mean(window.reshape(-1, frame) ** 2, axis=1))
+    silent = rms < threshold
+
+    run = 0
+    for i in range(min_len // frame, len(silent)):
+        run = run + 1 if silent[i] else 0
+        if run >= silence_frames:
+            # cut in the middle of the silent run
+            return (i - run // 2) * frame
+    return None
+
+
+# -------------------------
+# Parallel execution
+# -------------------------
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> Executor:
+    """Shared worker pool; 'spawn' keeps workers safe under Streamlit's threads."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.getenv("STT_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _transcribe_chunk(backend: TranscriptionBackend, samples: np.ndarray) -> str:
+    return backend.transcribe(samples)
+
+
+_MEMO_SIZE = 128
+_memo: OrderedDict[str, str] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def audio_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def transcribe_audio(
+    uploaded_file,
+    backend: Optional[TranscriptionBackend] = None,
+    executor: Optional[Executor] = None,
+) -> str:
+    """
+    Transcribe an audio upload (path, bytes or file-like) to text.
+    Raises RuntimeError / ValueError when the audio cannot be decoded or transcribed.
+    """
+    backend = backend or default_backend()
+    data = _read_source(uploaded_file)
+    if not data:
+        raise ValueError("Audio file is empty.")
+
+    key = f"{backend.cache_key()}:{audio_hash(data)}"
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+
+    pool = executor or _get_executor()
+    futures: list[Future] = [
+        pool.submit(_transcribe_chunk, backend, chunk)
+        for chunk in split_on_silence(decode_stream(data))
+    ]
+    texts = [f.result() for f in futures]
+    text = " ".join(t.strip() for t in texts if t and t.strip())
+
+    with _memo_lock:
+        _memo[key] = text
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+
+    print(f"🎧 Transcribed {len(futures)} chunk(s) with {backend.cache_key()}")
+    return text
@@ -1,5 +1,21 @@
+import os
+
 import requests
 
+from utils.cache_backend import get_cache
+from utils.gazetteer import canonical_place_key, get_gazetteer
+
+
+FORECAST_DAYS = 5   # what the get_weather_forecast tool asks for
+
+
+def weather_cache_key(place: str) -> str:
+    return canonical_place_key(place)
+
+
+def forecast_cache_key(place: str, days: int = FORECAST_DAYS) -> str:
+    return f"{canonical_place_key(place)}|{days}"
+
 
 class WeatherForecastTool:
     """
@@ -13,17 +29,40 @@ class WeatherForecastTool:
             warnings.warn("OPENWEATHERMAP_API_KEY not provided – weather tools will return empty results.")
 
         self.api_key = api_key or ""
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+        # Overridable for local stand-ins (benchmarks/api_standins.py)
+        self.base_url = os.environ.get("OPENWEATHERMAP_BASE_URL", "https://api.openweathermap.org/data/2.5")
+        self.gazetteer = get_gazetteer()
+        self.cache = get_cache()
+
+    def _location_params(self, place: str) -> dict:
+        """
+        Query by coordinates for places in the gazetteer ("Paris" is also in
+        Texas); fall back to OpenWeatherMap's name search otherwise.
+        """
+        known = self.gazetteer.resolve(place)
+        if known:
+            return {"lat": known["lat"], "lon": known["lon"]}
+        return {"q": place}
 
-    def get_current_weather(self, place: str) -> dict:
+    def get_current_weather(self, place: str, refresh: bool = False) -> dict:
         """
         Get current weather of a place (compact).
+        Shared across workers through the "weather" cache namespace;
+        `refresh` re-fetches it ahead of expiry (utils/prewarm.py).
         """
+        lookup = self.cache.refresh if refresh else self.cache.get_or_compute
+        return lookup(
+            "weather",
+            weather_cache_key(place),
+            lambda: self._fetch_current_weather(place) or None,
+        ) or {}
+
+    def _fetch_current_weather(self, place: str) -> dict:
         try:
             response = requests.get(
                 f"{self.base_url}/weather",
                 params={
-                    "q": place,
+                    **self._location_params(place),
                     "appid": self.api_key,
                     "units": "metric",
                 },
@@ -45,15 +84,24 @@ class WeatherForecastTool:
         except requests.RequestException:
             return {}
 
-    def get_forecast_weather(self, place: str, days: int = 5) -> list:
+    def get_forecast_weather(self, place: str, days: int = FORECAST_DAYS, refresh: bool = False) -> list:
         """
         Get short-term forecast (daily summary).
+        Shared across workers through the "forecast" cache namespace.
         """
+        lookup = self.cache.refresh if refresh else self.cache.get_or_compute
+        return lookup(
+            "forecast",
+            forecast_cache_key(place, days),
+            lambda: self._fetch_forecast_weather(place, days) or None,
+        ) or []
+
+    def _fetch_forecast_weather(self, place: str, days: int) -> list:
         try:
             response = requests.get(
                 f"{self.base_url}/forecast",
                 params={
-                    "q": place,
+                    **self._location_params(place),
                     "appid": self.api_key,
                     "units": "metric",
                     "cnt": days * 8,  # approx daily data